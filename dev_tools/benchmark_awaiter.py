@@ -0,0 +1,99 @@
+#!/usr/bin/python3
+# SPDX-License-Identifier: GPL-3.0-only
+
+"""Measure AwaiterImpl throughput of the common operations, optionally with multiple threads competing"""
+
+import argparse
+import time
+from threading import Thread, Barrier
+
+from revvy.utils.awaiter import AwaiterImpl, AwaiterSignal
+
+
+def _nothing():
+    pass
+
+
+def bench_state_reads(n):
+    awaiter = AwaiterImpl()
+    for _ in range(n):
+        _ = awaiter.state
+
+
+def bench_finish(n):
+    for _ in range(n):
+        awaiter = AwaiterImpl()
+        awaiter.on_result(_nothing)
+        awaiter.finish()
+
+
+def bench_cancel(n):
+    for _ in range(n):
+        awaiter = AwaiterImpl()
+        awaiter.on_cancelled(_nothing)
+        awaiter.cancel()
+
+
+def bench_already_finished(n):
+    awaiter = AwaiterImpl.from_state(AwaiterSignal.FINISHED)
+    for _ in range(n):
+        awaiter.on_result(_nothing)
+        awaiter.finish()
+        awaiter.wait()
+
+
+def bench_wait_finish(n):
+    """One thread waits for the awaiters that are finished by an other thread"""
+    awaiters = [AwaiterImpl() for _ in range(n)]
+
+    def _finish_all():
+        for a in awaiters:
+            a.finish()
+
+    finisher = Thread(target=_finish_all)
+    finisher.start()
+    for awaiter in awaiters:
+        awaiter.wait()
+    finisher.join()
+
+
+benchmarks = {
+    'state': bench_state_reads,
+    'finish': bench_finish,
+    'cancel': bench_cancel,
+    'already_finished': bench_already_finished,
+    'wait_finish': bench_wait_finish,
+}
+
+
+def run(benchmark, iterations, threads):
+    barrier = Barrier(threads + 1)
+
+    def _run():
+        barrier.wait()
+        benchmark(iterations)
+
+    workers = [Thread(target=_run) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+
+    barrier.wait()
+    start = time.perf_counter()
+    for worker in workers:
+        worker.join()
+
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--iterations', help='Iterations per thread', type=int, default=100000)
+    parser.add_argument('--threads', help='Number of threads running the same benchmark', type=int, default=1)
+    parser.add_argument('benchmark', nargs='*', choices=[[], *benchmarks.keys()], default=[])
+
+    args = parser.parse_args()
+
+    for name in args.benchmark or benchmarks.keys():
+        elapsed = run(benchmarks[name], args.iterations, args.threads)
+        ops = args.iterations * args.threads / elapsed
+        print(f'{name:>20}: {elapsed:.3f}s, {ops:,.0f} ops/s')
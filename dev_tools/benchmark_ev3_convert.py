@@ -0,0 +1,57 @@
+#!/usr/bin/python3
+# SPDX-License-Identifier: GPL-3.0-only
+
+"""Compare the EV3 sample conversion with the previous implementation that unpacked and scaled values one by one"""
+
+import argparse
+import struct
+import time
+
+from revvy.robot.ports.sensors.ev3 import Ev3Mode
+from revvy.utils.functions import split, map_values
+
+# (number of samples, data type index, payload)
+cases = {
+    'u8x1': (1, 0, struct.pack('<B', 42)),
+    's16x3': (3, 3, struct.pack('<3h', -100, 200, 300)),
+    'floatx4': (4, 7, struct.pack('<4f', 1.5, 2.5, 3.5, 4.5)),
+}
+
+
+def convert_per_sample(mode, data):
+    type_info = mode._type_info[mode._dataType]
+
+    values = []
+    for chunk in split(data, type_info.data_size):
+        (value,) = struct.unpack(type_info.read_pattern, chunk)
+
+        values.append(map_values(value, mode._raw_min, mode._raw_max, mode._si_min, mode._si_max))
+
+    return values
+
+
+def measure(fn, n):
+    start = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--iterations', help='Number of iterations', type=int, default=100000)
+    parser.add_argument('case', nargs='*', choices=[[], *cases.keys()], default=[])
+
+    args = parser.parse_args()
+
+    for name in args.case or cases.keys():
+        n_samples, data_type, payload = cases[name]
+        ev3_mode = Ev3Mode(n_samples, data_type, 4, 0, -1000, 1000, -100, 100, -10, 10)
+        frame = b'\x80' + payload
+
+        # the previous implementation received the payload as a slice of the frame
+        old = measure(lambda: convert_per_sample(ev3_mode, frame[1:]), args.iterations)
+        new = measure(lambda: ev3_mode.convert(frame, 1), args.iterations)
+
+        print(f'{name:>10}: per sample: {args.iterations / old:,.0f} ops/s, '
+              f'single pass: {args.iterations / new:,.0f} ops/s ({old / new:.1f}x)')
@@ -0,0 +1,87 @@
+#!/usr/bin/python3
+# SPDX-License-Identifier: GPL-3.0-only
+
+"""Measure attribute access through PortInstance on the status loop and drivetrain hot paths"""
+
+import argparse
+import struct
+import time
+from unittest.mock import Mock
+
+from revvy.robot.configurations import Motors, Sensors
+from revvy.robot.ports.motor import create_motor_port_handler
+from revvy.robot.ports.sensor import create_sensor_port_handler
+
+
+def create_ports():
+    interface = Mock()
+    interface.get_motor_port_amount = Mock(return_value=6)
+    interface.get_motor_port_types = Mock(return_value={"NotConfigured": 0, "DcMotor": 1})
+    interface.get_sensor_port_amount = Mock(return_value=4)
+    interface.get_sensor_port_types = Mock(return_value={"NotConfigured": 0, "HC_SR04": 1, "BumperSwitch": 2})
+
+    motor = create_motor_port_handler(interface)[1]
+    motor.configure(Motors.RevvyMotor)
+
+    sensor = create_sensor_port_handler(interface)[1]
+    sensor.configure(Sensors.BumperSwitch)
+
+    return motor, sensor
+
+
+def bench_motor_status_update(motor, _, n):
+    data = struct.pack('<bblf', 0, 0, 0, 0)
+    for _ in range(n):
+        motor.update_status(data)
+
+
+def bench_motor_reads(motor, _, n):
+    for _ in range(n):
+        _ = motor.pos, motor.speed, motor.status
+
+
+def bench_motor_state(motor, _, n):
+    for _ in range(n):
+        _ = motor.state
+
+
+def bench_drivetrain_command(motor, _, n):
+    for _ in range(n):
+        motor.create_set_speed_command(10)
+
+
+def bench_sensor_status_update(_, sensor, n):
+    data = ([1, 0], [0, 0])
+    for i in range(n):
+        sensor.update_status(data[i & 1])
+
+
+def bench_sensor_value(_, sensor, n):
+    for _ in range(n):
+        _ = sensor.value
+
+
+benchmarks = {
+    'motor_status_update': bench_motor_status_update,
+    'motor_reads': bench_motor_reads,
+    'motor_state': bench_motor_state,
+    'drivetrain_command': bench_drivetrain_command,
+    'sensor_status_update': bench_sensor_status_update,
+    'sensor_value': bench_sensor_value,
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--iterations', help='Number of iterations', type=int, default=100000)
+    parser.add_argument('benchmark', nargs='*', choices=[[], *benchmarks.keys()], default=[])
+
+    args = parser.parse_args()
+
+    motor_port, sensor_port = create_ports()
+
+    for name in args.benchmark or benchmarks.keys():
+        start = time.perf_counter()
+        benchmarks[name](motor_port, sensor_port, args.iterations)
+        elapsed = time.perf_counter() - start
+        print(f'{name:>20}: {elapsed:.3f}s, {args.iterations / elapsed:,.0f} ops/s')
@@ -13,15 +13,18 @@ from revvy.revvy_utils import RobotBLEController, RevvyStatusCode
 from revvy.robot.robot import Robot
 from revvy.robot.led_ring import RingLed
 from revvy.robot.status import RobotStatus
+from revvy.robot.ports.sensors.ev3 import ev3_mode_cache
+from revvy.scripting.code_cache import code_cache
 from revvy.scripting.runtime import ScriptDescriptor
 from revvy.bluetooth.ble_revvy import Observable, RevvyBLE
 from revvy.utils.error_handler import register_uncaught_exception_handler
 from revvy.utils.file_storage import FileStorage, MemoryStorage, StorageError, create_unique_file
 from revvy.firmware_updater import update_firmware
-from revvy.utils.functions import get_serial, read_json, str_to_func
+from revvy.utils.functions import get_serial, read_json
 from revvy.bluetooth.longmessage import LongMessageHandler, LongMessageStorage, LongMessageType, LongMessageStatus, \
     ReceivedLongMessage
-from revvy.robot_config import empty_robot_config, RobotConfig, ConfigError
+from revvy.robot_config import empty_robot_config, RobotConfigCache, ConfigError
+from revvy.utils.latency import latency_tracer
 from revvy.utils.logger import get_logger
 from revvy.utils.progress_indicator import ProgressIndicator
 from revvy.utils.version import Version
@@ -71,6 +74,7 @@ class LongMessageImplementation:
         self._asset_dir = asset_dir
         self._progress = None
         self._storage = storage
+        self._config_cache = RobotConfigCache()
 
         self._log = get_logger("LongMessageImplementation")
 
@@ -124,7 +128,7 @@ class LongMessageImplementation:
             test_script_source = message.data.decode()
             self._log(f'Running test script: {test_script_source}')
 
-            script_descriptor = ScriptDescriptor("test_kit", str_to_func(test_script_source), 0)
+            script_descriptor = ScriptDescriptor("test_kit", code_cache.create_runnable(test_script_source), 0)
 
             def start_script():
                 self._log("Starting new test script")
@@ -137,11 +141,8 @@ class LongMessageImplementation:
             self._robot.configure(empty_robot_config, start_script)
 
         elif message_type == LongMessageType.CONFIGURATION_DATA:
-            message_data = message.data.decode()
-            self._log(f'New configuration: {message_data}')
-
             try:
-                parsed_config = RobotConfig.from_string(message_data)
+                parsed_config = self._config_cache.parse(message.md5, message.data)
 
                 if self._ignore_config:
                     self._log('New configuration ignored')
@@ -188,6 +189,7 @@ if __name__ == "__main__":
         logger.minimum_level = LogLevel.INFO
     else:
         logger.minimum_level = LogLevel.DEBUG
+        latency_tracer.enabled = True
 
     def on_log_flush(buffer):
         with create_unique_file(os.path.join(data_dir, 'revvy_log')) as file:
@@ -198,6 +200,8 @@ if __name__ == "__main__":
 
     device_storage = FileStorage(data_dir)
     ble_storage = FileStorage(ble_storage_dir)
+    code_cache.storage = FileStorage(os.path.join(data_dir, 'script_cache'))
+    ev3_mode_cache.storage = FileStorage(os.path.join(data_dir, 'ev3_modes'))
 
     writeable_assets_dir = os.path.join(writeable_data_dir, 'assets')
 
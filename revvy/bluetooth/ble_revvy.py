@@ -2,12 +2,15 @@
 
 import os
 import struct
+import time
 import traceback
 
 from pybleno import Bleno, BlenoPrimaryService, Characteristic, Descriptor
 from revvy.bluetooth.longmessage import LongMessageError, LongMessageProtocol
-from revvy.utils.functions import bits_to_bool_list
+from revvy.bluetooth.notification_throttle import NotificationThrottle
+from revvy.bluetooth.telemetry import encode_telemetry
 from revvy.robot.remote_controller import RemoteControllerCommand
+from revvy.utils.latency import latency_tracer
 from revvy.utils.logger import get_logger
 
 
@@ -181,9 +184,46 @@ class MotorCharacteristic(BrainToMobileFunctionCharacteristic):
     pass
 
 
+class TelemetryCharacteristic(BrainToMobileFunctionCharacteristic):
+    """State of all motors, sensors, the battery and the IMU in a single notification"""
+
+    default_max_value_size = 20
+
+    def __init__(self, uuid, description):
+        super().__init__(uuid, description)
+        self._max_value_size = self.default_max_value_size
+
+    @property
+    def max_value_size(self):
+        return self._max_value_size
+
+    @property
+    def is_subscribed(self):
+        return self._updateValueCallback is not None
+
+    def onSubscribe(self, max_value_size, update_value_callback):
+        self._max_value_size = max_value_size
+        super().onSubscribe(max_value_size, update_value_callback)
+
+
+def _encode_motor_status(fields):
+    (power, speed, position) = fields
+    return list(struct.pack(">flb", speed, position, power))
+
+
 class LiveMessageService(BlenoPrimaryService):
+    # status frames arrive at up to 200Hz, notifications are limited to 20Hz per characteristic
+    notification_interval = 0.05
+
+    # minimum change of (power, speed, position) that is worth a notification
+    motor_min_delta = (1, 1, 1)
+
     def __init__(self):
         self._message_handler = None
+        self._last_telemetry_time = None
+
+        self._telemetry_characteristic = TelemetryCharacteristic('0ce6bd8e-a5b3-4d4d-a1b6-2d1ad2b8a1d4',
+                                                                 b'Telemetry')
 
         self._sensor_characteristics = [
             SensorCharacteristic('135032e6-3e86-404f-b0a9-953fd46dcb17', b'Sensor 1'),
@@ -201,13 +241,25 @@ class LiveMessageService(BlenoPrimaryService):
             MotorCharacteristic('8e4c474f-188e-4d2a-910a-cf66f674f569', b'Motor 6'),
         ]
 
+        self._sensor_throttles = [
+            NotificationThrottle(characteristic.update, list, self.notification_interval)
+            for characteristic in self._sensor_characteristics
+        ]
+
+        self._motor_throttles = [
+            NotificationThrottle(characteristic.update, _encode_motor_status, self.notification_interval,
+                                 self.motor_min_delta)
+            for characteristic in self._motor_characteristics
+        ]
+
         super().__init__({
             'uuid':            'd2d5558c-5b9d-11e9-8647-d663bd873d93',
             'characteristics': [
                 MobileToBrainFunctionCharacteristic('7486bec3-bb6b-4abd-a9ca-20adc281a0a4', 20, 20, b'simpleControl',
                                                     self.simple_control_callback),
                 *self._sensor_characteristics,
-                *self._motor_characteristics
+                *self._motor_characteristics,
+                self._telemetry_characteristic
             ]
         })
 
@@ -215,22 +267,49 @@ class LiveMessageService(BlenoPrimaryService):
         self._message_handler = callback
 
     def simple_control_callback(self, data):
+        timestamp = latency_tracer.timestamp()
         analog_values = data[1:11]
-        button_values = bits_to_bool_list(data[11:15])
+        button_values = int.from_bytes(data[11:15], byteorder='little')
 
         message_handler = self._message_handler
         if message_handler:
-            message_handler(RemoteControllerCommand(analog=analog_values, buttons=button_values))
+            message_handler(RemoteControllerCommand(analog=analog_values, buttons=button_values,
+                                                    timestamp=timestamp))
         return True
 
     def update_sensor(self, sensor, value):
-        if 0 < sensor <= len(self._sensor_characteristics):
-            self._sensor_characteristics[sensor - 1].update(value)
+        if 0 < sensor <= len(self._sensor_throttles):
+            self._sensor_throttles[sensor - 1].update(tuple(value))
 
     def update_motor(self, motor, power, speed, position):
-        if 0 < motor <= len(self._motor_characteristics):
-            data = list(struct.pack(">flb", speed, position, power))
-            self._motor_characteristics[motor - 1].update(data)
+        if 0 < motor <= len(self._motor_throttles):
+            self._motor_throttles[motor - 1].update((power, speed, position))
+
+    def update_telemetry(self, robot):
+        """Send the state of the robot, at most once per notification interval and only if there is a subscriber"""
+        characteristic = self._telemetry_characteristic
+        if not characteristic.is_subscribed:
+            return
+
+        now = time.monotonic()
+        if self._last_telemetry_time is None or now - self._last_telemetry_time >= self.notification_interval:
+            self._last_telemetry_time = now
+            characteristic.update(encode_telemetry(robot, characteristic.max_value_size))
+
+    def flush(self):
+        """Send the notifications that were delayed by rate limiting"""
+        for throttle in self._sensor_throttles:
+            throttle.flush()
+        for throttle in self._motor_throttles:
+            throttle.flush()
+
+    @property
+    def notification_counters(self):
+        """Number of sent and suppressed notifications, by characteristic"""
+        return {
+            **{f'sensor_{i}': (t.sent, t.suppressed) for i, t in enumerate(self._sensor_throttles, start=1)},
+            **{f'motor_{i}': (t.sent, t.suppressed) for i, t in enumerate(self._motor_throttles, start=1)},
+        }
 
 # Device Information Service
 
@@ -0,0 +1,89 @@
+# SPDX-License-Identifier: GPL-3.0-only
+
+import time
+
+
+class NotificationThrottle:
+    """Limit the rate of notifications sent on a characteristic
+
+    Values are given as a tuple of fields. A new value is only sent if at least one field differs from the last sent
+    value by at least the corresponding threshold in min_delta (any difference, if min_delta is None), and if at least
+    min_interval seconds have passed since the last notification. Otherwise the value is kept pending and later
+    values replace it, so the latest value is sent by flush() once the interval expires.
+
+    Values are only encoded when they are sent. Not thread safe: meant to be used from the status update thread.
+    """
+
+    def __init__(self, send, encode, min_interval=0.05, min_delta=None, time_source=time.monotonic):
+        """
+        @param send: called with the encoded value to send a notification
+        @param encode: converts the tuple of fields to the characteristic value
+        @param min_interval: minimum time between two notifications, in seconds
+        @param min_delta: tuple of thresholds, one for each field
+        """
+        self._send = send
+        self._encode = encode
+        self._min_interval = min_interval
+        self._min_delta = min_delta
+        self._time = time_source
+
+        self._last_sent = None
+        self._last_sent_time = None
+        self._pending = None
+
+        self.sent = 0
+        self.suppressed = 0
+
+    def _is_significant(self, fields):
+        last = self._last_sent
+        if last is None:
+            return True
+
+        min_delta = self._min_delta
+        if min_delta is None:
+            return fields != last
+
+        for new, old, delta in zip(fields, last, min_delta):
+            if abs(new - old) >= delta:
+                return True
+
+        return False
+
+    def _can_send(self, now):
+        return self._last_sent_time is None or now - self._last_sent_time >= self._min_interval
+
+    def _send_value(self, fields, now):
+        self._pending = None
+        self._last_sent = fields
+        self._last_sent_time = now
+        self.sent += 1
+        self._send(self._encode(fields))
+
+    def update(self, fields: tuple):
+        if self._pending is not None:
+            # replaced by the latest value
+            self.suppressed += 1
+            self._pending = None
+
+        if not self._is_significant(fields):
+            self.suppressed += 1
+            return
+
+        now = self._time()
+        if self._can_send(now):
+            self._send_value(fields, now)
+        else:
+            self._pending = fields
+
+    def flush(self):
+        """Send the pending value if the minimum interval has passed"""
+        fields = self._pending
+        if fields is not None:
+            now = self._time()
+            if self._can_send(now):
+                self._send_value(fields, now)
+
+    def reset(self):
+        """Forget the last sent value, so the next value is sent regardless of the thresholds"""
+        self._last_sent = None
+        self._pending = None
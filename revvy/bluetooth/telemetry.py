@@ -0,0 +1,99 @@
+# SPDX-License-Identifier: GPL-3.0-only
+
+"""Binary frame that contains the state of the whole robot
+
+Layout (big endian):
+  header: version (u8), section mask (u8)
+  sections, in this order, if their bit is set in the mask:
+    bit 0 - battery: main (u8), motor (u8) percentage
+    bit 1 - IMU: acceleration x, y, z (s16, mg), rotation x, y, z (s16, 0.1 deg/s), yaw angle (s32, degrees)
+    bit 2 - motors: 6x speed (float, rpm), position (s32, degrees), power (s8)
+    bit 3 - sensors: 4x raw data length (u8), raw data (16 bytes, zero padded)
+
+Sections are included in this order as long as they fit into the maximum value size, the rest are left out.
+"""
+
+import struct
+
+from revvy.utils.functions import clip
+
+TELEMETRY_VERSION = 1
+
+TELEMETRY_BATTERY = 0x01
+TELEMETRY_IMU = 0x02
+TELEMETRY_MOTORS = 0x04
+TELEMETRY_SENSORS = 0x08
+
+motor_slots = 6
+sensor_slots = 4
+sensor_data_size = 16
+
+_header = struct.Struct('>BB')
+_battery = struct.Struct('>BB')
+_imu = struct.Struct('>3h3hl')
+_motors = struct.Struct('>' + 'flb' * motor_slots)
+_sensors = struct.Struct('>' + f'B{sensor_data_size}s' * sensor_slots)
+
+
+def _s16(value):
+    return int(clip(round(value), -32768, 32767))
+
+
+def _battery_fields(robot):
+    battery = robot.battery
+    return battery.main, battery.motor
+
+
+def _imu_fields(robot):
+    state = robot.imu.state
+    acc = state.acceleration
+    rot = state.rotation
+    return (_s16(acc.x), _s16(acc.y), _s16(acc.z),
+            _s16(rot.x * 10), _s16(rot.y * 10), _s16(rot.z * 10),
+            state.yaw_angle)
+
+
+def _motor_fields(robot):
+    fields = []
+    for port in robot.motors:
+        fields += (port.speed, port.pos, port.power)
+    fields += (0, 0, 0) * (motor_slots - len(fields) // 3)
+    return fields[:motor_slots * 3]
+
+
+def _sensor_fields(robot):
+    fields = []
+    for port in robot.sensors:
+        raw = bytes(port.raw_value or b'')[:sensor_data_size]
+        fields += (len(raw), raw)
+    fields += (0, b'') * (sensor_slots - len(fields) // 2)
+    return fields[:sensor_slots * 2]
+
+
+_sections = (
+    (TELEMETRY_BATTERY, _battery, _battery_fields),
+    (TELEMETRY_IMU, _imu, _imu_fields),
+    (TELEMETRY_MOTORS, _motors, _motor_fields),
+    (TELEMETRY_SENSORS, _sensors, _sensor_fields),
+)
+
+
+def telemetry_frame_size(mask):
+    """Size of a frame that contains the sections given in the mask"""
+    return _header.size + sum(layout.size for bit, layout, _ in _sections if mask & bit)
+
+
+def encode_telemetry(robot, max_size):
+    """Encode the state of the robot into a frame that is at most max_size bytes long"""
+    mask = 0
+    size = _header.size
+    parts = [b'']
+    for bit, layout, read_fields in _sections:
+        if size + layout.size <= max_size:
+            mask |= bit
+            size += layout.size
+            parts.append(layout.pack(*read_fields(robot)))
+
+    parts[0] = _header.pack(TELEMETRY_VERSION, mask)
+
+    return b''.join(parts)
@@ -17,6 +17,7 @@ from revvy.robot_config import empty_robot_config
 from revvy.scripting.resource import Resource
 from revvy.scripting.robot_interface import MotorConstants
 from revvy.scripting.runtime import ScriptManager
+from revvy.utils.latency import latency_tracer
 from revvy.utils.logger import get_logger
 from revvy.utils.stopwatch import Stopwatch
 from revvy.utils.thread_wrapper import periodic
@@ -66,7 +67,19 @@ class RobotBLEController:
         revvy_ble.on_connection_changed(self._on_connection_changed)
 
         self._scripts = ScriptManager(self)
+        self._background_scripts = []
         self._config = empty_robot_config
+        self._applied_config = None  # None means that the robot needs to be reset before configuring
+        self._mcu_resets = 0
+        self._port_configs = {}  # the last configuration of each port, including the ones set by scripts
+
+        robot.on_mcu_reset.add(self._on_mcu_reset)
+        for port in [*robot.motors, *robot.sensors]:
+            port.on_config_changed.add(self._on_port_config_changed)
+
+        if latency_tracer.enabled:
+            # every motor command goes through this function, it ends the trace of a remote controller input
+            latency_tracer.trace_calls(robot.robot_control, 'set_motor_port_control_value', 'motor_command')
 
         self._status_code = RevvyStatusCode.OK
         self.exited = Event()
@@ -78,6 +91,10 @@ class RobotBLEController:
         try:
             self._robot.update_status()
 
+            live_service = self._ble['live_message_service']
+            live_service.flush()
+            live_service.update_telemetry(self._robot)
+
             self._ble['battery_service'].characteristic('main_battery').update_value(self._robot.battery.main)
             self._ble['battery_service'].characteristic('motor_battery').update_value(self._robot.battery.motor)
 
@@ -165,6 +182,10 @@ class RobotBLEController:
     def _on_connection_changed(self, is_connected):
         self._log('Phone connected' if is_connected else 'Phone disconnected')
         if not is_connected:
+            counters = self._ble['live_message_service'].notification_counters
+            self._log(f'Live notifications (sent, suppressed): {counters}')
+            if latency_tracer.enabled:
+                self._log(f'Remote controller latency:\n{latency_tracer.report()}')
             self._robot.status.controller_status = RemoteControllerStatus.NotConnected
             self._robot.play_tune('disconnect')
             self.configure(None)
@@ -189,13 +210,17 @@ class RobotBLEController:
             if callable(after):
                 self.run_in_background(after)
 
-    def _reset_configuration(self):
+    def _reset_scripts(self):
         self._scripts.reset()
         self._scripts.assign('Motor', MotorConstants)
         self._scripts.assign('RingLed', RingLed)
+        self._background_scripts.clear()
 
         self._remote_controller_thread.stop().wait()
 
+    def _reset_configuration(self):
+        self._reset_scripts()
+
         for res in self._resources.values():
             res.reset()
 
@@ -204,30 +229,28 @@ class RobotBLEController:
 
         self._robot.reset()
 
-    def _apply_new_configuration(self, config):
-        # apply new configuration
-        self._log('Applying new configuration')
+    def _configure_motor(self, motor, config):
+        live_service = self._ble['live_message_service']
 
+        motor.configure(config.motors[motor.id])
+        motor.on_status_changed.add(lambda p: live_service.update_motor(p.id, p.power, p.speed, p.pos))
+
+    def _configure_sensor(self, sensor, config):
         live_service = self._ble['live_message_service']
 
-        # set up motors
-        for motor in self._robot.motors:
-            motor.configure(config.motors[motor.id])
-            motor.on_status_changed.add(lambda p: live_service.update_motor(p.id, p.power, p.speed, p.pos))
+        sensor.configure(config.sensors[sensor.id])
+        sensor.on_status_changed.add(lambda p: live_service.update_sensor(p.id, p.raw_value))
 
+    def _configure_drivetrain(self, config):
         for motor_id in config.drivetrain['left']:
             self._robot.drivetrain.add_left_motor(self._robot.motors[motor_id])
 
         for motor_id in config.drivetrain['right']:
             self._robot.drivetrain.add_right_motor(self._robot.motors[motor_id])
 
-        # set up sensors
-        for sensor in self._robot.sensors:
-            sensor.configure(config.sensors[sensor.id])
-            sensor.on_status_changed.add(lambda p: live_service.update_sensor(p.id, p.raw_value))
-
+    def _configure_scripts(self, config):
         def start_analog_script(src, channels):
-            src.start(channels=channels)
+            src.start_or_update(channels=channels)
 
         # set up remote controller
         for analog in config.controller.analog:
@@ -239,11 +262,99 @@ class RobotBLEController:
                 script_handle = self._scripts.add_script(script)
                 self._remote_controller.on_button_pressed(button, script_handle.start)
 
-        # start background scripts
         for script in config.background_scripts:
-            script_handle = self._scripts.add_script(script)
+            self._background_scripts.append(self._scripts.add_script(script))
+
+    def _start_background_scripts(self):
+        for script_handle in self._background_scripts:
             script_handle.start()
 
+    def _apply_new_configuration(self, config):
+        # apply new configuration
+        self._log('Applying new configuration')
+
+        # set up motors
+        for motor in self._robot.motors:
+            self._configure_motor(motor, config)
+
+        self._configure_drivetrain(config)
+
+        # set up sensors
+        for sensor in self._robot.sensors:
+            self._configure_sensor(sensor, config)
+
+        self._configure_scripts(config)
+        self._start_background_scripts()
+
+    def _apply_configuration_changes(self, previous_config, config):
+        """Update only the parts of the robot that are configured differently than in the previous configuration"""
+        changes = previous_config.diff(config)
+
+        # ports that were reconfigured by a script need to be configured again
+        reconfigured_motors = self._reconfigured_ports(self._robot.motors, previous_config.motors)
+        reconfigured_sensors = self._reconfigured_ports(self._robot.sensors, previous_config.sensors)
+
+        changed_motors = changes.motors | reconfigured_motors
+        changed_sensors = changes.sensors | reconfigured_sensors
+        # the drivetrain drops motors that are reconfigured
+        drivetrain_changed = changes.drivetrain or \
+            not reconfigured_motors.isdisjoint({*config.drivetrain['left'], *config.drivetrain['right']})
+
+        self._log(f'Applying configuration changes (motors: {set(changed_motors)}, sensors: {set(changed_sensors)}, '
+                  f'drivetrain: {drivetrain_changed}, scripts: {changes.scripts})')
+
+        # scripts that were added outside of the configuration (e.g. test kit) are not reused
+        scripts_changed = changes.scripts or set(self._scripts.names) != {script.name for script in config.scripts}
+        if scripts_changed:
+            self._reset_scripts()
+
+        for res in self._resources.values():
+            res.reset()
+
+        drivetrain = self._robot.drivetrain
+        if drivetrain_changed:
+            drivetrain.reset()
+        elif drivetrain.motors:
+            drivetrain.stop_release()
+
+        # reconfiguring a port stops the motor and resets its state, the rest need to be reset explicitly
+        for motor in self._robot.motors:
+            if motor.id in changed_motors:
+                self._configure_motor(motor, config)
+            elif config.motors[motor.id] is not None:
+                if motor not in drivetrain.motors:
+                    motor.stop()
+                # forget the position offset set by the previous program
+                motor.pos = motor.raw_pos
+
+        if drivetrain_changed:
+            self._configure_drivetrain(config)
+
+        for sensor in self._robot.sensors:
+            if sensor.id in changed_sensors:
+                self._configure_sensor(sensor, config)
+            else:
+                sensor.set_filter(None)
+
+        self._robot.reset_state()
+
+        if scripts_changed:
+            self._configure_scripts(config)
+        self._start_background_scripts()
+
+    def _reconfigured_ports(self, ports, applied_configs):
+        """Ids of the ports that were configured differently since the given configurations were applied"""
+        return frozenset(port.id for port in ports if self._port_configs.get(port) is not applied_configs[port.id])
+
+    def _on_port_config_changed(self, port, config):
+        self._port_configs[port] = config
+
+    def _on_mcu_reset(self):
+        # the MCU lost its configuration, the next one needs to be applied from scratch
+        # called from the status update thread, possibly while a configuration is being applied
+        self._mcu_resets += 1
+        self._applied_config = None
+
     def _configure(self, config):
 
         is_default_config = not config and self._robot.status.robot_status != RobotStatus.Stopped
@@ -254,9 +365,21 @@ class RobotBLEController:
         self._config = config
 
         self._scripts.stop_all_scripts()
-        self._reset_configuration()
 
-        self._apply_new_configuration(config)
+        # if applying fails, the next configuration will start from a clean state
+        mcu_resets = self._mcu_resets
+        previous_config, self._applied_config = self._applied_config, None
+        if previous_config is None:
+            self._reset_configuration()
+            self._apply_new_configuration(config)
+        else:
+            self._apply_configuration_changes(previous_config, config)
+
+        if mcu_resets == self._mcu_resets:
+            self._applied_config = config
+        else:
+            self._log('MCU was reset while applying the configuration')
+
         if is_default_config:
             self._log('Default configuration applied')
             self._robot.status.robot_status = RobotStatus.NotConfigured
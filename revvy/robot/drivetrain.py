@@ -1,16 +1,18 @@
 # SPDX-License-Identifier: GPL-3.0-only
 import itertools
+import time
 from contextlib import suppress
 from threading import Timer
 
 from revvy.mcu.rrrc_control import RevvyControl
+from revvy.robot.heading_control import HeadingController
 from revvy.robot.imu import IMU
+from revvy.robot.odometry import DifferentialOdometry
 from revvy.robot.ports.common import PortInstance
 from revvy.robot.ports.motors.dc_motor import MotorStatus, MotorConstants
-from revvy.utils.awaiter import AwaiterImpl, Awaiter
-from revvy.utils.functions import clip
+from revvy.robot.trajectory import TrajectoryFollower, arc_profiles
+from revvy.utils.awaiter import AwaiterImpl, Awaiter, AwaiterSignal
 from revvy.utils.logger import get_logger
-from revvy.utils.stopwatch import Stopwatch
 
 
 # noinspection PyProtectedMember
@@ -45,35 +47,124 @@ class TimeController(DrivetrainController):
 
 # noinspection PyProtectedMember
 class TurnController(DrivetrainController):
+    """Turn to a target heading, updated with every IMU yaw sample"""
     Kp = 0.75
+    Ki = 0.3
+    Kd = 0.05
+    tolerance = 1  # degrees
+    stall_timeout = 3  # seconds without yaw change
+    min_speed_change = 0.5  # rpm, smaller corrections are not sent
 
     def __init__(self, drivetrain: 'DifferentialDrivetrain', turn_angle, wheel_speed=None, power_limit=None):
         super().__init__(drivetrain)
 
-        self._max_turn_wheel_speed = wheel_speed
+        imu = drivetrain.imu
+        self._imu = imu
         self._max_turn_power = power_limit
+        self._controller = HeadingController(turn_angle + imu.yaw_angle, self.Kp, self.Ki, self.Kd, wheel_speed)
 
-        self._target_angle = turn_angle + drivetrain.yaw
-        self._last_yaw_change_time = Stopwatch()
-        self._last_yaw_angle = None
+        self._last_yaw = None
+        self._last_yaw_change = time.monotonic()
+        self._last_output = None
 
-    def update(self):
-        yaw = self._drivetrain.yaw
-        if self._last_yaw_angle != yaw:
-            self._last_yaw_angle = yaw
-            self._last_yaw_change_time.reset()
-            error = self._target_angle - yaw
-            if abs(error) < 1:
-                # goal reached
-                self._awaiter.finish()
-            else:
-                # Kp=10, saturate on max allowed wheel speed
-                p = clip(error * self.Kp, -self._max_turn_wheel_speed, self._max_turn_wheel_speed)
-                self._drivetrain._apply_speeds(-p, p, self._max_turn_power)
+        imu.on_yaw_changed.add(self._on_yaw_sample)
+        self._awaiter.on_result(self._unsubscribe)
+        self._awaiter.on_cancelled(self._unsubscribe)
 
-        elif self._last_yaw_change_time.elapsed > 3:
-            # yaw angle has not changed for 3 seconds
+    def _unsubscribe(self):
+        self._imu.on_yaw_changed.remove(self._on_yaw_sample)
+
+    def _on_yaw_sample(self, yaw, timestamp):
+        if yaw != self._last_yaw:
+            self._last_yaw = yaw
+            self._last_yaw_change = timestamp
+        elif timestamp - self._last_yaw_change > self.stall_timeout:
             self._awaiter.cancel()
+            return
+
+        output = self._controller.update(yaw, self._imu.rotation.z, timestamp)
+
+        if abs(self._controller.error) < self.tolerance:
+            # goal reached
+            self._awaiter.finish()
+        elif self._last_output is None or abs(output - self._last_output) >= self.min_speed_change:
+            self._last_output = output
+            self._drivetrain._apply_speeds(-output, output, self._max_turn_power)
+
+    def start(self):
+        self._on_yaw_sample(self._imu.yaw_angle, time.monotonic())
+
+    def update(self):
+        # yaw samples may not arrive if the robot can't turn
+        if time.monotonic() - self._last_yaw_change > self.stall_timeout:
+            self._awaiter.cancel()
+
+
+# noinspection PyProtectedMember
+class HeadingHoldController(DrivetrainController):
+    """Drive straight with the given wheel speed, correct the left/right speeds to keep the initial heading
+
+    The movement ends after timeout seconds or after the wheels have turned the given degrees, whichever is given.
+    """
+    Kp = 1.0
+    Ki = 0.5
+    Kd = 0.05
+    min_update_interval = 0.05  # seconds, corrections are not sent more often
+    min_speed_change = 0.5  # rpm, smaller corrections are not sent
+
+    def __init__(self, drivetrain: 'DifferentialDrivetrain', speed, power_limit=None, distance=None, timeout=None):
+        super().__init__(drivetrain)
+
+        imu = drivetrain.imu
+        self._imu = imu
+        self._speed = speed
+        self._power_limit = power_limit
+        # leave room for the correction when driving at full speed
+        self._controller = HeadingController(imu.yaw_angle, self.Kp, self.Ki, self.Kd,
+                                             output_limit=max(abs(speed) / 2, 1))
+
+        self._distance = distance
+        self._start_position = self._average_position()
+
+        self._last_sent = None
+        self._last_correction = None
+
+        imu.on_yaw_changed.add(self._on_yaw_sample)
+        self._awaiter.on_result(self._unsubscribe)
+        self._awaiter.on_cancelled(self._unsubscribe)
+
+        if timeout is not None:
+            t = Timer(timeout, self._awaiter.finish)
+            self._awaiter.on_cancelled(t.cancel)
+            t.start()
+
+    def _average_position(self):
+        motors = self._drivetrain.motors
+        return sum(motor.raw_pos for motor in motors) / len(motors) if motors else 0
+
+    def _unsubscribe(self):
+        self._imu.on_yaw_changed.remove(self._on_yaw_sample)
+
+    def _on_yaw_sample(self, yaw, timestamp):
+        correction = self._controller.update(yaw, self._imu.rotation.z, timestamp)
+
+        if self._last_sent is not None:
+            if timestamp - self._last_sent < self.min_update_interval:
+                return
+            if abs(correction - self._last_correction) < self.min_speed_change:
+                return
+
+        self._last_sent = timestamp
+        self._last_correction = correction
+        self._drivetrain._apply_speeds(self._speed - correction, self._speed + correction, self._power_limit)
+
+    def start(self):
+        self._on_yaw_sample(self._imu.yaw_angle, time.monotonic())
+
+    def update(self):
+        if self._distance is not None:
+            if abs(self._average_position() - self._start_position) >= self._distance:
+                self._awaiter.finish()
 
 
 # noinspection PyProtectedMember
@@ -85,10 +176,29 @@ class MoveController(DrivetrainController):
         drivetrain._apply_positions(left, right, left_speed, right_speed, power_limit)
 
     def update(self):
+        # a single blocked motor does not end the move, the drivetrain aborts it if every motor is blocked
         if all(m.status == MotorStatus.GOAL_REACHED for m in self._drivetrain.motors):
             self._awaiter.finish()
 
 
+# noinspection PyProtectedMember
+class TrajectoryController(DrivetrainController):
+    def __init__(self, drivetrain: 'DifferentialDrivetrain', left_profile, right_profile):
+        super().__init__(drivetrain)
+
+        motors = [*drivetrain.left_motors, *drivetrain.right_motors]
+        profiles = [left_profile] * len(drivetrain.left_motors) + [right_profile] * len(drivetrain.right_motors)
+
+        self._follower = TrajectoryFollower(motors, profiles)
+        self._follower.awaiter.on_result(self._awaiter.finish)
+        self._awaiter.on_cancelled(self._follower.awaiter.cancel)
+
+        self._follower.start()
+
+    def update(self):
+        self._follower.update()
+
+
 class DifferentialDrivetrain:
     max_rpm = 120
 
@@ -101,11 +211,20 @@ class DifferentialDrivetrain:
         self._log = get_logger('Drivetrain')
         self._imu = imu
         self._controller = None
+        self._odometry = DifferentialOdometry()
+
+    @property
+    def imu(self):
+        return self._imu
 
     @property
     def yaw(self):
         return self._imu.yaw_angle
 
+    @property
+    def odometry(self):
+        return self._odometry
+
     @property
     def motors(self):
         return self._motors
@@ -134,12 +253,14 @@ class DifferentialDrivetrain:
         self._motors.clear()
         self._left_motors.clear()
         self._right_motors.clear()
+        self._odometry.reset()
 
     def _add_motor(self, motor: PortInstance):
         self._motors.append(motor)
 
         motor.on_status_changed.add(self._on_motor_status_changed)
         motor.on_config_changed.add(self._on_motor_config_changed)
+        self._odometry.resync()
 
     def add_left_motor(self, motor: PortInstance):
         self._log(f'Add motor {motor.id} to left side')
@@ -161,7 +282,19 @@ class DifferentialDrivetrain:
         with suppress(ValueError):
             self._right_motors.remove(motor)
 
+        self._odometry.resync()
+
+    def _update_odometry(self):
+        left_motors = self._left_motors
+        right_motors = self._right_motors
+        if left_motors and right_motors:
+            left = sum(motor.raw_pos for motor in left_motors) / len(left_motors)
+            right = sum(motor.raw_pos for motor in right_motors) / len(right_motors)
+            self._odometry.update(left, right, self._imu.yaw_angle)
+
     def _on_motor_status_changed(self, _):
+        self._update_odometry()
+
         if all(m.status == MotorStatus.BLOCKED for m in self._motors):
             self._abort_controller()
         else:
@@ -225,7 +358,7 @@ class DifferentialDrivetrain:
         left_speed = right_speed = multipliers[direction] * speed
         self._apply_speeds(left_speed, right_speed, power)
 
-    def drive(self, direction, rotation, unit_rotation, speed, unit_speed):
+    def drive(self, direction, rotation, unit_rotation, speed, unit_speed, hold_heading=False):
         self._log("drive")
         self._abort_controller()
 
@@ -236,7 +369,18 @@ class DifferentialDrivetrain:
 
         power, speed = self._process_unit_speed(speed, unit_speed)
 
-        if unit_rotation == MotorConstants.UNIT_SEC:
+        if hold_heading:
+            if unit_rotation == MotorConstants.UNIT_SEC:
+                self._controller = HeadingHoldController(self, speed * multipliers[direction], power, timeout=rotation)
+            elif unit_rotation == MotorConstants.UNIT_ROT:
+                self._controller = HeadingHoldController(self, speed * multipliers[direction], power,
+                                                         distance=360 * rotation)
+            else:
+                raise ValueError(f'Invalid unit_rotation: {unit_rotation}')
+
+            self._controller.start()
+
+        elif unit_rotation == MotorConstants.UNIT_SEC:
             left_speed = right_speed = speed * multipliers[direction]
             self._apply_speeds(left_speed, right_speed, power_limit=power)
 
@@ -276,9 +420,35 @@ class DifferentialDrivetrain:
                                               turn_angle=rotation * multipliers[direction],
                                               wheel_speed=speed,
                                               power_limit=power)
-            self._controller.update()
+            self._controller.start()
 
         else:
             raise ValueError(f'Invalid unit_rotation: {unit_rotation}')
 
         return self._controller.awaiter
+
+    def follow_profiles(self, left, right) -> Awaiter:
+        """Stream the given motion profiles to the left and right side motors"""
+        self._log("follow profiles")
+        self._abort_controller()
+
+        if not self._motors:
+            return AwaiterImpl.from_state(AwaiterSignal.FINISHED)
+
+        self._controller = TrajectoryController(self, left, right)
+
+        return self._controller.awaiter
+
+    def arc(self, radius, angle, speed, acceleration, wheel_diameter, track_width, s_curve=False):
+        """
+        Drive along an arc using host-side motion profiles
+
+        @param radius: radius of the arc, measured at the center of the robot (same unit as wheel_diameter)
+        @param angle: degrees to turn along the arc, positive angles turn left
+        @param speed: maximum wheel speed in rpm
+        @param acceleration: maximum wheel acceleration in rpm per second
+        """
+        self._log("arc")
+        left, right = arc_profiles(radius, angle, speed, acceleration, wheel_diameter, track_width, s_curve)
+
+        return self.follow_profiles(left, right)
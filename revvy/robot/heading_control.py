@@ -0,0 +1,104 @@
+# SPDX-License-Identifier: GPL-3.0-only
+
+from revvy.utils.functions import clip
+
+
+class PidController:
+    """PID controller with output saturation and anti-windup
+
+    The derivative term uses the measured rate of change of the controlled value (e.g. the gyro rate) if it is given,
+    which is less noisy than differentiating the error of subsequent samples.
+
+    >>> pid = PidController(kp=1, ki=1, output_limit=10)
+    >>> pid.update(20, dt=1)
+    10
+    >>> pid.integral  # not accumulated while saturated
+    0
+    >>> pid.update(2, dt=1)
+    4.0
+    """
+
+    def __init__(self, kp, ki=0, kd=0, output_limit=None):
+        self.kp = kp
+        self.ki = ki
+        self.kd = kd
+        self._output_limit = output_limit
+
+        self._integral = 0
+        self._last_error = None
+
+    @property
+    def integral(self):
+        return self._integral
+
+    def reset(self):
+        self._integral = 0
+        self._last_error = None
+
+    def update(self, error, dt, rate=None):
+        """
+        Calculate the controller output
+
+        @param error: setpoint - measured value
+        @param dt: time since the previous update in seconds
+        @param rate: rate of change of the measured value, if known
+        """
+        if rate is not None:
+            derivative = -rate
+        elif self._last_error is not None and dt > 0:
+            derivative = (error - self._last_error) / dt
+        else:
+            derivative = 0
+        self._last_error = error
+
+        integral = self._integral + error * dt
+        output = self.kp * error + self.ki * integral + self.kd * derivative
+
+        limit = self._output_limit
+        if limit is not None and abs(output) > limit:
+            # anti-windup: stop integrating while the output is saturated in the direction of the error
+            if (output > 0) == (error > 0):
+                integral = self._integral
+            output = clip(output, -limit, limit)
+
+        self._integral = integral
+        return output
+
+
+class HeadingController:
+    """Calculate the turning wheel speed that is needed to reach or keep a heading
+
+    Meant to be updated with every IMU yaw sample, using the sample timestamps. The output is the speed that is
+    added to the right side and subtracted from the left side (positive output turns counter-clockwise).
+    """
+
+    def __init__(self, target, kp, ki, kd, output_limit=None):
+        self._pid = PidController(kp, ki, kd, output_limit)
+        self._target = target
+        self._error = None
+        self._last_timestamp = None
+
+    @property
+    def target(self):
+        return self._target
+
+    @target.setter
+    def target(self, value):
+        self._target = value
+        self._pid.reset()
+
+    @property
+    def error(self):
+        return self._error
+
+    def update(self, yaw, rate, timestamp):
+        """
+        @param yaw: heading in degrees
+        @param rate: gyro rate in degrees per second
+        @param timestamp: time of the yaw sample in seconds
+        """
+        dt = 0 if self._last_timestamp is None else timestamp - self._last_timestamp
+        self._last_timestamp = timestamp
+
+        self._error = self._target - yaw
+        return self._pid.update(self._error, dt, rate)
@@ -2,36 +2,58 @@
 
 import collections
 import struct
+import time
+from typing import NamedTuple, Optional
 
 from revvy.robot.ports.common import FunctionAggregator
 
 Vector3D = collections.namedtuple('Vector3D', ['x', 'y', 'z'])
 
 
+class ImuState(NamedTuple):
+    acceleration: Vector3D
+    rotation: Vector3D
+    yaw_angle: int
+    relative_yaw_angle: int
+    yaw_timestamp: Optional[float]
+
+
 class IMU:
     def __init__(self):
-        self._acceleration = Vector3D(0, 0, 0)
-        self._rotation = Vector3D(0, 0, 0)
-        self._yaw_angle = 0
-        self._relative_yaw_angle = 0
+        self._state = ImuState(Vector3D(0, 0, 0), Vector3D(0, 0, 0), 0, 0, None)
 
         self._change_callbacks = FunctionAggregator()
 
+    @property
+    def state(self) -> ImuState:
+        """The last received IMU data. Replaced as a whole, so the values are always consistent with each other"""
+        return self._state
+
+    @property
+    def on_yaw_changed(self):
+        """Callbacks are called with the yaw angle and the timestamp (time.monotonic) of every received yaw sample"""
+        return self._change_callbacks
+
+    @property
+    def yaw_timestamp(self):
+        """Time (time.monotonic) when the last yaw sample was received"""
+        return self._state.yaw_timestamp
+
     @property
     def yaw_angle(self):
-        return self._yaw_angle
+        return self._state.yaw_angle
 
     @property
     def relative_yaw_angle(self):
-        return self._relative_yaw_angle  # TODO pinning is not yet implemented
+        return self._state.relative_yaw_angle  # TODO pinning is not yet implemented
 
     @property
     def acceleration(self):
-        return self._acceleration
+        return self._state.acceleration
 
     @property
     def rotation(self):
-        return self._rotation
+        return self._state.rotation
 
     @staticmethod
     def _read_vector(data, lsb_value):
@@ -39,10 +61,15 @@ class IMU:
         return Vector3D(x * lsb_value, y * lsb_value, z * lsb_value)
 
     def update_yaw_angles(self, data):
-        (self._yaw_angle, self._relative_yaw_angle) = struct.unpack('<ll', data)
+        timestamp = time.monotonic()
+        (yaw_angle, relative_yaw_angle) = struct.unpack('<ll', data)
+        self._state = self._state._replace(yaw_angle=yaw_angle, relative_yaw_angle=relative_yaw_angle,
+                                           yaw_timestamp=timestamp)
+
+        self._change_callbacks(yaw_angle, timestamp)
 
     def update_axl_data(self, data):
-        self._acceleration = self._read_vector(data, 0.061)
+        self._state = self._state._replace(acceleration=self._read_vector(data, 0.061))
 
     def update_gyro_data(self, data):
-        self._rotation = self._read_vector(data, 0.035*1.03)
+        self._state = self._state._replace(rotation=self._read_vector(data, 0.035*1.03))
@@ -0,0 +1,135 @@
+# SPDX-License-Identifier: GPL-3.0-only
+import itertools
+
+from revvy.robot.ports.motor import MotorConstants
+from revvy.robot.trajectory import TrajectoryFollower
+from revvy.utils.awaiter import Awaiter, AwaiterImpl, AwaiterSignal
+from revvy.utils.logger import get_logger
+
+
+class MotorGroup:
+    """Control multiple motors using a single bus transaction per command
+
+    Values can be given as a single number that applies to every motor or as a list with one value per motor
+    """
+
+    def __init__(self, motors: list):
+        self._motors = list(motors)
+        assert self._motors, 'A motor group needs at least one motor'
+
+        self._interface = self._motors[0].interface
+        self._follower = None
+        self._log = get_logger(f'MotorGroup [{", ".join(str(motor.id) for motor in self._motors)}]')
+
+    @property
+    def motors(self):
+        return self._motors
+
+    def _per_motor(self, value):
+        if type(value) in (list, tuple):
+            if len(value) != len(self._motors):
+                raise ValueError(f'Expected {len(self._motors)} values, got {len(value)}')
+            return value
+        return [value] * len(self._motors)
+
+    def _cancel_follower(self):
+        """Stop streaming the active trajectory. Motors are not stopped, the caller sends the next command"""
+        follower, self._follower = self._follower, None
+        if follower:
+            follower.awaiter.cancel()
+
+    def _send(self, commands):
+        command = bytes(itertools.chain(*commands))
+        if command:
+            self._interface.set_motor_port_control_value(command)
+
+    def set_power(self, power):
+        self._log('set_power')
+        self._cancel_follower()
+        self._send(motor.create_power_request(p) for motor, p in zip(self._motors, self._per_motor(power)))
+
+    def set_speed(self, speed, power_limit=None):
+        self._log('set_speed')
+        self._cancel_follower()
+        self._send(motor.create_speed_request(s, power_limit)
+                   for motor, s in zip(self._motors, self._per_motor(speed)))
+
+    def set_position(self, position, speed_limit=None, power_limit=None, pos_type='absolute') -> Awaiter:
+        """Start moving every motor to its target position. The returned awaiter finishes when all motors are done"""
+        self._log('set_position')
+        self._cancel_follower()
+
+        requests = [motor.create_position_request(pos, speed_limit, power_limit, pos_type)
+                    for motor, pos in zip(self._motors, self._per_motor(position))]
+
+        self._send(command for command, _ in requests)
+
+        return Awaiter.all(awaiter for _, awaiter in requests)
+
+    def follow(self, profiles) -> Awaiter:
+        """
+        Stream precomputed motion profiles (one, or one per motor) to the motors
+
+        The movement is cancelled by the next command of the group, or if the configuration of the first configured
+        motor changes, as the movement is driven by its status updates. Not configured motors are skipped.
+        """
+        self._log('follow')
+
+        motors, motor_profiles = [], []
+        for motor, profile in zip(self._motors, self._per_motor(profiles)):
+            if motor.driver != 'NotConfigured':
+                motors.append(motor)
+                motor_profiles.append(profile)
+
+        self._cancel_follower()
+
+        if not motors:
+            self._log('no configured motors to follow the profiles')
+            return AwaiterImpl.from_state(AwaiterSignal.CANCEL)
+
+        # cancel pending position requests
+        for motor in motors:
+            motor.create_speed_request(0)
+
+        follower = TrajectoryFollower(motors, motor_profiles)
+        lead = motors[0]
+        # belongs to the current driver of the lead motor
+        status_changed = lead.on_status_changed
+
+        def _status_changed(_):
+            follower.update()
+
+        def _config_changed(*_):
+            follower.awaiter.cancel()
+
+        def _done():
+            status_changed.remove(_status_changed)
+            lead.on_config_changed.remove(_config_changed)
+
+        def _finished():
+            _done()
+            if self._follower is follower:
+                self._follower = None
+
+        def _cancelled():
+            _done()
+            if self._follower is follower:
+                # cancelled from the outside, not replaced by another command of the group
+                self._follower = None
+                self.set_power(0)
+
+        follower.awaiter.on_result(_finished)
+        follower.awaiter.on_cancelled(_cancelled)
+
+        self._follower = follower
+        status_changed.add(_status_changed)
+        lead.on_config_changed.add(_config_changed)
+
+        return follower.start()
+
+    def stop(self, action=MotorConstants.ACTION_RELEASE):
+        self._log('stop')
+        if action == MotorConstants.ACTION_STOP_AND_HOLD:
+            self.set_speed(0)
+        else:
+            self.set_power(0)
@@ -0,0 +1,176 @@
+# SPDX-License-Identifier: GPL-3.0-only
+
+import math
+import time
+from array import array
+from threading import Lock
+from typing import NamedTuple
+
+
+class Pose(NamedTuple):
+    x: float
+    y: float
+    heading: float  # degrees, counter-clockwise is positive
+    timestamp: float
+
+
+class PoseHistory:
+    """Fixed size ring buffer of poses, oldest first
+
+    >>> history = PoseHistory(2)
+    >>> history.append(1, 0, 0, 0.1)
+    >>> history.append(2, 0, 0, 0.2)
+    >>> history.append(3, 0, 0, 0.3)
+    >>> [pose.x for pose in history]
+    [2.0, 3.0]
+    >>> history[-1].timestamp
+    0.3
+    """
+
+    def __init__(self, size):
+        assert size > 0, 'History size must be positive'
+        self._size = size
+        self._x = array('d', [0.0] * size)
+        self._y = array('d', [0.0] * size)
+        self._heading = array('d', [0.0] * size)
+        self._timestamp = array('d', [0.0] * size)
+        self._next = 0
+        self._count = 0
+        self._lock = Lock()
+
+    def append(self, x, y, heading, timestamp):
+        with self._lock:
+            i = self._next
+            self._x[i] = x
+            self._y[i] = y
+            self._heading[i] = heading
+            self._timestamp[i] = timestamp
+
+            self._next = (i + 1) % self._size
+            if self._count < self._size:
+                self._count += 1
+
+    def clear(self):
+        with self._lock:
+            self._next = 0
+            self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, idx) -> Pose:
+        with self._lock:
+            count = self._count
+            if idx < 0:
+                idx += count
+            if not 0 <= idx < count:
+                raise IndexError('Pose history index out of range')
+
+            i = (self._next - count + idx) % self._size
+            return Pose(self._x[i], self._y[i], self._heading[i], self._timestamp[i])
+
+    def __iter__(self):
+        for idx in range(len(self)):
+            yield self[idx]
+
+
+class DifferentialOdometry:
+    """Incremental pose estimation from wheel positions and IMU yaw
+
+    Distance is calculated from the wheel positions, heading is taken from the IMU. If the track width is known,
+    the heading calculated from the wheels is blended with the IMU yaw.
+
+    Distances are measured in the unit of wheel_diameter, or in wheel rotations if the diameter is not known.
+    """
+    imu_weight = 0.98
+
+    def __init__(self, wheel_diameter=None, track_width=None, history_size=200, time_source=time.monotonic):
+        self._time = time_source
+        self._history = PoseHistory(history_size)
+        self._distance_per_degree = 1 / 360
+        self._track_width = None
+
+        self._pose = None
+        self._last_left = None
+        self._last_right = None
+        self._yaw_offset = None
+
+        self.set_geometry(wheel_diameter, track_width)
+        self.reset()
+
+    def set_geometry(self, wheel_diameter=None, track_width=None):
+        self._distance_per_degree = (math.pi * wheel_diameter / 360) if wheel_diameter else 1 / 360
+        self._track_width = track_width
+
+    @property
+    def pose(self) -> Pose:
+        return self._pose
+
+    @property
+    def history(self) -> PoseHistory:
+        return self._history
+
+    def resync(self):
+        """Keep the pose but read the wheel positions and yaw again on the next update, e.g. when motors change"""
+        self._last_left = None
+        self._last_right = None
+        self._yaw_offset = None
+
+    def reset(self):
+        """Set the current position as origin"""
+        self.resync()
+        self._history.clear()
+        self._pose = Pose(0.0, 0.0, 0.0, self._time())
+
+    def update(self, left_pos, right_pos, yaw=None):
+        """
+        Integrate the movement since the last update
+
+        @param left_pos: average position of the left wheels in degrees
+        @param right_pos: average position of the right wheels in degrees
+        @param yaw: IMU yaw angle in degrees, counter-clockwise is positive
+        """
+        timestamp = self._time()
+        x, y, heading, _ = self._pose
+
+        if self._last_left is None:
+            self._last_left = left_pos
+            self._last_right = right_pos
+            if yaw is not None:
+                self._yaw_offset = yaw - heading
+
+            self._pose = Pose(x, y, heading, timestamp)
+            self._history.append(x, y, heading, timestamp)
+            return
+
+        left = (left_pos - self._last_left) * self._distance_per_degree
+        right = (right_pos - self._last_right) * self._distance_per_degree
+        self._last_left = left_pos
+        self._last_right = right_pos
+
+        if self._track_width:
+            new_heading = heading + math.degrees((right - left) / self._track_width)
+        else:
+            new_heading = heading
+
+        if yaw is not None:
+            if self._yaw_offset is None:
+                self._yaw_offset = yaw - heading
+
+            imu_heading = yaw - self._yaw_offset
+            if self._track_width:
+                new_heading = self.imu_weight * imu_heading + (1 - self.imu_weight) * new_heading
+            else:
+                new_heading = imu_heading
+
+        if left == right == 0 and new_heading == heading:
+            return
+
+        # integrate along the average heading of the step
+        distance = (left + right) / 2
+        mid_heading = math.radians((heading + new_heading) / 2)
+        x += distance * math.cos(mid_heading)
+        y += distance * math.sin(mid_heading)
+
+        self._pose = Pose(x, y, new_heading, timestamp)
+        self._history.append(x, y, new_heading, timestamp)
@@ -1,24 +1,86 @@
 # SPDX-License-Identifier: GPL-3.0-only
+import time
 from contextlib import suppress
+from copy import deepcopy
+from inspect import getattr_static
+from operator import attrgetter
+from threading import Lock
+from typing import NamedTuple
 
 from revvy.mcu.rrrc_control import RevvyControl
 from revvy.utils.logger import get_logger
 
 
+class CallbackTiming(NamedTuple):
+    calls: int
+    total: float
+    max: float
+
+
 class FunctionAggregator:
+    """Call multiple functions with the same arguments
+
+    The functions are stored in a tuple that is replaced when a function is added or removed. Calling the aggregator
+    iterates over the current tuple without locking, so functions can be added or removed by other threads or by the
+    called functions themselves.
+    """
+
     def __init__(self):
-        self._callbacks = []
+        self._callbacks = ()
+        self._lock = Lock()
+        self._timings = None
 
-        self.add = self._callbacks.append
-        self.clear = self._callbacks.clear
+    def add(self, callback):
+        with self._lock:
+            self._callbacks = (*self._callbacks, callback)
 
     def remove(self, callback):
-        with suppress(ValueError):
-            self._callbacks.remove(callback)
+        with self._lock:
+            callbacks = list(self._callbacks)
+            with suppress(ValueError):
+                callbacks.remove(callback)
+                self._callbacks = tuple(callbacks)
 
-    def __call__(self, *args, **kwargs):
+    def clear(self):
+        with self._lock:
+            self._callbacks = ()
+
+    def __len__(self):
+        return len(self._callbacks)
+
+    def enable_timing(self, enabled=True):
+        """Measure the execution time of each function, to find slow ones. Measurements are reset"""
+        self._timings = {} if enabled else None
+
+    @property
+    def timings(self):
+        """Measured execution times in seconds, by function name. Empty if timing is not enabled"""
+        timings = self._timings or {}
+        return {getattr(func, '__qualname__', repr(func)): CallbackTiming(*timing) for func, timing in timings.items()}
+
+    def _call_timed(self, timings, args, kwargs):
         for func in self._callbacks:
-            func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                timing = timings.get(func)
+                if timing is None:
+                    timings[func] = [1, elapsed, elapsed]
+                else:
+                    timing[0] += 1
+                    timing[1] += elapsed
+                    if elapsed > timing[2]:
+                        timing[2] = elapsed
+
+    def __call__(self, *args, **kwargs):
+        timings = self._timings
+        if timings is None:
+            for func in self._callbacks:
+                func(*args, **kwargs)
+        else:
+            self._call_timed(timings, args, kwargs)
 
 
 class PortDriver:
@@ -69,6 +131,7 @@ class PortHandler:
         self._port_count = amount
         self._default_driver = default_driver
         self._ports = {i: PortInstance(i, f'{name}Port', interface, self.configure_port) for i in range(1, amount + 1)}
+        self._port_states = {}  # port type and driver config last sent to the MCU
 
         self._log(f'Created handler for {amount} ports')
         self._log('Supported types:\n  {}'.format("\n  ".join(self.available_types)))
@@ -92,24 +155,62 @@ class PortHandler:
         for port in self:
             port.uninitialize()
 
+    def invalidate(self):
+        """Forget the port configurations sent to the MCU, e.g. because the MCU has been reset"""
+        self._log('invalidate port states')
+        self._port_states.clear()
+
     def _set_port_type(self, port, port_type): raise NotImplementedError
 
     def configure_port(self, port, config) -> PortDriver:
         if config is None:
             self._log(f'set port {port.id} to not configured')
             driver = self._default_driver(port)
+            port_state = (self._types[driver.driver], None)
 
         else:
             driver = config['driver'](port, config['config'])
+            port_state = (self._types[driver.driver], deepcopy(config['config']))
+
+        if self._port_states.get(port.id) == port_state:
+            self._log(f'port {port.id} already has the requested configuration')
+        else:
+            # in case sending fails, the port state is unknown
+            self._port_states.pop(port.id, None)
+
+            self._set_port_type(port.id, port_state[0])
+            driver.on_port_type_set()
 
-        self._set_port_type(port.id, self._types[driver.driver])
-        driver.on_port_type_set()
+            self._port_states[port.id] = port_state
 
         return driver
 
 
+def _forward(name):
+    """Create a property that reads the given attribute of the port driver"""
+    return property(attrgetter(f'_driver.{name}'))
+
+
 class PortInstance:
-    props = ['log', '_port_idx', '_configurator', '_interface', '_driver', '_config_changed_callbacks']
+    """Port that forwards attribute access to its current driver
+
+    Frequently read driver properties are forwarded by properties of this class and the methods of the driver are
+    bound to the instance when the port is configured, so that the common attributes don't need to go through
+    __getattr__. Other attributes are still forwarded by __getattr__.
+    """
+    props = frozenset(['log', '_port_idx', '_configurator', '_interface', '_driver', '_config_changed_callbacks',
+                       '_bound_methods'])
+
+    driver = _forward('driver')
+    on_status_changed = _forward('on_status_changed')
+    state = _forward('state')
+    status = _forward('status')
+    pos = _forward('pos')
+    speed = _forward('speed')
+    power = _forward('power')
+    value = _forward('value')
+    raw_value = _forward('raw_value')
+    has_data = _forward('has_data')
 
     def __init__(self, port_idx, name, interface: RevvyControl, configurator):
         self.log = get_logger(f'{name} {port_idx}')
@@ -117,6 +218,7 @@ class PortInstance:
         self._configurator = configurator
         self._interface = interface
         self._driver = None
+        self._bound_methods = ()
         self._config_changed_callbacks = FunctionAggregator()
 
     @property
@@ -131,12 +233,37 @@ class PortInstance:
     def on_config_changed(self):
         return self._config_changed_callbacks
 
+    def _bind_driver_methods(self):
+        """Store the methods of the driver in the instance, so they are found without calling __getattr__"""
+        instance_attributes = self.__dict__
+        for name in self._bound_methods:
+            del instance_attributes[name]
+
+        bound = []
+        driver = self._driver
+        if driver:
+            for name in dir(driver):
+                if name.startswith('_') or name in self.props or hasattr(PortInstance, name):
+                    continue
+
+                if isinstance(getattr_static(driver, name), property):
+                    # properties must be read every time
+                    continue
+
+                attribute = getattr(driver, name)
+                if callable(attribute):
+                    instance_attributes[name] = attribute
+                    bound.append(name)
+
+        self._bound_methods = tuple(bound)
+
     def _configure(self, config):
         # temporarily disable reading port
         self._config_changed_callbacks(self, None)
         if self._driver:
             self._driver.uninitialize()
         self._driver = self._configurator(self, config)
+        self._bind_driver_methods()
         self._config_changed_callbacks(self, config)
 
         return self._driver
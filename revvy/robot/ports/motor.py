@@ -35,12 +35,23 @@ def create_motor_port_handler(interface: RevvyControl):
 
 
 class NullMotor(PortDriver):
+    _state = None  # shared by every not configured port
+
     def __init__(self, port):
         super().__init__(port, 'NotConfigured')
 
     def on_port_type_set(self):
         pass
 
+    @property
+    def state(self):
+        state = NullMotor._state
+        if state is None:
+            # imported here because dc_motor imports this module
+            from revvy.robot.ports.motors.dc_motor import MotorState, MotorStatus
+            state = NullMotor._state = MotorState(MotorStatus.NORMAL, 0, 0, 0)
+        return state
+
     @property
     def speed(self):
         return 0
@@ -49,6 +60,10 @@ class NullMotor(PortDriver):
     def position(self):
         return 0
 
+    @property
+    def pos(self):
+        return 0
+
     @property
     def power(self):
         return 0
@@ -57,6 +72,15 @@ class NullMotor(PortDriver):
     def is_moving(self):
         return False
 
+    def create_power_request(self, power):
+        return ()
+
+    def create_speed_request(self, speed, power_limit=None):
+        return ()
+
+    def create_position_request(self, position: int, speed_limit=None, power_limit=None, pos_type='absolute'):
+        return (), AwaiterImpl.from_state(AwaiterSignal.FINISHED)
+
     def set_speed(self, speed, power_limit=None):
         pass
 
@@ -1,6 +1,7 @@
 import struct
 from enum import Enum
 from functools import partial
+from typing import NamedTuple
 
 from revvy.robot.ports.common import PortInstance, PortDriver
 from revvy.robot.ports.motor import MotorConstants
@@ -53,6 +54,14 @@ class MotorStatus(Enum):
     GOAL_REACHED = 2
 
 
+class MotorState(NamedTuple):
+    """Motor status received in one status frame"""
+    status: MotorStatus
+    power: int
+    pos: int  # includes the offset set via DcMotorController.pos
+    speed: float
+
+
 class DcMotorController(PortDriver):
     """Generic driver for dc motors"""
     def __init__(self, port: PortInstance, port_config):
@@ -63,12 +72,10 @@ class DcMotorController(PortDriver):
         self._configure = partial(port.interface.set_motor_port_config, port.id)
 
         self._pos = 0
-        self._speed = 0
-        self._power = 0
         self._pos_offset = 0
+        self._state = MotorState(MotorStatus.NORMAL, 0, 0, 0)
 
         self._awaiter = None
-        self._status = MotorStatus.NORMAL
 
         self._timeout = 0
 
@@ -105,44 +112,62 @@ class DcMotorController(PortDriver):
             self.log('Cancelling previous request')
             awaiter.cancel()
 
+    @property
+    def state(self) -> MotorState:
+        """The last received status. Replaced as a whole, so the values are always consistent with each other"""
+        return self._state
+
     @property
     def speed(self):
-        return self._speed
+        return self._state.speed
 
     @property
     def pos(self):
-        return self._pos + self._pos_offset
+        return self._state.pos
 
     @pos.setter
     def pos(self, val):
         self._pos_offset = val - self._pos
+        self._state = self._state._replace(pos=val)
         self.log(f'setting position offset to {self._pos_offset}')
 
+    @property
+    def raw_pos(self):
+        """Position reported by the motor, not affected by setting pos"""
+        return self._pos
+
     @property
     def power(self):
-        return self._power
+        return self._state.power
 
-    def set_power(self, power):
+    def create_power_request(self, power):
+        """Cancel the pending position request and return the command that sets the motor power"""
         self._cancel_awaiter()
-        self.log('set_power')
-
-        self._port.interface.set_motor_port_control_value(self.create_set_power_command(power))
+        return self.create_set_power_command(power)
 
-    def set_speed(self, speed, power_limit=None):
+    def create_speed_request(self, speed, power_limit=None):
+        """Cancel the pending position request and return the command that sets the motor speed"""
         self._cancel_awaiter()
-        self.log('set_speed')
-
-        self._port.interface.set_motor_port_control_value(self.create_set_speed_command(speed, power_limit))
+        return self.create_set_speed_command(speed, power_limit)
 
-    def set_position(self, position: int, speed_limit=None, power_limit=None, pos_type='absolute') -> Awaiter:
+    def create_position_request(self, position: int, speed_limit=None, power_limit=None, pos_type='absolute'):
         """
+        Start tracking a new position request. Returns the command to be sent and the awaiter of the request.
+
         @param position: measured in degrees, depending on pos_type
         @param speed_limit: maximum speed in degrees per seconds
         @param power_limit: maximum power in percent
         @param pos_type: 'absolute': turn to this angle, counted from startup; 'relative': turn this many degrees
         """
         self._cancel_awaiter()
-        self.log('set_position')
+
+        if pos_type == 'absolute':
+            position -= self._pos_offset
+            command = self.create_absolute_position_command(position, speed_limit, power_limit)
+        elif pos_type == 'relative':
+            command = self.create_relative_position_command(position, speed_limit, power_limit)
+        else:
+            raise ValueError(f'Invalid pos_type {pos_type}')
 
         def _finished():
             self._awaiter = None
@@ -156,24 +181,37 @@ class DcMotorController(PortDriver):
 
         self._awaiter = awaiter
 
-        if pos_type == 'absolute':
-            position -= self._pos_offset
-            command = self.create_absolute_position_command(position, speed_limit, power_limit)
-        elif pos_type == 'relative':
-            command = self.create_relative_position_command(position, speed_limit, power_limit)
-        else:
-            raise ValueError(f'Invalid pos_type {pos_type}')
+        return command, awaiter
+
+    def set_power(self, power):
+        self.log('set_power')
+
+        self._port.interface.set_motor_port_control_value(self.create_power_request(power))
+
+    def set_speed(self, speed, power_limit=None):
+        self.log('set_speed')
+
+        self._port.interface.set_motor_port_control_value(self.create_speed_request(speed, power_limit))
+
+    def set_position(self, position: int, speed_limit=None, power_limit=None, pos_type='absolute') -> Awaiter:
+        """
+        @param position: measured in degrees, depending on pos_type
+        @param speed_limit: maximum speed in degrees per seconds
+        @param power_limit: maximum power in percent
+        @param pos_type: 'absolute': turn to this angle, counted from startup; 'relative': turn this many degrees
+        """
+        self.log('set_position')
 
+        command, awaiter = self.create_position_request(position, speed_limit, power_limit, pos_type)
         self._port.interface.set_motor_port_control_value(command)
 
         return awaiter
 
     @property
     def status(self):
-        return self._status
+        return self._state.status
 
     def _update_motor_status(self, status: MotorStatus):
-        self._status = status
         awaiter = self._awaiter
         if awaiter:
             if status == MotorStatus.NORMAL:
@@ -185,9 +223,13 @@ class DcMotorController(PortDriver):
 
     def update_status(self, data):
         if len(data) == 10:
-            status, self._power, self._pos, self._speed = struct.unpack('<bblf', data)
+            status, power, pos, speed = struct.unpack('<bblf', data)
+            status = MotorStatus(status)
+
+            self._pos = pos
+            self._state = MotorState(status, power, pos + self._pos_offset, speed)
 
-            self._update_motor_status(MotorStatus(status))
+            self._update_motor_status(status)
             self.on_status_changed(self._port)
         else:
             self.log(f'Received {len(data)} bytes of data instead of 10')
@@ -1,6 +1,21 @@
 # SPDX-License-Identifier: GPL-3.0-only
+from typing import NamedTuple, Any
 
 from revvy.robot.ports.common import PortDriver, PortInstance
+from revvy.robot.ports.sensors.filters import SensorFilter
+
+
+class SensorState(NamedTuple):
+    """Sensor data received in one status frame"""
+    value: Any
+    raw_value: Any
+
+    @property
+    def has_data(self):
+        return self.value is not None
+
+
+_no_data = SensorState(None, None)
 
 
 class NullSensor(PortDriver):
@@ -13,6 +28,13 @@ class NullSensor(PortDriver):
     def update_status(self, data):
         pass
 
+    def set_filter(self, sensor_filter=None):
+        pass
+
+    @property
+    def state(self):
+        return _no_data
+
     @property
     def value(self):
         return 0
@@ -27,39 +49,58 @@ class BaseSensorPortDriver(PortDriver):
         super().__init__(port, driver)
         self._port = port
         self._interface = port.interface
-        self._value = None
-        self._raw_value = None
+        self._snapshot = _no_data
+        self._filter = None
 
     def on_port_type_set(self):
         pass
 
+    @property
+    def state(self) -> SensorState:
+        """The last received data. Replaced as a whole, so the values are always consistent with each other"""
+        return self._snapshot
+
     @property
     def has_data(self):
-        return self._value is not None
+        return self._snapshot.value is not None
+
+    def set_filter(self, sensor_filter: SensorFilter = None):
+        """Set the filter that processes every converted value. None disables filtering"""
+        if sensor_filter:
+            sensor_filter.reset()
+        self._filter = sensor_filter
 
     def update_status(self, data):
+        snapshot = self._snapshot
         if len(data) == 0:
-            self._value = None
+            self._snapshot = SensorState(None, snapshot.raw_value)
             return
 
-        if self._raw_value == data:
-            return
+        sensor_filter = self._filter
+        if sensor_filter is None:
+            if snapshot.raw_value == data:
+                return
+
+            converted = self.convert_sensor_value(data)
+            value = snapshot.value if converted is None else converted
+        else:
+            # filters need to see repeated values, too
+            converted = self.convert_sensor_value(data)
+            value = snapshot.value if converted is None else sensor_filter(converted)
 
-        self._raw_value = data
-        converted = self.convert_sensor_value(data)
+            if value == snapshot.value and data == snapshot.raw_value:
+                return
 
-        self._raw_value = data
-        if converted is not None:
-            self._value = converted
+        self._snapshot = SensorState(value, data)
 
         self.on_status_changed(self._port)
 
     @property
     def value(self):
-        return self._value
+        return self._snapshot.value
 
     @property
     def raw_value(self):
-        return self._raw_value
+        return self._snapshot.raw_value
 
     def convert_sensor_value(self, raw): raise NotImplementedError
@@ -1,11 +1,16 @@
 import struct
-from functools import partial
+import time
+import traceback
+from operator import itemgetter
+from threading import Lock, Thread
 
-from typing import NamedTuple
+from typing import NamedTuple, Callable, Dict
 
 from revvy.robot.ports.common import PortInstance
 from revvy.robot.ports.sensors.base import BaseSensorPortDriver
-from revvy.utils.functions import split, map_values
+from revvy.utils.file_storage import StorageInterface, StorageError
+from revvy.utils.functions import split
+from revvy.utils.logger import get_logger, LogLevel
 
 
 class Ev3DataType(NamedTuple):
@@ -13,8 +18,16 @@ class Ev3DataType(NamedTuple):
     read_pattern: str
     name: str
 
+    def create_struct(self, n_samples):
+        """Create a Struct that unpacks n_samples values at once"""
+        pattern = self.read_pattern
+        byte_order, format_char = ('<', pattern) if len(pattern) == 1 else (pattern[0], pattern[1:])
+        return struct.Struct(f'{byte_order}{n_samples}{format_char}')
+
 
 class Ev3Mode:
+    info_size = struct.calcsize('<4b6f')
+
     @staticmethod
     def parse(mode_info):
         (nSamples, dataType, figures, decimals,
@@ -48,19 +61,31 @@ class Ev3Mode:
         self._si_min = si_min
         self._si_max = si_max
 
-    def _convert_single(self, value):
-        return map_values(value, self._raw_min, self._raw_max, self._si_min, self._si_max)
+        # raw values are mapped linearly to the SI range: si = raw * scale + offset
+        if raw_max != raw_min:
+            self._scale = (si_max - si_min) / (raw_max - raw_min)
+            self._offset = si_min - raw_min * self._scale
+        else:
+            self._scale = 1.0
+            self._offset = 0.0
 
-    def convert(self, data):
-        type_info = self._type_info[self._dataType]
+        self._type = self._type_info[data_type]
+        self._structs = {n_samples: self._type.create_struct(n_samples)}
 
-        values = []
-        for chunk in split(data, type_info.data_size):
-            (value,) = struct.unpack(type_info.read_pattern, chunk)
+    def _struct_for(self, n_samples):
+        unpacker = self._structs.get(n_samples)
+        if unpacker is None:
+            unpacker = self._type.create_struct(n_samples)
+            self._structs[n_samples] = unpacker
+        return unpacker
 
-            values.append(self._convert_single(value))
+    def convert(self, data, offset=0):
+        """Convert the samples in data, starting at offset, to SI values"""
+        unpacker = self._struct_for((len(data) - offset) // self._type.data_size)
 
-        return values
+        scale = self._scale
+        shift = self._offset
+        return [value * scale + shift for value in unpacker.unpack_from(data, offset)]
 
     def __str__(self) -> str:
         return f'Datasets: {self._nSamples}\n' \
@@ -71,6 +96,72 @@ class Ev3Mode:
                f'SI: {self._si_min}-{self._si_max}'
 
 
+class Ev3ModeCache:
+    """Mode descriptors of EV3 sensors, keyed by the sensor type id
+
+    Reading the modes takes a bus transaction per mode. Sensors of the same type have the same modes, so they are
+    read once and shared by every port. If a storage is set, the raw mode information is also persisted so the
+    modes don't need to be read after restart either.
+    """
+
+    def __init__(self, storage: StorageInterface = None):
+        self._log = get_logger('Ev3ModeCache')
+        self._lock = Lock()
+        self._entries = {}
+        self.storage = storage
+
+    def _load(self, sensor_type, n_modes):
+        storage = self.storage
+        if storage is None:
+            return None
+
+        try:
+            data = storage.read(f'ev3_{sensor_type}')
+        except StorageError:
+            return None
+
+        if len(data) != n_modes * Ev3Mode.info_size:
+            return None
+
+        return list(split(data, Ev3Mode.info_size))
+
+    def _store(self, sensor_type, mode_infos):
+        storage = self.storage
+        if storage is not None:
+            try:
+                storage.write(f'ev3_{sensor_type}', b''.join(mode_infos))
+            except (StorageError, IOError):
+                self._log(f'Failed to persist modes of sensor type {sensor_type}')
+
+    def get_modes(self, sensor_type, n_modes, read_mode_info):
+        """
+        Return the modes of the given sensor type
+
+        @param sensor_type: sensor type id, as read from the sensor info page 0
+        @param n_modes: number of modes the sensor reports
+        @param read_mode_info: called with the index of the sensor info page (1 to n_modes) if the modes are not cached
+        """
+        with self._lock:
+            modes = self._entries.get(sensor_type)
+            if modes is not None and len(modes) == n_modes:
+                return modes
+
+            mode_infos = self._load(sensor_type, n_modes)
+            if mode_infos is None:
+                mode_infos = [bytes(read_mode_info(i)) for i in range(1, n_modes + 1)]
+                self._store(sensor_type, mode_infos)
+            else:
+                self._log(f'Loaded modes of sensor type {sensor_type} from storage')
+
+            modes = tuple(map(Ev3Mode.parse, mode_infos))
+            self._entries[sensor_type] = modes
+
+            return modes
+
+
+ev3_mode_cache = Ev3ModeCache()
+
+
 class Ev3UARTSensor(BaseSensorPortDriver):
     STATE_RESET = 0
     STATE_CONFIGURE = 1
@@ -84,17 +175,43 @@ class Ev3UARTSensor(BaseSensorPortDriver):
         0x80: STATE_DATA
     }
 
-    def __init__(self, port: PortInstance, modes=None):
+    discovery_retry_interval = 0.5  # seconds, doubled after every failed attempt to read the modes
+    discovery_max_retry_interval = 10
+
+    def __init__(self, port: PortInstance, modes=None, profile: 'Ev3SensorProfile' = None):
+        """
+        @param modes: the modes of the sensor, read from the sensor if None
+        @param profile: how to interpret the sensor values. If None, the values of the current mode are returned as a
+                        list and the mode is not changed
+        """
         super().__init__('EV3', port)
         self._state = self.STATE_RESET
         self._modes = modes
         self._current_mode = 0
+        self._profile = profile
+        self._converters = profile.converters if profile else {}
+        self._discovery_lock = Lock()
+        self._discovery_running = False
+        self._discovery_failures = 0
+        self._next_discovery = 0
+        self._uninitialized = False
+
+    def uninitialize(self):
+        self._uninitialized = True
+        super().uninitialize()
 
     def select_mode(self, mode):
-        if mode < len(self._modes):
+        self._select_mode(self._modes, mode)
+
+    def _select_mode(self, modes, mode):
+        if mode < len(modes):
             self._interface.write_sensor_port(self._port.id, [mode])
             self._current_mode = mode
 
+    def _select_default_mode(self, modes):
+        if self._profile:
+            self._select_mode(modes, self._profile.default_mode)
+
     def convert_sensor_value(self, raw):
         if len(raw) == 0:
             return None
@@ -103,22 +220,28 @@ class Ev3UARTSensor(BaseSensorPortDriver):
             state = self.REMOTE_STATES[raw[0] & self.REMOTE_STATUS_MASK]
 
             if self._state != state:
-                if state == self.STATE_DATA:
-                    if self._modes is None:
-                        self._modes = self._get_modes()
+                if state == self.STATE_DATA and self._modes is not None:
                     self.on_configured()
                 self._state = state
 
             if state == self.STATE_DATA:
+                if self._modes is None:
+                    # reading the modes takes multiple bus transactions, don't block the status updates
+                    self._start_mode_discovery()
+                    return None
 
                 mode_idx = raw[0] & self.MODE_MASK
                 if mode_idx == self._current_mode:
                     try:
                         mode = self._modes[mode_idx]
-
-                        return mode.convert(raw[1:])
                     except IndexError:
                         return None
+
+                    values = mode.convert(raw, 1)
+                    converter = self._converters.get(mode_idx)
+                    if converter and values:
+                        return converter(values)
+                    return values
                 else:
                     # handle case when mode switch does not happen (count wrong messages, reconfigure/reset)
                     pass
@@ -126,25 +249,54 @@ class Ev3UARTSensor(BaseSensorPortDriver):
         except KeyError:
             return None
 
+    def _start_mode_discovery(self):
+        with self._discovery_lock:
+            if self._discovery_running or time.monotonic() < self._next_discovery:
+                return
+            self._discovery_running = True
+
+        Thread(target=self._discover_modes, name=f'Ev3ModeDiscovery {self._port.id}', daemon=True).start()
+
+    # noinspection PyBroadException
+    def _discover_modes(self):
+        try:
+            modes = self._get_modes()
+            if modes is None:
+                self.log('Failed to read sensor info')
+            elif not self._uninitialized:
+                # switch mode before publishing the modes, so that no data is converted using the wrong mode
+                self._select_default_mode(modes)
+                self._modes = modes
+        except Exception:
+            self.log(f'Failed to read sensor modes: {traceback.format_exc()}', LogLevel.ERROR)
+        finally:
+            with self._discovery_lock:
+                if self._modes is None:
+                    # don't flood the bus with sensor info requests while the sensor is not responding
+                    self._discovery_failures += 1
+                    delay = min(self.discovery_retry_interval * 2 ** (self._discovery_failures - 1),
+                                self.discovery_max_retry_interval)
+                    self._next_discovery = time.monotonic() + delay
+                self._discovery_running = False
+
     def _get_modes(self):
+        """Return the modes of the sensor, or None if the sensor info can't be read"""
         sensor_info = self._interface.read_sensor_info(self._port.id, 0)
 
         if sensor_info:
             (sensor_type, speed, nModes, nViews) = struct.unpack('<blbb', sensor_info)
 
-            modes = []
-            for i in range(1, nModes+1):
+            def _read_mode_info(i):
                 mode_info = self._interface.read_sensor_info(self._port.id, i)
-                mode = Ev3Mode.parse(mode_info)
-                modes.append(mode)
                 self.log(f'New mode: {i}/{nModes}')
-                self.log(str(mode))
+                self.log(str(Ev3Mode.parse(mode_info)))
                 self.log('===============')
+                return mode_info
 
-            return modes
+            return ev3_mode_cache.get_modes(sensor_type, nModes, _read_mode_info)
 
     def on_configured(self):
-        pass
+        self._select_default_mode(self._modes)
 
 
 class Color:
@@ -169,31 +321,45 @@ class Color:
         return self._name
 
 
+ev3_colors = (
+    Color(0, 'No color', '#000000'),
+    Color(1, 'Black',    '#000000'),
+    Color(2, 'Blue',     '#0000ff'),
+    Color(3, 'Green',    '#00ff00'),
+    Color(4, 'Yellow',   '#00ffff'),
+    Color(5, 'Red',      '#ff0000'),
+    Color(6, 'White',    '#ffffff'),
+    Color(7, 'Brown',    '#ffff00'),
+)
+
+
+def _to_color(values):
+    color_id = int(values[0])
+    return ev3_colors[color_id] if 0 <= color_id < len(ev3_colors) else None
+
+
+_first_value = itemgetter(0)
+
+
+class Ev3SensorProfile(NamedTuple):
+    """Describes how the values of an EV3 sensor type are used
+
+    converters map the mode index to a function that converts the list of SI values of the mode to the sensor value.
+    The values of modes without a converter are returned as a list.
+    """
+    name: str
+    default_mode: int
+    converters: Dict[int, Callable]
+
+
+# keyed by the EV3 sensor type id, used by the drivers of specific sensors (e.g. ev3_color)
+ev3_sensor_profiles = {
+    29: Ev3SensorProfile('color', 2, {0: _first_value, 1: _first_value, 2: _to_color}),
+    30: Ev3SensorProfile('ultrasonic', 0, {0: _first_value, 1: _first_value}),
+    32: Ev3SensorProfile('gyro', 0, {0: _first_value, 1: _first_value}),
+    33: Ev3SensorProfile('infrared', 0, {0: _first_value}),
+}
+
+
 def ev3_color(port: PortInstance, _):
-    sensor = Ev3UARTSensor(port)
-
-    color_map = [
-        {'name': 'No color', 'rgb': '#000000'},
-        {'name': 'Black',    'rgb': '#000000'},
-        {'name': 'Blue',     'rgb': '#0000ff'},
-        {'name': 'Green',    'rgb': '#00ff00'},
-        {'name': 'Yellow',   'rgb': '#00ffff'},
-        {'name': 'Red',      'rgb': '#ff0000'},
-        {'name': 'White',    'rgb': '#ffffff'},
-        {'name': 'Brown',    'rgb': '#ffff00'}
-    ]
-
-    # we'll replace the general convert_sensor_value method with a specialized one so copy the old one
-    ev3_convert = sensor.convert_sensor_value
-
-    def convert(raw):
-        value = ev3_convert(raw)
-        if value:
-            color_id = int(value[0])
-            color_data = color_map[color_id]
-            return Color(color_id=color_id, name=color_data['name'], rgb=color_data['rgb'])
-
-    sensor.convert_sensor_value = convert
-    sensor.on_configured = partial(sensor.select_mode, 2)
-
-    return sensor
+    return Ev3UARTSensor(port, profile=ev3_sensor_profiles[29])
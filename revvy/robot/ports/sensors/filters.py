@@ -0,0 +1,178 @@
+# SPDX-License-Identifier: GPL-3.0-only
+
+"""Incremental filters for sensor values
+
+Filters process one value at a time, in the status update thread, and keep a fixed amount of history.
+"""
+
+
+class SensorFilter:
+    def reset(self):
+        """Forget the previously seen values"""
+        raise NotImplementedError
+
+    def __call__(self, value):
+        """Process a new value and return the filtered one"""
+        raise NotImplementedError
+
+
+class MedianFilter(SensorFilter):
+    """Median of the last few values, removes spikes
+
+    >>> f = MedianFilter(3)
+    >>> [f(x) for x in [10, 11, 100, 12, 13]]
+    [10, 10, 11, 12, 13]
+    """
+
+    def __init__(self, size):
+        assert size > 0, 'Filter size must be positive'
+        self._buffer = [0] * size
+        self._size = size
+        self._next = 0
+        self._count = 0
+
+    def reset(self):
+        self._next = 0
+        self._count = 0
+
+    def __call__(self, value):
+        self._buffer[self._next] = value
+        self._next = (self._next + 1) % self._size
+        if self._count < self._size:
+            self._count += 1
+
+        window = sorted(self._buffer[:self._count]) if self._count < self._size else sorted(self._buffer)
+        return window[(self._count - 1) // 2]
+
+
+class ExponentialMovingAverage(SensorFilter):
+    """Smooth values, new values are weighted by alpha (0 < alpha <= 1)
+
+    >>> f = ExponentialMovingAverage(0.5)
+    >>> [f(x) for x in [10, 20, 20]]
+    [10, 15.0, 17.5]
+    """
+
+    def __init__(self, alpha):
+        assert 0 < alpha <= 1, 'alpha must be between 0 and 1'
+        self._alpha = alpha
+        self._value = None
+
+    def reset(self):
+        self._value = None
+
+    def __call__(self, value):
+        if self._value is None:
+            self._value = value
+        else:
+            self._value += self._alpha * (value - self._value)
+        return self._value
+
+
+class Debounce(SensorFilter):
+    """Only change the output after the same value has been seen the given number of times in a row
+
+    >>> f = Debounce(2)
+    >>> [f(x) for x in [False, True, False, True, True, False]]
+    [False, False, False, False, True, True]
+    """
+
+    def __init__(self, samples):
+        assert samples > 0, 'Number of samples must be positive'
+        self._samples = samples
+        self._output = None
+        self._candidate = None
+        self._count = 0
+
+    def reset(self):
+        self._output = None
+        self._candidate = None
+        self._count = 0
+
+    def __call__(self, value):
+        if self._output is None:
+            self._output = value
+        elif value == self._output:
+            self._count = 0
+        else:
+            if value == self._candidate:
+                self._count += 1
+            else:
+                self._candidate = value
+                self._count = 1
+
+            if self._count >= self._samples:
+                self._output = value
+                self._count = 0
+
+        return self._output
+
+
+class Hysteresis(SensorFilter):
+    """Convert a value to True above high and False below low. Between the two, the previous output is kept
+
+    >>> f = Hysteresis(10, 20)
+    >>> [f(x) for x in [5, 15, 25, 15, 5]]
+    [False, False, True, True, False]
+    """
+
+    def __init__(self, low, high):
+        assert low <= high, 'low must not be greater than high'
+        self._low = low
+        self._high = high
+        self._output = None
+
+    def reset(self):
+        self._output = None
+
+    def __call__(self, value):
+        if value > self._high:
+            self._output = True
+        elif value < self._low:
+            self._output = False
+        elif self._output is None:
+            # start from the closer threshold
+            self._output = value - self._low > self._high - value
+
+        return self._output
+
+
+class FilterPipeline(SensorFilter):
+    """Apply multiple filters in order"""
+
+    def __init__(self, stages):
+        self._stages = tuple(stages)
+
+    def reset(self):
+        for stage in self._stages:
+            stage.reset()
+
+    def __call__(self, value):
+        for stage in self._stages:
+            value = stage(value)
+        return value
+
+    def __len__(self):
+        return len(self._stages)
+
+
+def create_filter(median=None, ema=None, hysteresis=None, debounce=None):
+    """
+    Create a filter pipeline, stages are applied in the order of the arguments
+
+    @param median: window size of the median filter
+    @param ema: alpha of the exponential moving average
+    @param hysteresis: (low, high) thresholds, output is True above high and False below low
+    @param debounce: number of samples the same value must be seen before the output changes
+    """
+    stages = []
+    if median:
+        stages.append(MedianFilter(median))
+    if ema:
+        stages.append(ExponentialMovingAverage(ema))
+    if hysteresis:
+        stages.append(Hysteresis(*hysteresis))
+    if debounce:
+        stages.append(Debounce(debounce))
+
+    return FilterPipeline(stages)
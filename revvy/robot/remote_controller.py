@@ -1,14 +1,18 @@
 # SPDX-License-Identifier: GPL-3.0-only
 
 from collections import namedtuple
-from threading import Event
+from threading import Event, Lock
 
-from revvy.utils.activation import EdgeDetector
+from revvy.utils.latency import latency_tracer
 from revvy.utils.stopwatch import Stopwatch
 from revvy.utils.thread_wrapper import ThreadWrapper, ThreadContext
 from revvy.utils.logger import get_logger
 
-RemoteControllerCommand = namedtuple('RemoteControllerCommand', ['analog', 'buttons'])
+# buttons: bit n is set if button n is pressed
+# timestamp: time.monotonic() when the message was received, None if latency tracing is disabled
+RemoteControllerCommand = namedtuple('RemoteControllerCommand', ['analog', 'buttons', 'timestamp'], defaults=[None])
+
+_all_buttons = 0xFFFFFFFF
 
 
 class RemoteController:
@@ -16,53 +20,81 @@ class RemoteController:
         self._log = get_logger('RemoteController')
 
         self._analogActions = []  # ([channel], callback) pairs
+        self._channelActions = {}  # channel -> indexes of the analog actions that use the channel
         self._analogStates = []  # the last analog values, used to compare if a callback needs to be fired
-        self._buttonHandlers = [EdgeDetector() for _ in range(32)]
         self._buttonActions = [None] * 32  # callbacks to be fired if a button gets pressed
+        self._buttonActionMask = 0  # bit n is set if button n has a callback
 
-        for handler in self._buttonHandlers:
-            handler.handle(1)
+        # buttons that are held when the controller connects don't count as pressed
+        self._previousButtons = _all_buttons
 
     def reset(self):
         self._log('RemoteController: reset')
         self._analogActions.clear()
-        self._analogStates.clear()
+        self._channelActions.clear()
+        self._analogStates = []
 
         self._buttonActions = [None] * 32
+        self._buttonActionMask = 0
+
+        self._previousButtons = _all_buttons
+
+    def _changed_analog_actions(self, previous, current):
+        """Return the indexes of the analog actions that use a channel that has changed, in registration order"""
+        channel_actions = self._channelActions
+        if len(previous) != len(current):
+            changed = range(len(current))
+        else:
+            changed = [channel for channel, (old, new) in enumerate(zip(previous, current)) if old != new]
+
+        affected = set()
+        for channel in changed:
+            affected.update(channel_actions.get(channel, ()))
 
-        for handler in self._buttonHandlers:
-            handler.handle(1)
+        return sorted(affected)
 
     def tick(self, message: RemoteControllerCommand):
         # handle analog channels
-        if message.analog != self._analogStates:
-            previous_analog_states, self._analogStates = self._analogStates, message.analog
-            for channels, action in self._analogActions:
+        analog = message.analog
+        if analog != self._analogStates:
+            previous_analog_states, self._analogStates = self._analogStates, analog
+            for action_idx in self._changed_analog_actions(previous_analog_states, analog):
+                channels, action = self._analogActions[action_idx]
                 try:
-                    try:
-                        changed = any(previous_analog_states[x] != message.analog[x] for x in channels)
-                    except IndexError:
-                        changed = True
-
-                    if changed:
-                        action([message.analog[x] for x in channels])
+                    values = [analog[x] for x in channels]
                 except IndexError:
                     # looks like an action was registered for an analog channel that we didn't receive
                     self._log(f'Skip analog handler for channels {", ".join(map(str, channels))}')
+                else:
+                    action(values)
+
+        # handle button presses: call the actions of the buttons that were released in the previous message
+        buttons = message.buttons
+        pressed = buttons & ~self._previousButtons & self._buttonActionMask
+        self._previousButtons = buttons
 
-        # handle button presses
-        for handler, button, action in zip(self._buttonHandlers, message.buttons, self._buttonActions):
-            pressed = handler.handle(button)
-            if pressed == 1 and action:
-                # noinspection PyCallingNonCallable
-                action()
+        while pressed:
+            lowest_bit = pressed & -pressed
+            pressed ^= lowest_bit
+
+            # noinspection PyCallingNonCallable
+            self._buttonActions[lowest_bit.bit_length() - 1]()
 
     def on_button_pressed(self, button, action: callable):
         self._buttonActions[button] = action
 
+        if action:
+            self._buttonActionMask |= 1 << button
+        else:
+            self._buttonActionMask &= ~(1 << button)
+
     def on_analog_values(self, channels, action):
+        action_idx = len(self._analogActions)
         self._analogActions.append((channels, action))
 
+        for channel in set(channels):
+            self._channelActions.setdefault(channel, []).append(action_idx)
+
 
 class RemoteControllerScheduler:
 
@@ -71,41 +103,78 @@ class RemoteControllerScheduler:
 
     def __init__(self, rc: RemoteController):
         self._controller = rc
-        self._data_ready_event = Event()
+        self._data_ready_event = Event()  # set when there is an unprocessed message
+        self._mailbox_lock = Lock()
         self._controller_detected_callback = None
         self._controller_lost_callback = None
         self._message = None
+        self._received = 0
+        self._dropped = 0
         self._log = get_logger('RemoteControllerScheduler')
 
+    @property
+    def received_messages(self):
+        return self._received
+
+    @property
+    def dropped_messages(self):
+        """Number of messages that were replaced by a newer one before they could be processed"""
+        return self._dropped
+
     def data_ready(self, message: RemoteControllerCommand):
-        self._message = message
-        self._data_ready_event.set()
+        with self._mailbox_lock:
+            if self._message is not None:
+                self._dropped += 1
+            self._message = message
+            self._received += 1
+            self._data_ready_event.set()
+
+    def _tick(self, message: RemoteControllerCommand):
+        latency_tracer.begin(message.timestamp)
+        latency_tracer.record('remote_controller_wakeup')
+
+        self._controller.tick(message)
+
+        latency_tracer.record('remote_controller_tick')
+
+    def _clear_mailbox(self):
+        with self._mailbox_lock:
+            self._message = None
+            self._data_ready_event.clear()
 
     def _wait_for_message(self, ctx, wait_time):
-        timeout = not self._data_ready_event.wait(wait_time)
-        self._data_ready_event.clear()
+        """Return the latest message, or None if there was no message in time or the thread is stopping"""
+        if not self._data_ready_event.wait(wait_time) or ctx.stop_requested:
+            return None
+
+        with self._mailbox_lock:
+            message, self._message = self._message, None
+            self._data_ready_event.clear()
 
-        return not (timeout or ctx.stop_requested)
+        return message
 
     def handle_controller(self, ctx: ThreadContext):
         self._log('Waiting for controller')
 
-        self._data_ready_event.clear()
+        self._clear_mailbox()
 
         ctx.on_stopped(self._data_ready_event.set)
 
         # wait for first message
         stopwatch = Stopwatch()
-        if self._wait_for_message(ctx, self.first_message_timeout):
+        message = self._wait_for_message(ctx, self.first_message_timeout)
+        if message:
             self._log(f"Time to first message: {stopwatch.elapsed}s")
             if self._controller_detected_callback:
                 self._controller_detected_callback()
 
-            self._controller.tick(self._message)
+            self._tick(message)
 
             # wait for the other messages
-            while self._wait_for_message(ctx, self.message_max_period):
-                self._controller.tick(self._message)
+            message = self._wait_for_message(ctx, self.message_max_period)
+            while message:
+                self._tick(message)
+                message = self._wait_for_message(ctx, self.message_max_period)
 
         if not ctx.stop_requested:
             if self._controller_lost_callback:
@@ -113,7 +182,8 @@ class RemoteControllerScheduler:
 
         # reset here, controller was lost or stopped
         self._controller.reset()
-        self._log('exited')
+        self._clear_mailbox()
+        self._log(f'exited (messages received: {self._received}, dropped: {self._dropped})')
 
     def on_controller_detected(self, callback: callable):
         self._log('Register controller found handler')
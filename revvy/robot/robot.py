@@ -9,6 +9,7 @@ from revvy.mcu.rrrc_control import RevvyTransportBase
 from revvy.robot.drivetrain import DifferentialDrivetrain
 from revvy.robot.imu import IMU
 from revvy.robot.led_ring import RingLed
+from revvy.robot.ports.common import FunctionAggregator
 from revvy.robot.ports.motor import create_motor_port_handler
 from revvy.robot.ports.sensor import create_sensor_port_handler
 from revvy.robot.sound import Sound
@@ -37,6 +38,7 @@ class Robot(RobotInterface):
         self._assets.add_source(os.path.join('data', 'assets'))
 
         self._log = get_logger('Robot')
+        self._on_mcu_reset = FunctionAggregator()
 
     def __enter__(self):
         self._comm_interface = self._bus_factory()
@@ -107,6 +109,11 @@ class Robot(RobotInterface):
     def __exit__(self, exc_type, exc_val, exc_tb):
         self._comm_interface.close()
 
+    @property
+    def on_mcu_reset(self):
+        """Callbacks to be called when the MCU reports that it has been reset"""
+        return self._on_mcu_reset
+
     @property
     def assets(self):
         return self._assets
@@ -165,9 +172,22 @@ class Robot(RobotInterface):
     def time(self):
         return self._stopwatch.elapsed
 
+    def _mcu_reset_detected(self, _):
+        self._log('MCU reset detected')
+        self._motor_ports.invalidate()
+        self._sensor_ports.invalidate()
+        self._on_mcu_reset()
+
+    def reset_state(self):
+        """Restore the default LED animation, volume and status without reconfiguring the ports"""
+        self._ring_led.start_animation(RingLed.BreathingGreen)
+        self._sound.reset_volume()
+
+        self._status.robot_status = RobotStatus.NotConfigured
+        self._status.update()
+
     def reset(self):
         self._log('reset()')
-        self._ring_led.start_animation(RingLed.BreathingGreen)
         self._status_updater.reset()
 
         def _process_battery_slot(data):
@@ -180,16 +200,13 @@ class Robot(RobotInterface):
         self._status_updater.enable_slot("axl", self._imu.update_axl_data)
         self._status_updater.enable_slot("gyro", self._imu.update_gyro_data)
         self._status_updater.enable_slot("yaw", self._imu.update_yaw_angles)
-        # TODO: do something useful with the reset signal
-        self._status_updater.enable_slot("reset", lambda _: self._log('MCU reset detected'))
+        self._status_updater.enable_slot("reset", self._mcu_reset_detected)
 
         self._drivetrain.reset()
         self._motor_ports.reset()
         self._sensor_ports.reset()
-        self._sound.reset_volume()
 
-        self._status.robot_status = RobotStatus.NotConfigured
-        self._status.update()
+        self.reset_state()
 
     def stop(self):
         self._sound.wait()
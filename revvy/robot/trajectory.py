@@ -0,0 +1,289 @@
+# SPDX-License-Identifier: GPL-3.0-only
+
+import itertools
+import math
+import time
+from array import array
+
+from revvy.utils.awaiter import Awaiter, AwaiterImpl
+from revvy.utils.logger import get_logger
+
+default_period = 0.005  # same as the status update loop
+
+
+class MotionProfile:
+    """Precomputed setpoints of a single motor movement
+
+    positions: expected position (degrees, relative to the start) at the beginning of each period
+    speeds: speed setpoint (rpm) for each period
+    """
+
+    def __init__(self, positions: array, speeds: array, period):
+        assert len(positions) == len(speeds)
+        self._positions = positions
+        self._speeds = speeds
+        self._period = period
+
+    @staticmethod
+    def _from_position_function(position_at, duration, period):
+        ticks = max(1, math.ceil(duration / period))
+
+        positions = [position_at(min(i * period, duration)) for i in range(ticks + 1)]
+        # average speed of each period so that the setpoints add up to the exact distance, deg/s -> rpm
+        speeds = array('f', (round((positions[i + 1] - positions[i]) / period / 6, 6) for i in range(ticks)))
+        speeds.append(0)
+
+        return MotionProfile(array('f', positions), speeds, period)
+
+    @staticmethod
+    def trapezoidal(distance, max_speed, max_acceleration, period=default_period):
+        """
+        Constant acceleration, constant speed, constant deceleration
+
+        @param distance: degrees
+        @param max_speed: rpm
+        @param max_acceleration: rpm per second
+        """
+        sign = math.copysign(1, distance)
+        distance = abs(distance)
+        speed = max_speed * 6  # deg/s
+        acceleration = max_acceleration * 6  # deg/s^2
+
+        if speed * speed / acceleration > distance:
+            # the movement is too short to reach max speed
+            speed = math.sqrt(distance * acceleration)
+
+        t_acc = speed / acceleration
+        t_cruise = (distance - speed * t_acc) / speed if speed else 0
+        duration = 2 * t_acc + t_cruise
+
+        def position_at(t):
+            if t < t_acc:
+                p = acceleration * t * t / 2
+            elif t < t_acc + t_cruise:
+                p = speed * t_acc / 2 + speed * (t - t_acc)
+            else:
+                t_left = duration - t
+                p = distance - acceleration * t_left * t_left / 2
+            return sign * p
+
+        return MotionProfile._from_position_function(position_at, duration, period)
+
+    @staticmethod
+    def s_curve(distance, max_speed, max_acceleration, period=default_period):
+        """
+        Smooth (raised cosine) speed ramps, acceleration is continuous
+
+        @param distance: degrees
+        @param max_speed: rpm
+        @param max_acceleration: peak acceleration in rpm per second
+        """
+        sign = math.copysign(1, distance)
+        distance = abs(distance)
+        speed = max_speed * 6  # deg/s
+        acceleration = max_acceleration * 6  # deg/s^2
+
+        # a ramp of length t_ramp covers speed * t_ramp / 2 degrees with a peak acceleration of pi * speed / 2 / t_ramp
+        if math.pi * speed * speed / (2 * acceleration) > distance:
+            speed = math.sqrt(2 * acceleration * distance / math.pi)
+
+        t_ramp = math.pi * speed / (2 * acceleration)
+        t_cruise = (distance - speed * t_ramp) / speed if speed else 0
+        duration = 2 * t_ramp + t_cruise
+
+        def ramp(t):
+            return speed / 2 * (t - t_ramp / math.pi * math.sin(math.pi * t / t_ramp))
+
+        def position_at(t):
+            if t < t_ramp:
+                p = ramp(t)
+            elif t < t_ramp + t_cruise:
+                p = speed * t_ramp / 2 + speed * (t - t_ramp)
+            else:
+                p = distance - ramp(duration - t)
+            return sign * p
+
+        return MotionProfile._from_position_function(position_at, duration, period)
+
+    def scaled(self, factor):
+        """Create a profile with the same timing that moves factor times the distance"""
+        # 'or 0.0' avoids -0.0, so that stopped motors get the same command regardless of the direction
+        return MotionProfile(array('f', (p * factor or 0.0 for p in self._positions)),
+                             array('f', (s * factor or 0.0 for s in self._speeds)),
+                             self._period)
+
+    @property
+    def positions(self):
+        return self._positions
+
+    @property
+    def speeds(self):
+        return self._speeds
+
+    @property
+    def period(self):
+        return self._period
+
+    @property
+    def duration(self):
+        return (len(self._speeds) - 1) * self._period
+
+    def __len__(self):
+        return len(self._speeds)
+
+
+def arc_profiles(radius, angle, max_speed, max_acceleration, wheel_diameter, track_width, s_curve=False,
+                 period=default_period):
+    """
+    Create coordinated (left, right) wheel profiles that drive the robot along an arc
+
+    @param radius: radius of the arc, measured at the center of the robot (same unit as wheel_diameter)
+    @param angle: degrees to turn along the arc, positive angles turn left (CCW)
+    @param max_speed: maximum wheel speed (rpm) of the outer wheel
+    @param max_acceleration: maximum wheel acceleration (rpm per second) of the outer wheel
+    """
+    wheel_degrees_per_unit = 360 / (math.pi * wheel_diameter)
+    angle_rad = math.radians(angle)
+
+    left = angle_rad * (radius - track_width / 2) * wheel_degrees_per_unit
+    right = angle_rad * (radius + track_width / 2) * wheel_degrees_per_unit
+
+    outer = left if abs(left) > abs(right) else right
+    if outer == 0:
+        return MotionProfile.trapezoidal(0, max_speed, max_acceleration, period), \
+               MotionProfile.trapezoidal(0, max_speed, max_acceleration, period)
+
+    create = MotionProfile.s_curve if s_curve else MotionProfile.trapezoidal
+    profile = create(outer, max_speed, max_acceleration, period)
+
+    return profile.scaled(left / outer), profile.scaled(right / outer)
+
+
+class TrajectoryFollower:
+    """Stream precomputed speed setpoints to a set of motors, one batched control frame per period
+
+    Every control frame is prepared in advance, update() only selects the frame that belongs to the current time and
+    records the tracking error. update() is expected to be called at the status update rate, e.g. when the status of
+    the motors change. Stopping the motors when the movement is cancelled is the responsibility of the owner.
+    """
+
+    def __init__(self, motors: list, profiles: list, time_source=time.monotonic):
+        assert len(motors) == len(profiles) > 0
+        period = profiles[0].period
+        assert all(p.period == period for p in profiles), 'Profiles must have the same period'
+
+        self._log = get_logger('TrajectoryFollower')
+        self._motors = motors
+        self._profiles = profiles
+        self._period = period
+        self._length = max(map(len, profiles))
+        self._time = time_source
+        self._interface = motors[0].interface
+
+        frames = []
+        previous = None
+        for i in range(self._length):
+            frame = bytes(itertools.chain(*(motor.create_set_speed_command(profile.speeds[min(i, len(profile) - 1)])
+                                            for motor, profile in zip(motors, profiles))))
+            # reuse the same object for repeated frames so that resending them can be skipped cheaply
+            if frame == previous:
+                frame = previous
+            frames.append(frame)
+            previous = frame
+        self._frames = tuple(frames)
+
+        # (index, motor, expected positions, speed setpoints) - avoid building these in every tick
+        self._tracked = tuple((i, motor, profile.positions, profile.speeds, len(profile) - 1)
+                              for i, (motor, profile) in enumerate(zip(motors, profiles)))
+        self._start_positions = array('f', [0] * len(motors))
+        self._position_errors = array('f', [0] * len(motors))
+        self._speed_errors = array('f', [0] * len(motors))
+        self._max_error = 0
+
+        self._start_time = 0
+        self._tick = -1
+        self._last_frame = None
+        self._running = False
+
+        self._awaiter = AwaiterImpl()
+        self._awaiter.on_cancelled(self._stopped)
+
+    @property
+    def awaiter(self) -> Awaiter:
+        return self._awaiter
+
+    @property
+    def position_errors(self):
+        """Last position tracking error (degrees) of each motor"""
+        return self._position_errors
+
+    @property
+    def speed_errors(self):
+        """Last speed tracking error (rpm) of each motor"""
+        return self._speed_errors
+
+    @property
+    def max_error(self):
+        """Largest absolute position tracking error (degrees) seen during the movement"""
+        return self._max_error
+
+    @property
+    def duration(self):
+        return (self._length - 1) * self._period
+
+    def _stopped(self):
+        self._running = False
+
+    def start(self) -> Awaiter:
+        self._log('start')
+        for i, motor in enumerate(self._motors):
+            self._start_positions[i] = motor.pos
+
+        self._tick = -1
+        self._last_frame = None
+        self._running = True
+        self._start_time = self._time()
+        self.update()
+
+        return self._awaiter
+
+    def update(self):
+        if not self._running:
+            return
+
+        tick = int((self._time() - self._start_time) / self._period)
+        if tick == self._tick:
+            return
+        self._tick = tick
+
+        if tick >= self._length - 1:
+            self._running = False
+            self._send(self._frames[-1])
+            self._log(f'finished, max error: {self._max_error:.1f} degrees')
+            self._awaiter.finish()
+            return
+
+        self._track_error(tick)
+
+        frame = self._frames[tick]
+        if frame is not self._last_frame:
+            self._send(frame)
+
+    def _send(self, frame):
+        self._last_frame = frame
+        self._interface.set_motor_port_control_value(frame)
+
+    def _track_error(self, tick):
+        # feedback belongs to the previous setpoint
+        previous = tick - 1 if tick else 0
+        start_positions = self._start_positions
+        position_errors = self._position_errors
+        speed_errors = self._speed_errors
+        for i, motor, positions, speeds, last in self._tracked:
+            error = motor.pos - start_positions[i] - positions[min(tick, last)]
+            position_errors[i] = error
+            speed_errors[i] = motor.speed - speeds[min(previous, last)]
+
+            error = abs(error)
+            if error > self._max_error:
+                self._max_error = error
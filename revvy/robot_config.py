@@ -2,12 +2,15 @@
 
 import json
 from json import JSONDecodeError
+from typing import NamedTuple
 
 from revvy.robot.configurations import Motors, Sensors
+from revvy.scripting.code_cache import code_cache
 from revvy.scripting.runtime import ScriptDescriptor
-from revvy.utils.functions import b64_decode_str, dict_get_first, str_to_func
+from revvy.utils.functions import b64_decode_str, dict_get_first
 from revvy.scripting.builtin_scripts import builtin_scripts
 from revvy.utils.logger import get_logger
+from revvy.utils.lru_cache import LruCache
 
 _log = get_logger('RobotConfig')
 
@@ -52,6 +55,11 @@ class PortConfig:
     def __setitem__(self, item, value):
         self._ports[item] = value
 
+    def changed_ports(self, other: 'PortConfig'):
+        """Return the ids of the ports that are configured differently in the other configuration"""
+        port_ids = self._ports.keys() | other._ports.keys()
+        return frozenset(port for port in port_ids if self[port] != other[port])
+
 
 class RemoteControlConfig:
     def __init__(self):
@@ -63,6 +71,18 @@ class ConfigError(Exception):
     pass
 
 
+class RobotConfigDiff(NamedTuple):
+    """Parts of the robot configuration that need to be updated to apply a new configuration"""
+    motors: frozenset
+    sensors: frozenset
+    drivetrain: bool
+    scripts: bool
+
+    @property
+    def is_empty(self):
+        return not (self.motors or self.sensors or self.drivetrain or self.scripts)
+
+
 class RobotConfig:
     @staticmethod
     def create_runnable(script):
@@ -83,7 +103,7 @@ class RobotConfig:
 
                 code = code.replace('import time\n', '')
 
-                return str_to_func(code)
+                return code_cache.create_runnable(code)
 
             except KeyError as e:
                 raise KeyError('Neither builtinScriptName, nor pythonCode is present for a script') from e
@@ -186,5 +206,60 @@ class RobotConfig:
         self.controller = RemoteControlConfig()
         self.background_scripts = []
 
+    @property
+    def scripts(self):
+        """Iterate over every script descriptor of the configuration"""
+        yield from (analog['script'] for analog in self.controller.analog)
+        yield from (script for script in self.controller.buttons if script)
+        yield from self.background_scripts
+
+    def diff(self, other: 'RobotConfig') -> RobotConfigDiff:
+        """Compare two configurations and collect the parts that need to change to go from this one to the other"""
+        changed_motors = self.motors.changed_ports(other.motors)
+        drivetrain_motors = {*other.drivetrain['left'], *other.drivetrain['right']}
+
+        drivetrain_changed = self.drivetrain != other.drivetrain or not changed_motors.isdisjoint(drivetrain_motors)
+
+        # scripts access ports by name so they also need to be updated when port names change
+        scripts_changed = (self.controller.analog != other.controller.analog or
+                           self.controller.buttons != other.controller.buttons or
+                           self.background_scripts != other.background_scripts or
+                           self.motors.names != other.motors.names or
+                           self.sensors.names != other.sensors.names)
+
+        return RobotConfigDiff(motors=changed_motors,
+                               sensors=self.sensors.changed_ports(other.sensors),
+                               drivetrain=drivetrain_changed,
+                               scripts=scripts_changed)
+
+
+class RobotConfigCache:
+    """Keeps recently parsed configurations, keyed by the digest of the configuration message"""
+
+    def __init__(self, max_size=5):
+        self._configs = LruCache(max_size)
+
+    @property
+    def hits(self):
+        return self._configs.hits
+
+    @property
+    def misses(self):
+        return self._configs.misses
+
+    def parse(self, digest, config_data: bytes) -> RobotConfig:
+        """Return the configuration parsed from config_data, reusing the previous result for the same digest"""
+        config = self._configs.get(digest)
+        if config is None:
+            config_string = config_data.decode()
+            _log(f'New configuration: {config_string}')
+
+            config = RobotConfig.from_string(config_string)
+            self._configs[digest] = config
+        else:
+            _log(f'Using cached configuration {digest} (hits: {self.hits}, misses: {self.misses})')
+
+        return config
+
 
 empty_robot_config = RobotConfig()
@@ -0,0 +1,109 @@
+# SPDX-License-Identifier: GPL-3.0-only
+
+import marshal
+from importlib.util import MAGIC_NUMBER
+
+from revvy.utils.file_storage import StorageInterface, StorageError
+from revvy.utils.functions import bytestr_hash, str_to_func
+from revvy.utils.logger import get_logger
+from revvy.utils.lru_cache import LruCache
+from revvy.utils.stopwatch import Stopwatch
+
+
+class CodeCache:
+    """Cache of compiled user scripts, keyed by the hash of their source code
+
+    Scripts are compiled once, when the configuration is processed. If a storage is set, the compiled code is also
+    persisted (marshalled), so configurations that are uploaded repeatedly don't need to be compiled after restart.
+    At most max_stored scripts are kept in the storage, the least recently written ones are deleted first.
+    """
+
+    def __init__(self, max_size=50, storage: StorageInterface = None, max_stored=100):
+        self._log = get_logger('CodeCache')
+        self._entries = LruCache(max_size)
+        self._max_stored = max_stored
+        self._time_saved = 0
+        self.storage = storage
+
+    @property
+    def hits(self):
+        return self._entries.hits
+
+    @property
+    def misses(self):
+        return self._entries.misses
+
+    @property
+    def time_saved(self):
+        """Total compilation time (in seconds) that was saved by using cached code"""
+        return self._time_saved
+
+    def _load(self, source_hash):
+        storage = self.storage
+        if storage is None:
+            return None
+
+        try:
+            metadata = storage.read_metadata(source_hash)
+            if metadata['magic'] != MAGIC_NUMBER.hex():
+                return None
+
+            return marshal.loads(storage.read(source_hash)), metadata['compile_time']
+        except (StorageError, KeyError, ValueError, EOFError, TypeError):
+            return None
+
+    def _store(self, source_hash, code, compile_time):
+        storage = self.storage
+        if storage is not None:
+            try:
+                metadata = {'magic': MAGIC_NUMBER.hex(), 'compile_time': compile_time}
+                storage.write(source_hash, marshal.dumps(code), metadata=metadata)
+            except (StorageError, IOError, ValueError):
+                self._log('Failed to persist compiled code')
+            else:
+                self._remove_old_entries(storage)
+
+    def _remove_old_entries(self, storage):
+        try:
+            names = storage.names()
+            for name in names[:max(0, len(names) - self._max_stored)]:
+                storage.delete(name)
+        except (StorageError, IOError):
+            self._log('Failed to remove old compiled code')
+
+    def create_runnable(self, source):
+        """Return a callable that runs the given python source. Equal sources result in the same callable object"""
+        source_hash = bytestr_hash(source.encode('utf-8'))
+
+        cached = self._entries.get(source_hash)
+        if cached is not None:
+            runnable, compile_time = cached
+            self._time_saved += compile_time
+            self._log(f'Using cached code (saved {compile_time:.4f}s, total saved: {self._time_saved:.4f}s)')
+            return runnable
+
+        stopwatch = Stopwatch()
+        loaded = self._load(source_hash)
+        if loaded is not None:
+            code, compile_time = loaded
+            load_time = stopwatch.elapsed
+            self._time_saved += max(0, compile_time - load_time)
+            self._log(f'Loaded compiled code from storage (saved {compile_time - load_time:.4f}s)')
+        else:
+            try:
+                code = compile(source, '<script>', 'exec')
+            except SyntaxError:
+                # don't cache invalid code, let the script fail when it is started
+                self._log('Failed to compile script')
+                return str_to_func(source)
+
+            compile_time = stopwatch.elapsed
+            self._store(source_hash, code, compile_time)
+
+        runnable = str_to_func(code)
+        self._entries[source_hash] = (runnable, compile_time)
+
+        return runnable
+
+
+code_cache = CodeCache()
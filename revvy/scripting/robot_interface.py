@@ -1,11 +1,15 @@
 # SPDX-License-Identifier: GPL-3.0-only
+import time
 from functools import partial
+from threading import Condition
 
 from revvy.robot.configurations import Motors, Sensors
 from revvy.robot.led_ring import RingLed
+from revvy.robot.motor_group import MotorGroup
 from revvy.robot.ports.motor import MotorConstants
+from revvy.robot.ports.sensors.filters import create_filter
 from revvy.robot.sound import Sound
-from revvy.scripting.resource import Resource
+from revvy.scripting.resource import Resource, null_handle
 from revvy.utils.functions import hex2rgb
 from revvy.robot.ports.common import PortInstance, PortCollection
 
@@ -16,6 +20,11 @@ class ResourceWrapper:
         self._priority = priority
         self._current_handle = None
 
+    @property
+    def is_taken(self):
+        """True if the script already holds the resource"""
+        return self._current_handle is not None
+
     def _release_handle(self):
         self._current_handle = None
 
@@ -38,6 +47,74 @@ class ResourceWrapper:
             handle.interrupt()
 
 
+class ResourceGroupHandle:
+    """Handle that holds multiple resources at once"""
+
+    def __init__(self, handles: list):
+        self._handles = handles
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.release()
+
+    def __bool__(self):
+        return True
+
+    def release(self):
+        for handle in self._handles:
+            handle.release()
+
+    def interrupt(self):
+        for handle in self._handles:
+            handle.interrupt()
+
+    def run_uninterruptable(self, callback):
+        def _run_with(handles):
+            if not handles:
+                return callback()
+            return handles[0].run_uninterruptable(lambda: _run_with(handles[1:]))
+
+        return _run_with(self._handles)
+
+
+class ResourceGroupWrapper:
+    """Request multiple resources at once. The request fails if any of the resources can't be taken"""
+
+    def __init__(self, resources: list):
+        self._resources = resources
+
+    def request(self, callback=None):
+        handles = []
+        taken_handles = []
+        for resource in self._resources:
+            was_taken = resource.is_taken
+            handle = resource.request(callback)
+            if not handle:
+                # only give back what was taken by this request, the script may still use the rest
+                for taken_handle in taken_handles:
+                    taken_handle.release()
+                return null_handle
+
+            handles.append(handle)
+            if not was_taken:
+                taken_handles.append(handle)
+
+        return ResourceGroupHandle(handles)
+
+    def release(self):
+        for resource in self._resources:
+            resource.release()
+
+
+def _scale(value, factor):
+    """Multiply a single value or every value of a per-motor list"""
+    if type(value) in (list, tuple):
+        return [item * factor for item in value]
+    return value * factor
+
+
 class Wrapper:
     def __init__(self, script, resource: ResourceWrapper):
         self._resource = resource
@@ -73,6 +150,8 @@ class SensorPortWrapper(Wrapper):
     def __init__(self, script, sensor: PortInstance, resource: ResourceWrapper):
         super().__init__(script, resource)
         self._sensor = sensor
+        self._status_changed = Condition()
+        self._stop_callback_registered = False
 
     def configure(self, config):
         if type(config) is str:
@@ -80,15 +159,104 @@ class SensorPortWrapper(Wrapper):
             config = self._named_configurations[config]
         self.using_resource(partial(self._sensor.configure, config))
 
+    @property
+    def state(self):
+        """Value and raw value of the sensor, as received together"""
+        return self._sensor.state
+
+    def set_filter(self, median=None, ema=None, hysteresis=None, debounce=None):
+        """
+        Filter the sensor values. The filters run when new data is received and are applied in the order of the
+        arguments. Calling without arguments disables filtering.
+
+        @param median: window size of the median filter, removes spikes
+        @param ema: 0 < ema <= 1, weight of new values in the exponential moving average
+        @param hysteresis: (low, high) thresholds, value is True above high and False below low
+        @param debounce: number of times a new value must be seen in a row before the value changes
+        """
+        sensor_filter = create_filter(median, ema, hysteresis, debounce)
+        self.using_resource(partial(self._sensor.set_filter, sensor_filter if len(sensor_filter) else None))
+
+    def _notify(self, *_):
+        with self._status_changed:
+            self._status_changed.notify_all()
+
+    def _on_script_stopping(self):
+        # stop callbacks are called once, the next wait needs to subscribe again
+        self._stop_callback_registered = False
+        self._notify()
+
+    def wait_for_value(self, predicate, timeout=None):
+        """
+        Block until the sensor has a value for which predicate returns True. Woken up by the sensor status updates
+        and when the port is reconfigured.
+
+        @param predicate: called with the sensor value
+        @param timeout: maximum time to wait in seconds, None to wait indefinitely
+        @return: the value that satisfied the predicate, or None if the timeout expired
+        """
+        script = self._script
+        if not self._stop_callback_registered:
+            self._stop_callback_registered = True
+            script.on_stopping(self._on_script_stopping)
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        sensor = self._sensor
+        # reconfiguring the port replaces the driver, along with its status callbacks
+        sensor.on_config_changed.add(self._notify)
+        on_status_changed = sensor.on_status_changed
+        on_status_changed.add(self._notify)
+        try:
+            with self._status_changed:
+                while True:
+                    if script.is_stop_requested:
+                        raise InterruptedError
+
+                    if sensor.on_status_changed is not on_status_changed:
+                        on_status_changed.remove(self._notify)
+                        on_status_changed = sensor.on_status_changed
+                        on_status_changed.add(self._notify)
+
+                    state = sensor.state
+                    if state.has_data and predicate(state.value):
+                        return state.value
+
+                    if deadline is None:
+                        self._status_changed.wait()
+                    else:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            return None
+                        self._status_changed.wait(remaining)
+        finally:
+            on_status_changed.remove(self._notify)
+            sensor.on_config_changed.remove(self._notify)
+
+    def wait_for_change(self, timeout=None):
+        """
+        Block until the sensor value changes
+
+        @param timeout: maximum time to wait in seconds, None to wait indefinitely
+        @return: the new value, or None if the timeout expired
+        """
+        state = self._sensor.state
+        if not state.has_data:
+            return self.wait_for_value(lambda value: True, timeout)
+
+        current = state.value
+        return self.wait_for_value(lambda value: value != current, timeout)
+
     def read(self):
         """Return the last converted value"""
         if self._script.is_stop_requested:
             raise InterruptedError
 
-        while not self._sensor.has_data:
-            self.sleep(0.1)
+        state = self._sensor.state
+        if state.has_data:
+            return state.value
 
-        return self._sensor.value
+        return self.wait_for_value(lambda value: True)
 
 
 class RingLedWrapper(Wrapper):
@@ -136,6 +304,11 @@ class MotorPortWrapper(Wrapper):
         self._log_prefix = f"MotorPortWrapper[motor {motor.id}]: "
         self._motor = motor
 
+    @property
+    def state(self):
+        """Status, power, position and speed of the motor, as received together"""
+        return self._motor.state
+
     @property
     def pos(self):
         return self._motor.pos
@@ -234,6 +407,84 @@ class MotorPortWrapper(Wrapper):
         self.using_resource(partial(self._motor.stop, action))
 
 
+class MotorGroupWrapper(Wrapper):
+    """Wrapper class to expose motor groups to user scripts. Commands are sent to all motors at once"""
+
+    def __init__(self, script, group: MotorGroup, resource: ResourceGroupWrapper):
+        super().__init__(script, resource)
+        self._log_prefix = f"MotorGroupWrapper[motors {', '.join(str(motor.id) for motor in group.motors)}]: "
+        self._group = group
+
+        self.follow = wrap_async_method(self, group.follow)
+
+    def log(self, message):
+        self._script.log(self._log_prefix + message)
+
+    def move(self, direction, amount, unit_amount, limit, unit_limit):
+        self.log("move")
+        if unit_amount == MotorConstants.UNIT_ROT:
+            unit_amount = MotorConstants.UNIT_DEG
+            amount = _scale(amount, 360)
+
+        multipliers = {
+            MotorConstants.DIRECTION_FWD: 1,
+            MotorConstants.DIRECTION_BACK: -1,
+        }
+        multiplier = multipliers[direction]
+
+        set_fns = {
+            MotorConstants.UNIT_DEG: {
+                MotorConstants.UNIT_SPEED_RPM: lambda: self._group.set_position(_scale(amount, multiplier),
+                                                                                speed_limit=limit,
+                                                                                pos_type='relative'),
+                MotorConstants.UNIT_SPEED_PWR: lambda: self._group.set_position(_scale(amount, multiplier),
+                                                                                power_limit=limit,
+                                                                                pos_type='relative')
+            },
+            MotorConstants.UNIT_SEC: {
+                MotorConstants.UNIT_SPEED_RPM: lambda: self._group.set_speed(_scale(limit, multiplier)),
+                MotorConstants.UNIT_SPEED_PWR: lambda: self._group.set_power(_scale(limit, multiplier))
+            }
+        }
+
+        awaiter = None
+
+        def _interrupted():
+            self.log('interrupted')
+            if awaiter:
+                awaiter.cancel()
+
+        with self.try_take_resource(_interrupted) as resource:
+            if resource:
+                self.log("start movement")
+                awaiter = resource.run_uninterruptable(set_fns[unit_amount][unit_limit])
+
+                if unit_amount == MotorConstants.UNIT_DEG:
+                    # wait for every motor to finish
+                    awaiter.wait()
+
+                elif unit_amount == MotorConstants.UNIT_SEC:
+                    self.sleep(amount)
+                    resource.run_uninterruptable(partial(self._group.set_power, 0))
+                self.log("movement finished")
+
+    def spin(self, direction, rotation, unit_rotation):
+        self.log("spin")
+        multipliers = {
+            MotorConstants.DIRECTION_FWD: 1,
+            MotorConstants.DIRECTION_BACK: -1,
+        }
+        set_speed_fns = {
+            MotorConstants.UNIT_SPEED_RPM: self._group.set_speed,
+            MotorConstants.UNIT_SPEED_PWR: self._group.set_power
+        }
+
+        self.using_resource(partial(set_speed_fns[unit_rotation], _scale(rotation, multipliers[direction])))
+
+    def stop(self, action):
+        self.using_resource(partial(self._group.stop, action))
+
+
 def wrap_async_method(owner, method):
     def _wrapper(*args, **kwargs):
         def _interrupted():
@@ -264,10 +515,28 @@ class DriveTrainWrapper(Wrapper):
 
         self.turn = wrap_async_method(self, drivetrain.turn)
         self.drive = wrap_async_method(self, drivetrain.drive)
+        self.arc = wrap_async_method(self, drivetrain.arc)
 
     def log(self, message):
         self._script.log("DriveTrain: " + message)
 
+    @property
+    def pose(self):
+        """Estimated (x, y, heading, timestamp) of the robot since configuration or the last reset_pose()"""
+        return self._drivetrain.odometry.pose
+
+    @property
+    def pose_history(self):
+        return list(self._drivetrain.odometry.history)
+
+    def reset_pose(self):
+        self.log("reset_pose")
+        self._drivetrain.odometry.reset()
+
+    def set_geometry(self, wheel_diameter, track_width=None):
+        """Set the wheel diameter (and track width, in the same unit) to measure the pose in real units"""
+        self._drivetrain.odometry.set_geometry(wheel_diameter, track_width)
+
     def set_speed(self, direction, speed, unit_speed=MotorConstants.UNIT_SPEED_RPM):
         self.log("set_speed")
 
@@ -375,6 +644,16 @@ class RobotWrapper(RobotInterface):
         for res in self._resources.values():
             res.release()
 
+    def motor_group(self, *motors):
+        """Create a group of motors (given by their names or ids) that can be controlled at the same time"""
+        motor_ids = [self._motors.aliases[motor] if type(motor) is str else motor for motor in motors]
+
+        # take resources in a fixed order to avoid deadlocks between groups
+        resources = [self._resources[f'motor_{motor_id}'] for motor_id in sorted(set(motor_ids))]
+        group = MotorGroup([self._robot.motors[motor_id] for motor_id in motor_ids])
+
+        return MotorGroupWrapper(self._script, group, ResourceGroupWrapper(resources))
+
     def time(self):
         return self._robot.time
 
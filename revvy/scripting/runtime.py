@@ -1,9 +1,11 @@
 # SPDX-License-Identifier: GPL-3.0-only
 
 import time
+from threading import Lock
 from typing import NamedTuple
 
 from revvy.scripting.robot_interface import RobotWrapper
+from revvy.utils.latency import latency_tracer
 from revvy.utils.logger import get_logger
 from revvy.utils.thread_wrapper import ThreadContext, ThreadWrapper
 
@@ -29,6 +31,11 @@ class ScriptHandle:
         self._owner = owner
         self._globals = global_variables.copy()
         self._inputs = {}
+        self._input_lock = Lock()
+        self._accepts_updates = False  # True from the start of the script until its thread has stopped
+        self._rerun_pending = False
+        self._coalesced_updates = 0
+        self._trace = None
         self._runnable = script
         self.sleep = self._default_sleep
         self._thread = ThreadWrapper(self._run, f'ScriptThread: {name}')
@@ -51,6 +58,11 @@ class ScriptHandle:
     def is_running(self):
         return self._thread.is_running
 
+    @property
+    def coalesced_updates(self):
+        """Number of input updates that were merged into an already pending run"""
+        return self._coalesced_updates
+
     def assign(self, name, value):
         self._globals[name] = value
 
@@ -66,22 +78,83 @@ class ScriptHandle:
 
             self.sleep = ctx.sleep
             self.log("Starting script")
-            self._runnable(Control=ctx, ctx=ctx, time=TimeWrapper(ctx), **self._inputs)
+
+            # updates that arrive after the script returned are handled when the thread has stopped
+            self._thread.on_stopped(self._on_thread_stopped)
+
+            with self._input_lock:
+                self._accepts_updates = True
+                self._rerun_pending = False
+                inputs = self._inputs
+                trace = self._trace
+
+            while True:
+                latency_tracer.resume(trace)
+                latency_tracer.record('script_start')
+                self._runnable(Control=ctx, ctx=ctx, time=TimeWrapper(ctx), **inputs)
+
+                # run again if the inputs were updated while the script was running
+                with self._input_lock:
+                    if not self._rerun_pending or ctx.stop_requested:
+                        break
+                    self._rerun_pending = False
+                    inputs = self._inputs
+                    trace = self._trace
         except InterruptedError:
             self.log('Interrupted')
             raise
         finally:
+            with self._input_lock:
+                if ctx.stop_requested:
+                    # updates received before the stop request are dropped, like a start() call would be
+                    self._rerun_pending = False
+
             # restore to release reference on context
             self.log("Script finished")
             self.sleep = self._default_sleep
 
+    def _on_thread_stopped(self):
+        # called by the script thread, with the thread's internal lock held: don't call start() here
+        with self._input_lock:
+            restart = self._rerun_pending
+            self._rerun_pending = False
+            self._accepts_updates = restart
+
+        if restart:
+            self.log('Inputs updated while script was finishing, restarting')
+            # noinspection PyProtectedMember
+            self._thread._start()
+
     def start(self, **kwargs):
-        if not kwargs:
-            self._inputs = self._globals
-        else:
-            self._inputs = {**self._globals, **kwargs}
+        with self._input_lock:
+            # continue tracing the input that started the script, if any
+            self._trace = latency_tracer.current()
+            if not kwargs:
+                self._inputs = self._globals
+            else:
+                self._inputs = {**self._globals, **kwargs}
         return self._thread.start()
 
+    def start_or_update(self, **kwargs):
+        """
+        Start the script with the given inputs, or update the inputs if the script is already running
+
+        The running script keeps the inputs it was started with. When it returns, it is run once more with the
+        latest inputs, regardless of how many updates were received in the meantime.
+        If the script is being stopped, it is started again after it has stopped, like start() would.
+        """
+        with self._input_lock:
+            if self._accepts_updates and not self.is_stop_requested:
+                self._trace = latency_tracer.current()
+                self._inputs = {**self._inputs, **kwargs}
+
+                if self._rerun_pending:
+                    self._coalesced_updates += 1
+                self._rerun_pending = True
+                return
+
+        self.start(**kwargs)
+
 
 class ScriptManager:
     def __init__(self, robot):
@@ -128,6 +201,10 @@ class ScriptManager:
     def __getitem__(self, name):
         return self._scripts[name]
 
+    @property
+    def names(self):
+        return self._scripts.keys()
+
     def stop_all_scripts(self):
         for script in self._scripts.values():
             script.stop()
@@ -1,5 +1,6 @@
+import asyncio
 from enum import Enum
-from threading import Lock, Condition
+from threading import Lock, Condition, Event, Timer
 
 
 class AwaiterSignal(Enum):
@@ -31,8 +32,8 @@ class WaitableValue:
 
     def get(self):
         """Return the current value"""
-        with self._condition:
-            return self._value
+        # reading a single attribute is atomic, no need to lock
+        return self._value
 
     def wait(self, timeout=None):
         """Wait for a value to be set()"""
@@ -64,30 +65,193 @@ class Awaiter:
     def wait(self, timeout=None):
         raise NotImplementedError
 
+    @staticmethod
+    def all(awaiters) -> 'Awaiter':
+        """Create an awaiter that finishes when every awaiter has finished and is cancelled when any of them is
+
+        Cancelling the returned awaiter cancels every awaiter.
+        """
+        awaiters = list(awaiters)
+        combined = AwaiterImpl()
+        lock = Lock()
+        pending = [len(awaiters)]
+
+        def _finished():
+            with lock:
+                pending[0] -= 1
+                all_finished = pending[0] == 0
+
+            if all_finished:
+                combined.finish()
+
+        def _cancel_all():
+            for awaiter in awaiters:
+                awaiter.cancel()
+
+        combined.on_cancelled(_cancel_all)
+
+        if not awaiters:
+            combined.finish()
+
+        for awaiter in awaiters:
+            awaiter.on_result(_finished)
+            awaiter.on_cancelled(combined.cancel)
+
+        return combined
+
+    @staticmethod
+    def any(awaiters) -> 'Awaiter':
+        """Create an awaiter that finishes when any of the awaiters finishes and is cancelled when all of them are
+
+        The other awaiters are not cancelled when one of them finishes. Cancelling the returned awaiter cancels every
+        awaiter.
+        """
+        awaiters = list(awaiters)
+        combined = AwaiterImpl()
+        lock = Lock()
+        pending = [len(awaiters)]
+
+        def _cancelled():
+            with lock:
+                pending[0] -= 1
+                all_cancelled = pending[0] == 0
+
+            if all_cancelled:
+                combined.cancel()
+
+        def _cancel_all():
+            for awaiter in awaiters:
+                awaiter.cancel()
+
+        combined.on_cancelled(_cancel_all)
+
+        if not awaiters:
+            combined.cancel()
+
+        for awaiter in awaiters:
+            awaiter.on_result(combined.finish)
+            awaiter.on_cancelled(_cancelled)
+
+        return combined
+
+    def with_timeout(self, timeout) -> 'Awaiter':
+        """Cancel the awaiter if it does not finish in timeout seconds. Returns the awaiter itself"""
+        timer = Timer(timeout, self.cancel)
+        timer.daemon = True
+
+        self.on_result(timer.cancel)
+        self.on_cancelled(timer.cancel)
+        timer.start()
+
+        return self
+
+    def then(self, callback) -> 'Awaiter':
+        """
+        Call callback (without arguments) when the awaiter finishes
+
+        If callback returns an awaiter, the returned awaiter finishes when that one does. Cancellation is propagated
+        in both directions.
+        """
+        result = AwaiterImpl()
+
+        def _finished():
+            next_awaiter = callback()
+            if isinstance(next_awaiter, Awaiter):
+                result.on_cancelled(next_awaiter.cancel)
+                next_awaiter.on_result(result.finish)
+                next_awaiter.on_cancelled(result.cancel)
+            else:
+                result.finish()
+
+        result.on_cancelled(self.cancel)
+        self.on_cancelled(result.cancel)
+        self.on_result(_finished)
+
+        return result
+
+    def as_future(self, loop=None) -> asyncio.Future:
+        """Create an asyncio future that resolves to True when the awaiter finishes or is cancelled with it"""
+        if loop is None:
+            loop = asyncio.get_event_loop()
+        future = loop.create_future()
+
+        def _set_result():
+            if not future.done():
+                future.set_result(True)
+
+        def _cancel():
+            if not future.done():
+                future.cancel()
+
+        def _future_done(f):
+            if f.cancelled():
+                self.cancel()
+
+        future.add_done_callback(_future_done)
+        self.on_result(lambda: loop.call_soon_threadsafe(_set_result))
+        self.on_cancelled(lambda: loop.call_soon_threadsafe(_cancel))
+
+        return future
+
+    def __await__(self):
+        return self.as_future().__await__()
+
+    @staticmethod
+    def from_future(future) -> 'Awaiter':
+        """Create an awaiter from an asyncio or concurrent.futures future
+
+        The awaiter finishes when the future has a result and is cancelled when the future is cancelled or fails.
+        Cancelling the awaiter cancels the future.
+        """
+        awaiter = AwaiterImpl()
+
+        def _done(f):
+            if f.cancelled() or f.exception() is not None:
+                awaiter.cancel()
+            else:
+                awaiter.finish()
+
+        def _cancel_future():
+            if asyncio.isfuture(future):
+                # asyncio futures are not thread safe
+                future.get_loop().call_soon_threadsafe(future.cancel)
+            else:
+                future.cancel()
+
+        awaiter.on_cancelled(_cancel_future)
+        future.add_done_callback(_done)
+
+        return awaiter
+
 
 class AwaiterImpl(Awaiter):
+    """Awaiter that is finished or cancelled by calling finish() or cancel()
+
+    The state only changes once, so reading it and the calls after the state has changed don't need to lock.
+    The lock is only taken while the awaiter is pending, and the event used for waiting is only created when a thread
+    actually waits.
+    """
+
     @classmethod
     def from_state(cls, state):
         return cls(state)
 
     def __init__(self, initial_state=AwaiterSignal.NONE):
         self._lock = Lock()
-        self._signal = WaitableValue(initial_state)
+        self._state = initial_state
+        self._event = None
 
         self._cancellation_callbacks = []
         self._completion_callbacks = []
 
     def _add_callback(self, callbacks: list, callback, call_for_state: AwaiterSignal):
-        def _append_callback(current_state):
-            if current_state == AwaiterSignal.NONE:
-                callbacks.append(callback)
-                return False
-            elif current_state == call_for_state:
-                return True
-
-        call_immediately = self._signal.map(_append_callback)
+        if self._state == AwaiterSignal.NONE:
+            with self._lock:
+                if self._state == AwaiterSignal.NONE:
+                    callbacks.append(callback)
+                    return
 
-        if call_immediately:
+        if self._state == call_for_state:
             callback()
 
     def on_cancelled(self, callback):
@@ -96,20 +260,38 @@ class AwaiterImpl(Awaiter):
     def on_result(self, callback):
         self._add_callback(self._completion_callbacks, callback, AwaiterSignal.FINISHED)
 
+    def _set_state(self, state):
+        """Change the state if the awaiter is pending. Returns whether the state was changed"""
+        if self._state != AwaiterSignal.NONE:
+            return False
+
+        with self._lock:
+            if self._state != AwaiterSignal.NONE:
+                return False
+            self._state = state
+            event = self._event
+
+        if event:
+            event.set()
+
+        return True
+
     def cancel(self):
-        if self._signal.exchange_if(AwaiterSignal.NONE, AwaiterSignal.CANCEL) == AwaiterSignal.NONE:
+        if self._set_state(AwaiterSignal.CANCEL):
             for callback in self._cancellation_callbacks:
                 callback()
+            self._completion_callbacks.clear()
 
     def finish(self):
         """Mark the pending awaiter as finished."""
-        if self._signal.exchange_if(AwaiterSignal.NONE, AwaiterSignal.FINISHED) == AwaiterSignal.NONE:
+        if self._set_state(AwaiterSignal.FINISHED):
             for callback in self._completion_callbacks:
                 callback()
+            self._cancellation_callbacks.clear()
 
     @property
     def state(self):
-        return self._signal.get()
+        return self._state
 
     def wait(self, timeout=None):
         """
@@ -118,11 +300,15 @@ class AwaiterImpl(Awaiter):
         @param timeout:
         @return: True if the operation was finished by calling finish(), False if cancelled or timed out
         """
-        if self._signal.get() != AwaiterSignal.NONE:
+        if self._state != AwaiterSignal.NONE:
             return True
 
-        try:
-            self._signal.wait(timeout)
-            return self._signal.get() == AwaiterSignal.FINISHED
-        except TimeoutError:
-            return False
+        with self._lock:
+            if self._state != AwaiterSignal.NONE:
+                return True
+            if self._event is None:
+                self._event = Event()
+            event = self._event
+
+        event.wait(timeout)
+        return self._state == AwaiterSignal.FINISHED
@@ -2,6 +2,7 @@
 
 import os
 import json
+from contextlib import suppress
 from json import JSONDecodeError
 from typing import NamedTuple
 
@@ -25,6 +26,8 @@ class StorageInterface:
     def read_metadata(self, filename): raise NotImplementedError
     def write(self, filename, data, metadata=None, md5=None): raise NotImplementedError
     def read(self, filename): raise NotImplementedError
+    def names(self): raise NotImplementedError  # names of the stored files, least recently written first
+    def delete(self, filename): raise NotImplementedError
 
 
 class MemoryStorageItem(NamedTuple):
@@ -55,6 +58,8 @@ class MemoryStorage(StorageInterface):
         if metadata is None:
             metadata = {}
 
+        # keep the entries in the order of writing
+        self._entries.pop(name, None)
         self._entries[name] = MemoryStorageItem(md5, data, metadata)
 
     def read(self, name):
@@ -65,6 +70,12 @@ class MemoryStorage(StorageInterface):
             raise IntegrityError('Checksum')
         return data
 
+    def names(self):
+        return list(self._entries.keys())
+
+    def delete(self, name):
+        self._entries.pop(name, None)
+
 
 class FileStorage(StorageInterface):
     """
@@ -136,6 +147,21 @@ class FileStorage(StorageInterface):
         except JSONDecodeError as e:
             raise IntegrityError('Metadata') from e
 
+    def names(self):
+        def _mtime(name):
+            try:
+                return os.path.getmtime(self._storage_file(name))
+            except OSError:
+                return 0
+
+        names = [file[:-len('.meta')] for file in os.listdir(self._storage_dir) if file.endswith('.meta')]
+        return sorted(names, key=_mtime)
+
+    def delete(self, filename):
+        for path in (self._storage_file(filename), self._meta_file(filename)):
+            with suppress(FileNotFoundError):
+                os.remove(path)
+
 
 def create_unique_file(base_filename):
 
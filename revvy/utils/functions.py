@@ -189,14 +189,19 @@ def read_json(filename):
 
 
 def str_to_func(code):
-    """Take python code as string and create a callable functions
+    """Take python code as string (or a compiled code object) and create a callable functions
     The function arguments will be injected into the code as global variables
+    The source is compiled once, syntax errors are raised when the function is called
 
     >>> code='print(f"Called with {input}")'
     >>> func=str_to_func(code)
     >>> func(input='something')
     Called with something
     """
+    if type(code) is str:
+        with suppress(SyntaxError):
+            code = compile(code, '<script>', 'exec')
+
     def wrapper(**kwargs):
         exec(code, kwargs)
     return wrapper
@@ -0,0 +1,166 @@
+# SPDX-License-Identifier: GPL-3.0-only
+
+"""Measure the latency of handling remote controller input
+
+A trace is started when a message is received. The trace is passed along with the work it causes: it is stored as
+the current trace of the thread that is working on the message, and it is handed over to the threads that continue
+the work (e.g. a script that is started by a button press). Each stage records the time elapsed since the previous
+stage, and the end of the trace records the time elapsed since the message was received.
+"""
+
+import time
+from functools import wraps
+from threading import Lock, local
+from typing import NamedTuple
+
+
+class Trace(NamedTuple):
+    start: float  # time.monotonic() when the input was received
+    last: float  # time.monotonic() when the previous stage was recorded
+
+
+class LatencyHistogram:
+    """Counts latencies in buckets of increasing size
+
+    >>> h = LatencyHistogram()
+    >>> for latency in (0.0005, 0.003, 0.004, 2):
+    ...     h.record(latency)
+    >>> h.count, h.max
+    (4, 2)
+    >>> h.percentile(50)
+    0.005
+    >>> h.percentile(100) is None  # above the largest bucket
+    True
+    """
+
+    bucket_limits = (0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1)
+
+    def __init__(self):
+        self._buckets = [0] * (len(self.bucket_limits) + 1)
+        self._count = 0
+        self._total = 0
+        self._max = 0
+
+    @property
+    def count(self):
+        return self._count
+
+    @property
+    def mean(self):
+        return self._total / self._count if self._count else 0
+
+    @property
+    def max(self):
+        return self._max
+
+    @property
+    def buckets(self):
+        """Number of latencies in each bucket. The last bucket counts the latencies above the largest limit"""
+        return tuple(self._buckets)
+
+    def record(self, latency):
+        idx = 0
+        for limit in self.bucket_limits:
+            if latency <= limit:
+                break
+            idx += 1
+
+        self._buckets[idx] += 1
+        self._count += 1
+        self._total += latency
+        if latency > self._max:
+            self._max = latency
+
+    def percentile(self, p):
+        """Upper limit of the bucket that contains the p-th percentile, None if it is above the largest limit"""
+        threshold = self._count * p / 100
+        seen = 0
+        for limit, count in zip(self.bucket_limits, self._buckets):
+            seen += count
+            if seen >= threshold:
+                return limit
+        return None
+
+    def __str__(self):
+        def _ms(value):
+            return '>{:.0f}ms'.format(self.bucket_limits[-1] * 1000) if value is None else f'{value * 1000:.0f}ms'
+
+        return f'n={self._count} mean={self.mean * 1000:.1f}ms max={self._max * 1000:.1f}ms ' \
+               f'p50<={_ms(self.percentile(50))} p90<={_ms(self.percentile(90))} p99<={_ms(self.percentile(99))}'
+
+
+class LatencyTracer:
+    """Record the latency of the stages of handling an input. Does nothing unless enabled"""
+
+    def __init__(self, time_source=time.monotonic):
+        self.enabled = False
+        self._time = time_source
+        self._lock = Lock()
+        self._histograms = {}
+        self._local = local()
+
+    def timestamp(self):
+        """Time of receiving an input, None if tracing is disabled"""
+        return self._time() if self.enabled else None
+
+    def current(self):
+        """The trace of the current thread, None if the thread is not working on a traced input"""
+        return getattr(self._local, 'trace', None)
+
+    def begin(self, timestamp):
+        """Start working on an input that was received at the given time (None if the input is not traced)"""
+        self._local.trace = None if timestamp is None else Trace(timestamp, timestamp)
+
+    def resume(self, trace: Trace):
+        """Continue working on a trace in the current thread"""
+        self._local.trace = trace
+
+    def _record(self, name, latency):
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = LatencyHistogram()
+            histogram.record(latency)
+
+    def record(self, stage):
+        """Record the time since the previous stage of the current trace"""
+        trace = self.current()
+        if trace is not None:
+            now = self._time()
+            self._record(stage, now - trace.last)
+            self._local.trace = Trace(trace.start, now)
+
+    def finish(self, stage):
+        """Record the last stage and the end-to-end latency of the current trace, then stop tracing in this thread"""
+        trace = self.current()
+        if trace is not None:
+            now = self._time()
+            self._record(stage, now - trace.last)
+            self._record('end_to_end', now - trace.start)
+            self._local.trace = None
+
+    def trace_calls(self, obj, name, stage):
+        """Replace the method of obj so that calling it finishes the current trace"""
+        method = getattr(obj, name)
+
+        @wraps(method)
+        def _traced(*args, **kwargs):
+            self.finish(stage)
+            return method(*args, **kwargs)
+
+        setattr(obj, name, _traced)
+
+    @property
+    def histograms(self):
+        with self._lock:
+            return dict(self._histograms)
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+    def report(self):
+        return '\n'.join(f'{name}: {histogram}' for name, histogram in self.histograms.items())
+
+
+latency_tracer = LatencyTracer()
@@ -0,0 +1,66 @@
+# SPDX-License-Identifier: GPL-3.0-only
+
+from collections import OrderedDict
+from threading import Lock
+
+
+class LruCache:
+    """Dictionary-like cache that evicts the least recently used entry when full
+
+    >>> cache = LruCache(2)
+    >>> cache['a'] = 1
+    >>> cache['b'] = 2
+    >>> cache.get('a')
+    1
+    >>> cache['c'] = 3
+    >>> cache.get('b') is None
+    True
+    >>> cache.hits, cache.misses
+    (1, 1)
+    """
+
+    def __init__(self, max_size):
+        assert max_size > 0, 'Cache size must be positive'
+        self._max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = Lock()
+        self._hits = 0
+        self._misses = 0
+
+    @property
+    def hits(self):
+        return self._hits
+
+    @property
+    def misses(self):
+        return self._misses
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key, default=None):
+        """Return the cached value and mark it as recently used. Counts as a hit or a miss"""
+        with self._lock:
+            try:
+                value = self._entries[key]
+            except KeyError:
+                self._misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            if len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,148 @@
+# SPDX-License-Identifier: GPL-3.0-only
+
+import asyncio
+import unittest
+from concurrent.futures import Future
+from threading import Timer
+
+from mock import Mock
+
+from revvy.utils.awaiter import Awaiter, AwaiterImpl, AwaiterSignal
+
+
+class TestAwaiterCombinators(unittest.TestCase):
+    def test_all_finishes_when_every_awaiter_finished(self):
+        awaiters = [AwaiterImpl(), AwaiterImpl()]
+        combined = Awaiter.all(awaiters)
+
+        awaiters[0].finish()
+        self.assertEqual(AwaiterSignal.NONE, combined.state)
+
+        awaiters[1].finish()
+        self.assertEqual(AwaiterSignal.FINISHED, combined.state)
+
+    def test_all_is_cancelled_when_any_awaiter_is_cancelled(self):
+        awaiters = [AwaiterImpl(), AwaiterImpl()]
+        combined = Awaiter.all(awaiters)
+
+        awaiters[0].cancel()
+        self.assertEqual(AwaiterSignal.CANCEL, combined.state)
+        self.assertEqual(AwaiterSignal.CANCEL, awaiters[1].state)
+
+    def test_any_finishes_when_first_awaiter_finished(self):
+        awaiters = [AwaiterImpl(), AwaiterImpl()]
+        combined = Awaiter.any(awaiters)
+
+        awaiters[0].cancel()
+        self.assertEqual(AwaiterSignal.NONE, combined.state)
+
+        awaiters[1].finish()
+        self.assertEqual(AwaiterSignal.FINISHED, combined.state)
+
+        self.assertEqual(AwaiterSignal.CANCEL, Awaiter.any([]).state)
+        self.assertEqual(AwaiterSignal.FINISHED, Awaiter.all([]).state)
+
+    def test_with_timeout_cancels_awaiter(self):
+        awaiter = AwaiterImpl().with_timeout(0.01)
+
+        self.assertFalse(awaiter.wait(1))
+        self.assertEqual(AwaiterSignal.CANCEL, awaiter.state)
+
+    def test_then_chains_awaiters(self):
+        first = AwaiterImpl()
+        second = AwaiterImpl()
+        callback = Mock(return_value=second)
+
+        chained = first.then(callback)
+
+        first.finish()
+        self.assertEqual(1, callback.call_count)
+        self.assertEqual(AwaiterSignal.NONE, chained.state)
+
+        second.finish()
+        self.assertEqual(AwaiterSignal.FINISHED, chained.state)
+
+    def test_cancelling_chain_cancels_pending_awaiter(self):
+        first = AwaiterImpl()
+        callback = Mock()
+
+        chained = first.then(callback)
+        chained.cancel()
+
+        self.assertEqual(AwaiterSignal.CANCEL, first.state)
+        self.assertEqual(0, callback.call_count)
+
+
+class TestAwaiterFutures(unittest.TestCase):
+    def test_awaiter_can_be_awaited(self):
+        awaiter = AwaiterImpl()
+
+        async def _wait():
+            asyncio.get_event_loop().call_soon(awaiter.finish)
+            return await awaiter
+
+        loop = asyncio.new_event_loop()
+        try:
+            self.assertTrue(loop.run_until_complete(_wait()))
+        finally:
+            loop.close()
+
+    def test_cancelled_awaiter_cancels_future(self):
+        awaiter = AwaiterImpl()
+
+        loop = asyncio.new_event_loop()
+        try:
+            future = awaiter.as_future(loop)
+            awaiter.cancel()
+            self.assertRaises(asyncio.CancelledError, lambda: loop.run_until_complete(future))
+        finally:
+            loop.close()
+
+    def test_awaiter_from_future(self):
+        future = Future()
+        awaiter = Awaiter.from_future(future)
+
+        future.set_result(5)
+        self.assertEqual(AwaiterSignal.FINISHED, awaiter.state)
+
+        future = Future()
+        awaiter = Awaiter.from_future(future)
+        awaiter.cancel()
+        self.assertTrue(future.cancelled())
+
+
+class TestAwaiterImpl(unittest.TestCase):
+    def test_callbacks_are_called_once(self):
+        awaiter = AwaiterImpl()
+        finished = Mock()
+        cancelled = Mock()
+        awaiter.on_result(finished)
+        awaiter.on_cancelled(cancelled)
+
+        awaiter.finish()
+        awaiter.finish()
+        awaiter.cancel()
+
+        self.assertEqual(1, finished.call_count)
+        self.assertEqual(0, cancelled.call_count)
+
+        # registering after the state was set calls the matching callback immediately
+        late = Mock()
+        awaiter.on_result(late)
+        awaiter.on_cancelled(cancelled)
+        self.assertEqual(1, late.call_count)
+        self.assertEqual(0, cancelled.call_count)
+
+    def test_wait_is_woken_up_by_other_thread(self):
+        awaiter = AwaiterImpl()
+
+        timer = Timer(0.01, awaiter.finish)
+        timer.start()
+
+        self.assertTrue(awaiter.wait(2))
+        timer.join()
+
+        awaiter = AwaiterImpl()
+        self.assertFalse(awaiter.wait(0.01))
+        awaiter.cancel()
+        self.assertTrue(awaiter.wait())
@@ -0,0 +1,95 @@
+# SPDX-License-Identifier: GPL-3.0-only
+
+import unittest
+
+from mock import Mock
+
+from revvy.bluetooth.notification_throttle import NotificationThrottle
+
+
+def create_throttle(min_interval=0.05, min_delta=None):
+    send = Mock()
+    encode = Mock(side_effect=list)
+    time_source = Mock(return_value=0)
+
+    return NotificationThrottle(send, encode, min_interval, min_delta, time_source), send, encode, time_source
+
+
+class TestNotificationThrottle(unittest.TestCase):
+    def test_first_value_is_sent(self):
+        throttle, send, encode, time_source = create_throttle()
+
+        throttle.update((1, 2))
+
+        send.assert_called_once_with([1, 2])
+        self.assertEqual(1, throttle.sent)
+        self.assertEqual(0, throttle.suppressed)
+
+    def test_unchanged_value_is_not_encoded_or_sent(self):
+        throttle, send, encode, time_source = create_throttle()
+
+        throttle.update((1, 2))
+        time_source.return_value = 1
+        throttle.update((1, 2))
+
+        self.assertEqual(1, send.call_count)
+        self.assertEqual(1, encode.call_count)
+        self.assertEqual(1, throttle.suppressed)
+
+    def test_changes_below_threshold_are_suppressed(self):
+        throttle, send, encode, time_source = create_throttle(min_delta=(1, 10))
+
+        throttle.update((0, 0))
+        time_source.return_value = 1
+        throttle.update((0.5, 9))
+        self.assertEqual(1, send.call_count)
+
+        # compared to the last sent value, not the last received
+        time_source.return_value = 2
+        throttle.update((0.5, 10))
+        self.assertEqual(2, send.call_count)
+        send.assert_called_with([0.5, 10])
+
+    def test_latest_value_is_sent_after_interval(self):
+        throttle, send, encode, time_source = create_throttle(min_interval=0.05)
+
+        throttle.update((1,))
+        time_source.return_value = 0.01
+        throttle.update((2,))
+        throttle.update((3,))
+        throttle.flush()
+        self.assertEqual(1, send.call_count)
+
+        time_source.return_value = 0.05
+        throttle.flush()
+        self.assertEqual(2, send.call_count)
+        send.assert_called_with([3])
+        self.assertEqual(1, throttle.suppressed)
+
+        # nothing left to send
+        time_source.return_value = 1
+        throttle.flush()
+        self.assertEqual(2, send.call_count)
+
+    def test_pending_value_is_dropped_if_value_returns_to_sent_value(self):
+        throttle, send, encode, time_source = create_throttle()
+
+        throttle.update((1,))
+        time_source.return_value = 0.01
+        throttle.update((2,))
+        throttle.update((1,))
+
+        time_source.return_value = 1
+        throttle.flush()
+        self.assertEqual(1, send.call_count)
+        self.assertEqual(2, throttle.suppressed)
+
+    def test_reset_allows_sending_same_value(self):
+        throttle, send, encode, time_source = create_throttle()
+
+        throttle.update((1,))
+        throttle.reset()
+        time_source.return_value = 1
+        throttle.update((1,))
+
+        self.assertEqual(2, send.call_count)
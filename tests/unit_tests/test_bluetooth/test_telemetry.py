@@ -0,0 +1,78 @@
+# SPDX-License-Identifier: GPL-3.0-only
+
+import struct
+import unittest
+
+from mock import Mock
+
+from revvy.bluetooth.telemetry import encode_telemetry, telemetry_frame_size, TELEMETRY_VERSION, TELEMETRY_BATTERY, \
+    TELEMETRY_IMU, TELEMETRY_MOTORS, TELEMETRY_SENSORS
+from revvy.mcu.commands import BatteryStatus
+from revvy.robot.imu import ImuState, Vector3D
+
+all_sections = TELEMETRY_BATTERY | TELEMETRY_IMU | TELEMETRY_MOTORS | TELEMETRY_SENSORS
+
+
+def create_motor(speed, pos, power):
+    motor = Mock()
+    motor.speed = speed
+    motor.pos = pos
+    motor.power = power
+    return motor
+
+
+def create_sensor(raw_value):
+    sensor = Mock()
+    sensor.raw_value = raw_value
+    return sensor
+
+
+def create_robot():
+    robot = Mock()
+    robot.battery = BatteryStatus(chargerStatus=0, main=80, motor=90)
+    robot.imu.state = ImuState(Vector3D(10.4, -20, 1000), Vector3D(1.25, 0, -300), -45, 0, None)
+    robot.motors = [create_motor(i * 10.5, i * 100, i) for i in range(1, 7)]
+    robot.sensors = [create_sensor([1, 2]), create_sensor(0), create_sensor(bytes(range(20))), create_sensor([])]
+    return robot
+
+
+class TestTelemetry(unittest.TestCase):
+    def test_all_sections_are_included_if_they_fit(self):
+        frame = encode_telemetry(create_robot(), 512)
+
+        self.assertEqual(telemetry_frame_size(all_sections), len(frame))
+        self.assertEqual((TELEMETRY_VERSION, all_sections), struct.unpack_from('>BB', frame))
+
+        self.assertEqual((80, 90), struct.unpack_from('>BB', frame, 2))
+        self.assertEqual((10, -20, 1000, 12, 0, -3000, -45), struct.unpack_from('>3h3hl', frame, 4))
+
+        motors = struct.unpack_from('>' + 'flb' * 6, frame, 20)
+        self.assertEqual((10.5, 100, 1), motors[0:3])
+        self.assertEqual((63.0, 600, 6), motors[15:18])
+
+        sensors = struct.unpack_from('>' + 'B16s' * 4, frame, 74)
+        self.assertEqual((2, b'\x01\x02' + bytes(14)), sensors[0:2])
+        self.assertEqual((0, bytes(16)), sensors[2:4])
+        self.assertEqual((16, bytes(range(16))), sensors[4:6])
+        self.assertEqual((0, bytes(16)), sensors[6:8])
+
+    def test_sections_that_dont_fit_are_left_out(self):
+        frame = encode_telemetry(create_robot(), 20)
+
+        self.assertEqual(20, len(frame))
+        self.assertEqual((TELEMETRY_VERSION, TELEMETRY_BATTERY | TELEMETRY_IMU), struct.unpack_from('>BB', frame))
+
+        size = telemetry_frame_size(TELEMETRY_BATTERY | TELEMETRY_IMU | TELEMETRY_MOTORS)
+        frame = encode_telemetry(create_robot(), size + 10)
+        self.assertEqual(TELEMETRY_BATTERY | TELEMETRY_IMU | TELEMETRY_MOTORS, frame[1])
+        self.assertEqual(size, len(frame))
+
+    def test_missing_ports_are_padded(self):
+        robot = create_robot()
+        robot.motors = robot.motors[:2]
+
+        frame = encode_telemetry(robot, 512)
+
+        self.assertEqual(telemetry_frame_size(all_sections), len(frame))
+        motors = struct.unpack_from('>' + 'flb' * 6, frame, 20)
+        self.assertEqual((0, 0, 0), motors[6:9])
@@ -2,6 +2,7 @@
 
 import json
 import os
+import tempfile
 import unittest
 from mock.mock import patch, mock_open
 
@@ -41,6 +42,25 @@ class TestMemoryStorage(unittest.TestCase):
         storage.write('foo', b'data', md5='foobar')
         self.assertRaises(IntegrityError, lambda: storage.read('foo'))
 
+    def test_names_are_listed_in_order_of_writing(self):
+        storage = MemoryStorage()
+
+        storage.write('foo', b'data')
+        storage.write('bar', b'data')
+        storage.write('foo', b'new data')
+
+        self.assertListEqual(['bar', 'foo'], storage.names())
+
+    def test_deleted_item_can_not_be_read(self):
+        storage = MemoryStorage()
+
+        storage.write('foo', b'data')
+        storage.delete('foo')
+        storage.delete('bar')  # no error raised
+
+        self.assertListEqual([], storage.names())
+        self.assertRaises(StorageElementNotFoundError, lambda: storage.read('foo'))
+
 
 class TestFileStorage(unittest.TestCase):
     @patch('revvy.utils.file_storage.open', new_callable=mock_open)
@@ -101,3 +121,24 @@ class TestFileStorage(unittest.TestCase):
 
         meta = storage.read_metadata('file')
         self.assertDictEqual({'md5': 'md5', 'length': 4}, meta)
+
+    def test_names_are_listed_in_order_of_writing(self):
+        with tempfile.TemporaryDirectory() as directory:
+            storage = FileStorage(directory)
+
+            storage.write('foo', b'data')
+            storage.write('bar', b'data')
+            os.utime(os.path.join(directory, 'foo.data'), (0, 0))
+
+            self.assertListEqual(['foo', 'bar'], storage.names())
+
+    def test_deleted_item_can_not_be_read(self):
+        with tempfile.TemporaryDirectory() as directory:
+            storage = FileStorage(directory)
+
+            storage.write('foo', b'data')
+            storage.delete('foo')
+            storage.delete('bar')  # no error raised
+
+            self.assertListEqual([], storage.names())
+            self.assertRaises(StorageElementNotFoundError, lambda: storage.read('foo'))
@@ -0,0 +1,109 @@
+# SPDX-License-Identifier: GPL-3.0-only
+
+import unittest
+from threading import Thread
+
+from mock import Mock, patch
+
+from revvy.robot.remote_controller import RemoteControllerScheduler, RemoteControllerCommand
+from revvy.utils.latency import LatencyTracer, LatencyHistogram
+
+
+class TestLatencyHistogram(unittest.TestCase):
+    def test_latencies_are_counted_in_buckets(self):
+        h = LatencyHistogram()
+        h.record(0.001)
+        h.record(0.0011)
+        h.record(5)
+
+        self.assertEqual(3, h.count)
+        self.assertEqual(5, h.max)
+        self.assertEqual((1, 1, 0, 0, 0, 0, 0, 0, 0, 0, 1), h.buckets)
+
+    def test_empty_histogram(self):
+        h = LatencyHistogram()
+
+        self.assertEqual(0, h.mean)
+        self.assertEqual(0.001, h.percentile(50))
+
+
+class TestLatencyTracer(unittest.TestCase):
+    def test_nothing_is_recorded_without_trace(self):
+        tracer = LatencyTracer(Mock(return_value=1))
+
+        tracer.begin(None)
+        tracer.record('stage')
+        tracer.finish('end')
+
+        self.assertEqual({}, tracer.histograms)
+
+    def test_timestamp_is_none_when_disabled(self):
+        tracer = LatencyTracer(Mock(return_value=1))
+        self.assertIsNone(tracer.timestamp())
+
+        tracer.enabled = True
+        self.assertEqual(1, tracer.timestamp())
+
+    def test_stages_record_time_since_previous_stage(self):
+        time_source = Mock(return_value=0)
+        tracer = LatencyTracer(time_source)
+
+        tracer.begin(0)
+        time_source.return_value = 0.003
+        tracer.record('first')
+        time_source.return_value = 0.01
+        tracer.finish('second')
+
+        histograms = tracer.histograms
+        self.assertAlmostEqual(0.003, histograms['first'].max)
+        self.assertAlmostEqual(0.007, histograms['second'].max)
+        self.assertAlmostEqual(0.01, histograms['end_to_end'].max)
+
+        # trace is finished
+        self.assertIsNone(tracer.current())
+
+    def test_trace_can_be_continued_in_other_thread(self):
+        time_source = Mock(return_value=0)
+        tracer = LatencyTracer(time_source)
+
+        tracer.begin(0)
+        trace = tracer.current()
+
+        def _continue():
+            self.assertIsNone(tracer.current())
+            tracer.resume(trace)
+            time_source.return_value = 0.5
+            tracer.finish('other_thread')
+
+        thread = Thread(target=_continue)
+        thread.start()
+        thread.join()
+
+        self.assertEqual(1, tracer.histograms['end_to_end'].count)
+
+    def test_traced_call_finishes_trace(self):
+        tracer = LatencyTracer(Mock(return_value=0))
+        obj = Mock()
+        original = obj.send
+
+        tracer.trace_calls(obj, 'send', 'send')
+
+        tracer.begin(0)
+        obj.send(1, 2)
+        obj.send(3, 4)
+
+        self.assertEqual(2, original.call_count)
+        self.assertEqual(1, tracer.histograms['send'].count)
+
+
+class TestRemoteControllerTracing(unittest.TestCase):
+    def test_remote_controller_stages_are_recorded(self):
+        tracer = LatencyTracer(Mock(return_value=0))
+        controller = Mock()
+
+        with patch('revvy.robot.remote_controller.latency_tracer', tracer):
+            rcs = RemoteControllerScheduler(controller)
+            rcs._tick(RemoteControllerCommand(analog=[], buttons=0, timestamp=0))
+
+        self.assertEqual(1, controller.tick.call_count)
+        self.assertEqual({'remote_controller_wakeup', 'remote_controller_tick'}, set(tracer.histograms.keys()))
@@ -3,7 +3,7 @@
 import unittest
 from unittest.mock import Mock
 
-from revvy.robot.remote_controller import RemoteController, RemoteControllerCommand
+from revvy.robot.remote_controller import RemoteController, RemoteControllerCommand, RemoteControllerScheduler
 
 
 class TestRemoteController(unittest.TestCase):
@@ -16,12 +16,12 @@ class TestRemoteController(unittest.TestCase):
             mocks.append(mock)
 
         for i in range(32):
-            buttons = [False] * 32
+            buttons = 0
 
             rc.tick(RemoteControllerCommand(buttons=buttons, analog=[0] * 10))
 
             # ith button is pressed
-            buttons[i] = True
+            buttons |= 1 << i
             rc.tick(RemoteControllerCommand(buttons=buttons, analog=[0] * 10))
 
             # button is kept pressed
@@ -41,7 +41,7 @@ class TestRemoteController(unittest.TestCase):
         rc.on_analog_values([3], mock3)
         rc.on_analog_values([3, 11], mock_invalid)
 
-        rc.tick(RemoteControllerCommand(buttons=[False] * 32, analog=[255, 254, 253, 123, 43, 65, 45, 42]))
+        rc.tick(RemoteControllerCommand(buttons=0, analog=[255, 254, 253, 123, 43, 65, 45, 42]))
 
         self.assertEqual(mock24.call_count, 1)
         self.assertEqual(mock3.call_count, 1)
@@ -52,6 +52,109 @@ class TestRemoteController(unittest.TestCase):
         self.assertEqual(mock24.call_args[0][0], [253, 43])
         self.assertEqual(mock3.call_args[0][0], [123])
 
+    def test_only_actions_of_changed_channels_are_called(self):
+        rc = RemoteController()
+        mock01 = Mock()
+        mock2 = Mock()
+        mock12 = Mock()
+
+        rc.on_analog_values([0, 1], mock01)
+        rc.on_analog_values([2], mock2)
+        rc.on_analog_values([1, 2], mock12)
+
+        rc.tick(RemoteControllerCommand(buttons=0, analog=b'\x00\x00\x00\x00'))
+        self.assertEqual(1, mock01.call_count)
+        self.assertEqual(1, mock2.call_count)
+        self.assertEqual(1, mock12.call_count)
+
+        # same values
+        rc.tick(RemoteControllerCommand(buttons=0, analog=b'\x00\x00\x00\x00'))
+
+        # only channel 2 changes
+        rc.tick(RemoteControllerCommand(buttons=0, analog=b'\x00\x00\x05\x00'))
+        self.assertEqual(1, mock01.call_count)
+        self.assertEqual(2, mock2.call_count)
+        self.assertEqual(2, mock12.call_count)
+        self.assertEqual([0, 5], mock12.call_args[0][0])
+
+        # unused channel changes
+        rc.tick(RemoteControllerCommand(buttons=0, analog=b'\x00\x00\x05\x07'))
+        self.assertEqual(1, mock01.call_count)
+        self.assertEqual(2, mock2.call_count)
+        self.assertEqual(2, mock12.call_count)
+
+    def test_analog_actions_are_called_in_registration_order(self):
+        rc = RemoteController()
+        calls = []
+
+        rc.on_analog_values([3], lambda values: calls.append('first'))
+        rc.on_analog_values([0], lambda values: calls.append('second'))
+
+        rc.tick(RemoteControllerCommand(buttons=0, analog=[1, 1, 1, 1]))
+        self.assertListEqual(['first', 'second'], calls)
+
+    def test_buttons_held_at_connection_are_not_pressed(self):
+        rc = RemoteController()
+        mock = Mock()
+        rc.on_button_pressed(3, mock)
+
+        rc.tick(RemoteControllerCommand(buttons=0b1000, analog=[0] * 10))
+        self.assertEqual(0, mock.call_count)
+
+        rc.tick(RemoteControllerCommand(buttons=0, analog=[0] * 10))
+        rc.tick(RemoteControllerCommand(buttons=0b1000, analog=[0] * 10))
+        self.assertEqual(1, mock.call_count)
+
+    def test_simultaneous_presses_call_every_action(self):
+        rc = RemoteController()
+        mocks = [Mock() for _ in range(32)]
+        for i, mock in enumerate(mocks):
+            rc.on_button_pressed(i, mock)
+
+        rc.tick(RemoteControllerCommand(buttons=0, analog=[0] * 10))
+        rc.tick(RemoteControllerCommand(buttons=0x80000005, analog=[0] * 10))
+
+        self.assertListEqual([0, 2, 31], [i for i, mock in enumerate(mocks) if mock.call_count == 1])
+
+    def test_removed_button_action_is_not_called(self):
+        rc = RemoteController()
+        mock = Mock()
+        rc.on_button_pressed(1, mock)
+        rc.on_button_pressed(1, None)
+
+        rc.tick(RemoteControllerCommand(buttons=0, analog=[0] * 10))
+        rc.tick(RemoteControllerCommand(buttons=0b10, analog=[0] * 10))
+        self.assertEqual(0, mock.call_count)
+
     def test_error_raised_for_invalid_button(self):
         rc = RemoteController()
         self.assertRaises(IndexError, lambda: rc.on_button_pressed(32, lambda: None))
+
+
+class TestRemoteControllerScheduler(unittest.TestCase):
+    def test_unprocessed_messages_are_replaced_by_newer_ones(self):
+        ctx = Mock()
+        ctx.stop_requested = False
+
+        rcs = RemoteControllerScheduler(Mock())
+
+        first = RemoteControllerCommand(analog=[1], buttons=0)
+        second = RemoteControllerCommand(analog=[2], buttons=0)
+        rcs.data_ready(first)
+        rcs.data_ready(second)
+
+        self.assertIs(second, rcs._wait_for_message(ctx, 0))
+        self.assertEqual(2, rcs.received_messages)
+        self.assertEqual(1, rcs.dropped_messages)
+
+        # mailbox is empty
+        self.assertIsNone(rcs._wait_for_message(ctx, 0))
+
+    def test_no_message_is_returned_when_stopping(self):
+        ctx = Mock()
+        ctx.stop_requested = True
+
+        rcs = RemoteControllerScheduler(Mock())
+        rcs.data_ready(RemoteControllerCommand(analog=[1], buttons=0))
+
+        self.assertIsNone(rcs._wait_for_message(ctx, 0))
@@ -0,0 +1,98 @@
+# SPDX-License-Identifier: GPL-3.0-only
+
+import unittest
+
+from mock import Mock, MagicMock
+
+from revvy.revvy_utils import RobotBLEController
+from revvy.robot.configurations import Motors, Sensors
+from revvy.robot.ports.motor import create_motor_port_handler
+from revvy.robot.ports.sensor import create_sensor_port_handler
+from revvy.robot.ports.sensors.filters import MedianFilter
+from revvy.robot.status import RobotStatus
+from revvy.robot_config import RobotConfig
+
+
+def create_robot():
+    mock_control = Mock()
+    mock_control.get_motor_port_amount = Mock(return_value=6)
+    mock_control.get_motor_port_types = Mock(return_value={"NotConfigured": 0, "DcMotor": 1})
+    mock_control.get_sensor_port_amount = Mock(return_value=4)
+    mock_control.get_sensor_port_types = Mock(return_value={"NotConfigured": 0, "BumperSwitch": 1, "HC_SR04": 2})
+
+    robot = Mock()
+    robot.motors = create_motor_port_handler(mock_control)
+    robot.sensors = create_sensor_port_handler(mock_control)
+    robot.drivetrain.motors = []
+    robot.status.robot_status = RobotStatus.NotConfigured
+
+    return robot
+
+
+def create_config():
+    config = RobotConfig()
+    config.motors[1] = Motors.RevvyMotor
+    config.sensors[1] = Sensors.Ultrasonic
+
+    return config
+
+
+class TestRobotBLEControllerConfiguration(unittest.TestCase):
+    def setUp(self):
+        self.robot = create_robot()
+        self.controller = RobotBLEController(self.robot, '0.0.0', MagicMock())
+
+    def tearDown(self):
+        self.controller.stop()
+
+    def test_first_configuration_resets_the_robot(self):
+        self.controller._configure(create_config())
+
+        self.assertEqual(1, self.robot.reset.call_count)
+        self.assertEqual('HC_SR04', self.robot.sensors[1].driver)
+
+    def test_same_configuration_does_not_reconfigure_ports(self):
+        self.controller._configure(create_config())
+        driver = self.robot.sensors[1]._driver
+
+        self.controller._configure(create_config())
+
+        self.assertEqual(1, self.robot.reset.call_count)
+        self.assertIs(driver, self.robot.sensors[1]._driver)
+
+    def test_port_reconfigured_by_script_is_configured_again(self):
+        self.controller._configure(create_config())
+
+        # a script changes the port configuration
+        self.robot.sensors[1].configure(Sensors.BumperSwitch)
+        self.assertEqual('BumperSwitch', self.robot.sensors[1].driver)
+
+        self.controller._configure(create_config())
+
+        self.assertEqual('HC_SR04', self.robot.sensors[1].driver)
+
+    def test_state_of_unchanged_ports_is_reset(self):
+        self.controller._configure(create_config())
+
+        motor = self.robot.motors[1]
+        sensor = self.robot.sensors[1]
+        motor.pos = 100
+        sensor.set_filter(MedianFilter(3))
+
+        self.controller._configure(create_config())
+
+        self.assertEqual(0, motor.pos)
+        self.assertIsNone(sensor._filter)
+
+    def test_configuration_is_applied_from_scratch_after_mcu_reset_during_configuration(self):
+        self.controller._configure(create_config())
+
+        # the MCU resets while the next configuration is applied
+        self.robot.reset_state.side_effect = self.controller._on_mcu_reset
+        self.controller._configure(create_config())
+        self.robot.reset_state.side_effect = None
+
+        self.assertEqual(1, self.robot.reset.call_count)
+
+        self.controller._configure(create_config())
+        self.assertEqual(2, self.robot.reset.call_count)
@@ -0,0 +1,97 @@
+# SPDX-License-Identifier: GPL-3.0-only
+
+import struct
+import unittest
+
+from mock import Mock
+
+from revvy.robot.configurations import Motors
+from revvy.robot.drivetrain import DifferentialDrivetrain
+from revvy.robot.ports.motor import create_motor_port_handler
+from revvy.robot.ports.motors.dc_motor import MotorConstants
+from revvy.utils.awaiter import AwaiterSignal
+
+
+def create_drivetrain():
+    mock_control = Mock()
+    mock_control.get_motor_port_amount = Mock(return_value=6)
+    mock_control.get_motor_port_types = Mock(return_value={"NotConfigured": 0, "DcMotor": 1})
+
+    ports = create_motor_port_handler(mock_control)
+    ports[1].configure(Motors.RevvyMotor)
+    ports[2].configure(Motors.RevvyMotor)
+
+    imu = Mock()
+    imu.yaw_angle = 0
+
+    drivetrain = DifferentialDrivetrain(mock_control, imu)
+    drivetrain.add_left_motor(ports[1])
+    drivetrain.add_right_motor(ports[2])
+
+    mock_control.set_motor_port_control_value.reset_mock()
+
+    return mock_control, ports, drivetrain
+
+
+def motor_status(status, pos=0):
+    return struct.pack('<bblf', status, 0, pos, 0)
+
+
+def drive_one_rotation(drivetrain):
+    return drivetrain.drive(MotorConstants.DIRECTION_FWD, 1, MotorConstants.UNIT_ROT,
+                            50, MotorConstants.UNIT_SPEED_RPM)
+
+
+class TestDifferentialDrivetrain(unittest.TestCase):
+    def test_move_finishes_when_every_motor_has_reached_its_goal(self):
+        control, ports, drivetrain = create_drivetrain()
+
+        awaiter = drive_one_rotation(drivetrain)
+        self.assertEqual(1, control.set_motor_port_control_value.call_count)
+
+        ports[1].update_status(motor_status(2, 360))
+        self.assertEqual(AwaiterSignal.NONE, awaiter.state)
+
+        ports[2].update_status(motor_status(2, 360))
+        self.assertEqual(AwaiterSignal.FINISHED, awaiter.state)
+
+    def test_move_is_not_aborted_when_a_single_motor_is_blocked_briefly(self):
+        control, ports, drivetrain = create_drivetrain()
+
+        awaiter = drive_one_rotation(drivetrain)
+
+        ports[1].update_status(motor_status(1, 100))
+        ports[2].update_status(motor_status(0, 100))
+        self.assertEqual(AwaiterSignal.NONE, awaiter.state)
+
+        ports[1].update_status(motor_status(2, 360))
+        ports[2].update_status(motor_status(2, 360))
+        self.assertEqual(AwaiterSignal.FINISHED, awaiter.state)
+
+        # only the move command and the release command after finishing were sent
+        self.assertEqual(2, control.set_motor_port_control_value.call_count)
+
+    def test_move_is_aborted_when_every_motor_is_blocked(self):
+        control, ports, drivetrain = create_drivetrain()
+
+        awaiter = drive_one_rotation(drivetrain)
+        control.set_motor_port_control_value.reset_mock()
+
+        ports[1].update_status(motor_status(1, 100))
+        ports[2].update_status(motor_status(1, 100))
+        self.assertEqual(AwaiterSignal.CANCEL, awaiter.state)
+
+        # motors are stopped with a single command
+        control.set_motor_port_control_value.assert_called_once_with(
+            bytes([*ports[1].create_set_power_command(0), *ports[2].create_set_power_command(0)]))
+
+    def test_cancelling_the_move_stops_every_motor_with_a_single_command(self):
+        control, ports, drivetrain = create_drivetrain()
+
+        awaiter = drive_one_rotation(drivetrain)
+        control.set_motor_port_control_value.reset_mock()
+
+        awaiter.cancel()
+
+        control.set_motor_port_control_value.assert_called_once_with(
+            bytes([*ports[1].create_set_power_command(0), *ports[2].create_set_power_command(0)]))
@@ -0,0 +1,140 @@
+# SPDX-License-Identifier: GPL-3.0-only
+
+import struct
+import time
+import unittest
+
+from mock import Mock, patch
+
+from revvy.robot.configurations import Motors
+from revvy.robot.drivetrain import DifferentialDrivetrain
+from revvy.robot.heading_control import PidController, HeadingController
+from revvy.robot.imu import IMU
+from revvy.robot.ports.motor import create_motor_port_handler
+from revvy.robot.ports.motors.dc_motor import MotorConstants
+from revvy.utils.awaiter import AwaiterSignal
+
+
+def yaw_data(yaw):
+    return struct.pack('<ll', yaw, yaw)
+
+
+def create_drivetrain():
+    mock_control = Mock()
+    mock_control.get_motor_port_amount = Mock(return_value=6)
+    mock_control.get_motor_port_types = Mock(return_value={"NotConfigured": 0, "DcMotor": 1})
+
+    ports = create_motor_port_handler(mock_control)
+    ports[1].configure(Motors.RevvyMotor)
+    ports[2].configure(Motors.RevvyMotor)
+
+    imu = IMU()
+    drivetrain = DifferentialDrivetrain(mock_control, imu)
+    drivetrain.add_left_motor(ports[1])
+    drivetrain.add_right_motor(ports[2])
+
+    mock_control.set_motor_port_control_value.reset_mock()
+
+    return mock_control, imu, drivetrain
+
+
+class TestPidController(unittest.TestCase):
+    def test_integral_does_not_wind_up_while_saturated(self):
+        pid = PidController(kp=1, ki=1, output_limit=10)
+
+        for _ in range(10):
+            self.assertEqual(10, pid.update(50, dt=0.1))
+
+        self.assertEqual(0, pid.integral)
+        self.assertEqual(-10, pid.update(-50, dt=0.1))
+
+    def test_rate_is_used_as_derivative(self):
+        pid = PidController(kp=0, kd=1)
+
+        self.assertEqual(-20, pid.update(10, dt=0.1, rate=20))
+        self.assertEqual(0, pid.update(10, dt=0.1))
+
+    def test_heading_controller_uses_sample_timestamps(self):
+        controller = HeadingController(90, kp=0, ki=1, kd=0)
+
+        controller.update(0, 0, timestamp=10)
+        self.assertEqual(90, controller.error)
+        self.assertAlmostEqual(45, controller.update(0, 0, timestamp=10.5))
+
+
+class TestTurnController(unittest.TestCase):
+    def test_turn_is_driven_by_yaw_samples(self):
+        control, imu, drivetrain = create_drivetrain()
+
+        awaiter = drivetrain.turn(MotorConstants.DIRECTION_LEFT, 90, MotorConstants.UNIT_TURN_ANGLE, 50,
+                                  MotorConstants.UNIT_SPEED_RPM)
+        self.assertEqual(1, control.set_motor_port_control_value.call_count)
+
+        imu.update_yaw_angles(yaw_data(45))
+        self.assertEqual(2, control.set_motor_port_control_value.call_count)
+
+        imu.update_yaw_angles(yaw_data(90))
+        self.assertEqual(AwaiterSignal.FINISHED, awaiter.state)
+
+        # controller no longer listens to the IMU
+        calls = control.set_motor_port_control_value.call_count
+        imu.update_yaw_angles(yaw_data(0))
+        self.assertEqual(calls, control.set_motor_port_control_value.call_count)
+
+    def test_small_corrections_are_not_sent(self):
+        control, imu, drivetrain = create_drivetrain()
+
+        drivetrain.turn(MotorConstants.DIRECTION_LEFT, 90, MotorConstants.UNIT_TURN_ANGLE, 50,
+                        MotorConstants.UNIT_SPEED_RPM)
+        imu.update_yaw_angles(yaw_data(1))
+
+        # output is still saturated
+        self.assertEqual(1, control.set_motor_port_control_value.call_count)
+
+
+class TestHeadingHold(unittest.TestCase):
+    def test_speeds_are_corrected_towards_initial_heading(self):
+        control, imu, drivetrain = create_drivetrain()
+
+        drivetrain.drive(MotorConstants.DIRECTION_FWD, 1, MotorConstants.UNIT_SEC, 40, MotorConstants.UNIT_SPEED_RPM,
+                         hold_heading=True)
+        self.assertEqual(1, control.set_motor_port_control_value.call_count)
+
+        # robot turned right (CW), right side needs to be faster
+        with patch('time.monotonic', return_value=time.monotonic() + 1):
+            imu.update_yaw_angles(yaw_data(-10))
+
+        command = control.set_motor_port_control_value.call_args[0][0]
+        left_speed, = struct.unpack('<f', command[2:6])
+        right_speed, = struct.unpack('<f', command[8:12])
+        self.assertLess(left_speed, 40)
+        self.assertGreater(right_speed, 40)
+
+        drivetrain.stop_release()
+
+    def test_corrections_are_rate_limited(self):
+        control, imu, drivetrain = create_drivetrain()
+
+        drivetrain.drive(MotorConstants.DIRECTION_FWD, 1, MotorConstants.UNIT_SEC, 40, MotorConstants.UNIT_SPEED_RPM,
+                         hold_heading=True)
+
+        for yaw in range(10):
+            imu.update_yaw_angles(yaw_data(yaw))
+
+        self.assertEqual(1, control.set_motor_port_control_value.call_count)
+
+        drivetrain.stop_release()
+
+    def test_drive_stops_after_distance(self):
+        control, imu, drivetrain = create_drivetrain()
+
+        awaiter = drivetrain.drive(MotorConstants.DIRECTION_FWD, 1, MotorConstants.UNIT_ROT, 40,
+                                   MotorConstants.UNIT_SPEED_RPM, hold_heading=True)
+
+        for port in drivetrain.motors:
+            port.update_status(struct.pack('<bblf', 0, 0, 200, 40))
+        self.assertEqual(AwaiterSignal.NONE, awaiter.state)
+
+        for port in drivetrain.motors:
+            port.update_status(struct.pack('<bblf', 0, 0, 360, 40))
+        self.assertEqual(AwaiterSignal.FINISHED, awaiter.state)
@@ -0,0 +1,158 @@
+# SPDX-License-Identifier: GPL-3.0-only
+
+import struct
+import unittest
+
+from mock import Mock
+
+from revvy.robot.configurations import Motors
+from revvy.robot.motor_group import MotorGroup
+from revvy.robot.ports.motor import create_motor_port_handler
+from revvy.robot.trajectory import MotionProfile
+from revvy.utils.awaiter import AwaiterSignal
+
+
+def create_motors(*configs):
+    mock_control = Mock()
+    mock_control.get_motor_port_amount = Mock(return_value=6)
+    mock_control.get_motor_port_types = Mock(return_value={"NotConfigured": 0, "DcMotor": 1})
+
+    ports = create_motor_port_handler(mock_control)
+    for port, config in zip(ports, configs):
+        port.configure(config)
+
+    mock_control.set_motor_port_control_value.reset_mock()
+
+    return mock_control, ports
+
+
+def motor_status(status, pos=0):
+    return struct.pack('<bblf', status, 0, pos, 0)
+
+
+class TestMotorGroup(unittest.TestCase):
+    def test_commands_are_sent_in_a_single_frame(self):
+        control, ports = create_motors(Motors.RevvyMotor, Motors.RevvyMotor, Motors.RevvyMotor)
+
+        group = MotorGroup([ports[1], ports[3]])
+        group.set_power(20)
+
+        self.assertEqual(1, control.set_motor_port_control_value.call_count)
+        self.assertEqual(bytes([*ports[1].create_set_power_command(20), *ports[3].create_set_power_command(20)]),
+                         control.set_motor_port_control_value.call_args[0][0])
+
+    def test_values_can_be_given_per_motor(self):
+        control, ports = create_motors(Motors.RevvyMotor, Motors.RevvyMotor)
+
+        group = MotorGroup([ports[2], ports[1]])
+        group.set_speed([10, -10])
+
+        self.assertEqual(bytes([*ports[2].create_set_speed_command(10), *ports[1].create_set_speed_command(-10)]),
+                         control.set_motor_port_control_value.call_args[0][0])
+
+        self.assertRaises(ValueError, lambda: group.set_speed([10, 20, 30]))
+
+    def test_not_configured_motors_are_skipped(self):
+        control, ports = create_motors(Motors.RevvyMotor, None)
+
+        group = MotorGroup([ports[1], ports[2]])
+        group.set_power(20)
+        self.assertEqual(bytes(ports[1].create_set_power_command(20)),
+                         control.set_motor_port_control_value.call_args[0][0])
+
+        group = MotorGroup([ports[2]])
+        group.set_power(20)
+        self.assertEqual(1, control.set_motor_port_control_value.call_count)
+
+    def test_position_awaiter_finishes_when_every_motor_has_reached_its_goal(self):
+        control, ports = create_motors(Motors.RevvyMotor, Motors.RevvyMotor)
+
+        group = MotorGroup([ports[1], ports[2]])
+        awaiter = group.set_position(100, pos_type='relative')
+
+        self.assertEqual(1, control.set_motor_port_control_value.call_count)
+
+        ports[1].update_status(motor_status(2, 100))
+        self.assertEqual(AwaiterSignal.NONE, awaiter.state)
+
+        ports[2].update_status(motor_status(2, 100))
+        self.assertEqual(AwaiterSignal.FINISHED, awaiter.state)
+
+    def test_position_awaiter_is_cancelled_when_a_motor_is_blocked(self):
+        control, ports = create_motors(Motors.RevvyMotor, Motors.RevvyMotor)
+
+        group = MotorGroup([ports[1], ports[2]])
+        awaiter = group.set_position(100, pos_type='relative')
+
+        ports[1].update_status(motor_status(1))
+        self.assertEqual(AwaiterSignal.CANCEL, awaiter.state)
+
+
+def create_profile():
+    return MotionProfile.trapezoidal(360, 60, 100)
+
+
+class TestMotorGroupFollow(unittest.TestCase):
+    def test_other_command_cancels_the_movement(self):
+        control, ports = create_motors(Motors.RevvyMotor, Motors.RevvyMotor)
+
+        group = MotorGroup([ports[1], ports[2]])
+        awaiter = group.follow(create_profile())
+        control.set_motor_port_control_value.reset_mock()
+
+        group.set_speed(10)
+
+        self.assertEqual(AwaiterSignal.CANCEL, awaiter.state)
+        # only the new command is sent
+        control.set_motor_port_control_value.assert_called_once_with(
+            bytes([*ports[1].create_set_speed_command(10), *ports[2].create_set_speed_command(10)]))
+
+        # status updates no longer drive the movement
+        ports[1].update_status(motor_status(0))
+        self.assertEqual(1, control.set_motor_port_control_value.call_count)
+        self.assertEqual(0, len(ports[1].on_status_changed))
+
+    def test_new_movement_cancels_the_previous_one(self):
+        control, ports = create_motors(Motors.RevvyMotor, Motors.RevvyMotor)
+
+        group = MotorGroup([ports[1], ports[2]])
+        first = group.follow(create_profile())
+        second = group.follow(create_profile())
+
+        self.assertEqual(AwaiterSignal.CANCEL, first.state)
+        self.assertEqual(AwaiterSignal.NONE, second.state)
+        self.assertEqual(1, len(ports[1].on_status_changed))
+
+    def test_cancelling_the_movement_stops_the_motors(self):
+        control, ports = create_motors(Motors.RevvyMotor, Motors.RevvyMotor)
+
+        group = MotorGroup([ports[1], ports[2]])
+        awaiter = group.follow(create_profile())
+        control.set_motor_port_control_value.reset_mock()
+
+        awaiter.cancel()
+
+        control.set_motor_port_control_value.assert_called_once_with(
+            bytes([*ports[1].create_set_power_command(0), *ports[2].create_set_power_command(0)]))
+
+    def test_reconfiguring_the_lead_motor_cancels_the_movement(self):
+        control, ports = create_motors(Motors.RevvyMotor, Motors.RevvyMotor)
+
+        group = MotorGroup([ports[1], ports[2]])
+        awaiter = group.follow(create_profile())
+
+        ports[1].configure(None)
+
+        self.assertEqual(AwaiterSignal.CANCEL, awaiter.state)
+        self.assertEqual(0, len(ports[1].on_config_changed))
+
+    def test_not_configured_motors_are_skipped(self):
+        control, ports = create_motors(None, Motors.RevvyMotor)
+
+        group = MotorGroup([ports[1], ports[2]])
+        awaiter = group.follow([create_profile(), create_profile()])
+        self.assertEqual(AwaiterSignal.NONE, awaiter.state)
+        self.assertEqual(1, len(ports[2].on_status_changed))
+
+        group = MotorGroup([ports[1]])
+        self.assertEqual(AwaiterSignal.CANCEL, group.follow(create_profile()).state)
@@ -0,0 +1,83 @@
+# SPDX-License-Identifier: GPL-3.0-only
+
+import unittest
+
+from revvy.robot.odometry import DifferentialOdometry, PoseHistory
+
+
+class TestPoseHistory(unittest.TestCase):
+    def test_oldest_entries_are_overwritten(self):
+        history = PoseHistory(3)
+        for i in range(5):
+            history.append(i, 0, 0, i)
+
+        self.assertEqual(3, len(history))
+        self.assertEqual([2, 3, 4], [pose.x for pose in history])
+        self.assertEqual(4, history[-1].timestamp)
+        self.assertRaises(IndexError, lambda: history[3])
+
+    def test_clear(self):
+        history = PoseHistory(3)
+        history.append(1, 2, 3, 4)
+        history.clear()
+
+        self.assertEqual(0, len(history))
+        self.assertEqual([], list(history))
+
+
+class TestDifferentialOdometry(unittest.TestCase):
+    def test_driving_straight(self):
+        odometry = DifferentialOdometry(wheel_diameter=2, time_source=lambda: 1)
+
+        odometry.update(100, 100, yaw=0)
+        odometry.update(460, 460, yaw=0)
+
+        # one wheel rotation with a diameter of 2
+        self.assertAlmostEqual(6.2832, odometry.pose.x, places=4)
+        self.assertAlmostEqual(0, odometry.pose.y)
+        self.assertEqual(0, odometry.pose.heading)
+
+    def test_heading_follows_imu_relative_to_start(self):
+        odometry = DifferentialOdometry()
+
+        odometry.update(0, 0, yaw=30)
+        odometry.update(360, 360, yaw=120)
+
+        self.assertEqual(90, odometry.pose.heading)
+        # moved one rotation along the 45 degree average heading
+        self.assertAlmostEqual(0.7071, odometry.pose.x, places=4)
+        self.assertAlmostEqual(0.7071, odometry.pose.y, places=4)
+
+    def test_heading_from_wheels_without_imu(self):
+        odometry = DifferentialOdometry(wheel_diameter=1, track_width=1)
+
+        odometry.update(0, 0)
+        # turn in place by 90 degrees: each wheel travels a quarter of the turning circle
+        odometry.update(-90, 90)
+
+        self.assertAlmostEqual(90, odometry.pose.heading, places=4)
+        self.assertAlmostEqual(0, odometry.pose.x)
+
+    def test_resync_keeps_pose(self):
+        odometry = DifferentialOdometry()
+
+        odometry.update(0, 0, yaw=0)
+        odometry.update(360, 360, yaw=0)
+        odometry.resync()
+
+        # positions jump when motors are reconfigured, which is not movement
+        odometry.update(1000, 1000, yaw=50)
+        self.assertAlmostEqual(1, odometry.pose.x)
+        self.assertEqual(0, odometry.pose.heading)
+
+        odometry.reset()
+        self.assertEqual((0, 0, 0), odometry.pose[0:3])
+
+    def test_unchanged_updates_are_not_recorded(self):
+        odometry = DifferentialOdometry()
+
+        odometry.update(0, 0, yaw=0)
+        odometry.update(0, 0, yaw=0)
+        odometry.update(10, 10, yaw=0)
+
+        self.assertEqual(2, len(odometry.history))
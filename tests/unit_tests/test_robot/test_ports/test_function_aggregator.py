@@ -0,0 +1,70 @@
+# SPDX-License-Identifier: GPL-3.0-only
+
+import unittest
+
+from mock import Mock
+
+from revvy.robot.ports.common import FunctionAggregator
+
+
+class TestFunctionAggregator(unittest.TestCase):
+    def test_functions_are_called_with_arguments(self):
+        aggregator = FunctionAggregator()
+        first = Mock()
+        second = Mock()
+
+        aggregator.add(first)
+        aggregator.add(second)
+        aggregator(1, a=2)
+
+        first.assert_called_once_with(1, a=2)
+        second.assert_called_once_with(1, a=2)
+
+        aggregator.remove(first)
+        aggregator.remove(first)
+        aggregator()
+        self.assertEqual(1, first.call_count)
+        self.assertEqual(2, second.call_count)
+
+        aggregator.clear()
+        self.assertEqual(0, len(aggregator))
+
+    def test_functions_can_be_removed_while_called(self):
+        aggregator = FunctionAggregator()
+        called = []
+
+        def _remove_self():
+            called.append('first')
+            aggregator.remove(_remove_self)
+
+        def _second():
+            called.append('second')
+
+        aggregator.add(_remove_self)
+        aggregator.add(_second)
+
+        aggregator()
+        aggregator()
+
+        # removing a function does not skip the next one in the same call
+        self.assertEqual(['first', 'second', 'second'], called)
+
+    def test_timing(self):
+        aggregator = FunctionAggregator()
+
+        def callback():
+            pass
+
+        aggregator.add(callback)
+        aggregator()
+        self.assertEqual({}, aggregator.timings)
+
+        aggregator.enable_timing()
+        aggregator()
+        aggregator()
+
+        timings = aggregator.timings
+        self.assertEqual(1, len(timings))
+        timing = timings[callback.__qualname__]
+        self.assertEqual(2, timing.calls)
+        self.assertGreaterEqual(timing.total, timing.max)
@@ -1,13 +1,15 @@
 # SPDX-License-Identifier: GPL-3.0-only
 
+import struct
 import unittest
 from unittest.mock import call
 
 from mock import Mock
 
+from revvy.robot.configurations import Motors
 from revvy.robot.ports.common import PortInstance, PortDriver
 from revvy.robot.ports.motor import create_motor_port_handler
-from revvy.robot.ports.motors.dc_motor import DcMotorController
+from revvy.robot.ports.motors.dc_motor import DcMotorController, MotorStatus
 
 
 class TestDriver(PortDriver):
@@ -61,6 +63,74 @@ class TestMotorPortHandler(unittest.TestCase):
         self.assertRaises(KeyError, lambda: ports[1].configure({"driver": TestDriver, "config": {}}))
         self.assertEqual(0, mock_control.set_motor_port_type.call_count)
 
+    def test_driver_methods_are_rebound_when_reconfigured(self):
+        mock_control = Mock()
+        mock_control.get_motor_port_amount = Mock(return_value=6)
+        mock_control.get_motor_port_types = Mock(return_value={"NotConfigured": 0, "DcMotor": 1})
+
+        ports = create_motor_port_handler(mock_control)
+        port = ports[1]
+
+        port.configure(Motors.RevvyMotor)
+        self.assertIn('create_set_speed_command', vars(port))
+        self.assertEqual(port._driver.update_status, port.update_status)
+        port.pos = 10
+        self.assertEqual(10, port.pos)
+
+        port.configure(None)
+        self.assertEqual('NotConfigured', port.driver)
+        self.assertNotIn('create_set_speed_command', vars(port))
+        self.assertEqual(port._driver.update_status, port.update_status)
+
+    def test_configuring_the_same_driver_again_does_not_resend_configuration(self):
+        mock_control = Mock()
+        mock_control.get_motor_port_amount = Mock(return_value=6)
+        mock_control.get_motor_port_types = Mock(return_value={"NotConfigured": 0, "Test": 1})
+        mock_control.set_motor_port_type = Mock()
+
+        ports = create_motor_port_handler(mock_control)
+
+        ports[1].configure({"driver": TestDriver, "config": {'a': 1}})
+        ports[1].configure({"driver": TestDriver, "config": {'a': 1}})
+        self.assertEqual(1, mock_control.set_motor_port_type.call_count)
+
+        ports[1].configure({"driver": TestDriver, "config": {'a': 2}})
+        self.assertEqual(2, mock_control.set_motor_port_type.call_count)
+
+        ports[2].configure({"driver": TestDriver, "config": {'a': 2}})
+        self.assertEqual(3, mock_control.set_motor_port_type.call_count)
+
+        ports[1].uninitialize()
+        ports[1].uninitialize()
+        self.assertEqual(4, mock_control.set_motor_port_type.call_count)
+
+    def test_not_configured_port_has_default_state(self):
+        mock_control = Mock()
+        mock_control.get_motor_port_amount = Mock(return_value=6)
+        mock_control.get_motor_port_types = Mock(return_value={"NotConfigured": 0})
+
+        ports = create_motor_port_handler(mock_control)
+        ports.reset()
+
+        state = ports[1].state
+        self.assertEqual(MotorStatus.NORMAL, state.status)
+        self.assertEqual((0, 0, 0), (state.power, state.pos, state.speed))
+        self.assertIs(state, ports[2].state)
+
+    def test_invalidated_port_configuration_is_resent(self):
+        mock_control = Mock()
+        mock_control.get_motor_port_amount = Mock(return_value=6)
+        mock_control.get_motor_port_types = Mock(return_value={"NotConfigured": 0, "Test": 1})
+        mock_control.set_motor_port_type = Mock()
+
+        ports = create_motor_port_handler(mock_control)
+
+        ports[1].configure({"driver": TestDriver, "config": {}})
+        ports.invalidate()
+        ports[1].configure({"driver": TestDriver, "config": {}})
+
+        self.assertEqual(2, mock_control.set_motor_port_type.call_count)
+
 
 class TestDcMotorDriver(unittest.TestCase):
     config = {
@@ -130,3 +200,20 @@ class TestDcMotorDriver(unittest.TestCase):
                          port.interface.set_motor_port_control_value.call_args_list[3])
         self.assertEqual(call((42, 2, 251, 255, 255, 255)),  # move to -5
                          port.interface.set_motor_port_control_value.call_args_list[4])
+
+    def test_status_is_published_as_one_snapshot(self):
+        port = self.create_port()
+        driver = DcMotorController(port, self.config)
+
+        before = driver.state
+        driver.update_status(struct.pack('<bblf', 2, 20, 100, 30.5))
+        after = driver.state
+
+        self.assertIsNot(before, after)
+        self.assertEqual((MotorStatus.GOAL_REACHED, 20, 100, 30.5), tuple(after))
+        self.assertRaises(AttributeError, lambda: setattr(after, 'pos', 0))
+
+        driver.pos = 0
+        self.assertEqual(0, driver.state.pos)
+        self.assertEqual(100, after.pos)
+        self.assertEqual(100, driver.raw_pos)
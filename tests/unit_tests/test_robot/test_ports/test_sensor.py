@@ -1,12 +1,20 @@
 # SPDX-License-Identifier: GPL-3.0-only
 
+import struct
+import threading
+import time
 import unittest
 
-from mock import Mock
+from mock import Mock, patch
 
 from revvy.robot.ports.common import PortInstance
 from revvy.robot.ports.sensor import create_sensor_port_handler
 from revvy.robot.ports.sensors.base import BaseSensorPortDriver
+from revvy.robot.ports.sensors.ev3 import Ev3UARTSensor, Ev3ModeCache, Ev3Mode, ev3_colors, ev3_sensor_profiles, \
+    ev3_color
+from revvy.robot.ports.sensors.filters import create_filter
+from revvy.utils.file_storage import MemoryStorage
+from revvy.utils.functions import map_values
 
 
 class TestSensorPortHandler(unittest.TestCase):
@@ -85,3 +93,264 @@ class TestBaseSensorPortDriver(unittest.TestCase):
         sensor.convert_sensor_value = Mock(return_value=5)
 
         self.assertFalse(sensor.has_data)
+
+    def test_value_and_raw_value_are_published_together(self):
+        port = create_port()
+
+        sensor = BaseSensorPortDriver("driver_name", port)
+        sensor.convert_sensor_value = Mock(return_value=5)
+
+        self.assertFalse(sensor.state.has_data)
+
+        sensor.update_status([1, 2])
+        state = sensor.state
+        self.assertEqual((5, [1, 2]), tuple(state))
+
+        sensor.update_status([])
+        self.assertFalse(sensor.has_data)
+        self.assertEqual(5, state.value)
+
+    def test_ev3_sensor_state_machine_is_separate_from_data(self):
+        port = create_port()
+
+        sensor = Ev3UARTSensor(port, modes=[])
+        sensor.update_status([0x00])
+        self.assertEqual(Ev3UARTSensor.STATE_RESET, sensor._state)
+        self.assertEqual([0x00], sensor.raw_value)
+
+    def test_filter_is_applied_to_every_value(self):
+        port = create_port()
+
+        sensor = BaseSensorPortDriver("driver_name", port)
+        sensor.convert_sensor_value = lambda raw: raw[0]
+        sensor.set_filter(create_filter(median=3))
+
+        sensor.update_status([10])
+        sensor.update_status([100])
+        self.assertEqual(10, sensor.value)
+        sensor.update_status([12])
+        self.assertEqual(12, sensor.value)
+        self.assertEqual([12], sensor.raw_value)
+
+    def test_filter_sees_repeated_values(self):
+        port = create_port()
+        status_changed = Mock()
+
+        sensor = BaseSensorPortDriver("driver_name", port)
+        sensor.on_status_changed.add(status_changed)
+        sensor.convert_sensor_value = lambda raw: raw[0] == 1
+        sensor.set_filter(create_filter(debounce=2))
+
+        sensor.update_status([0])
+        sensor.update_status([1])
+        self.assertFalse(sensor.value)
+        self.assertEqual(2, status_changed.call_count)
+
+        sensor.update_status([1])
+        self.assertTrue(sensor.value)
+        self.assertEqual(3, status_changed.call_count)
+
+        # nothing changed
+        sensor.update_status([1])
+        self.assertEqual(3, status_changed.call_count)
+
+
+def create_mode_info(raw_max):
+    return struct.pack('<4b6f', 1, 0, 3, 0, 0, raw_max, 0, 100, 0, raw_max)
+
+
+class TestEv3Mode(unittest.TestCase):
+    def test_all_samples_are_converted(self):
+        # 3 samples, s16
+        mode = Ev3Mode(3, 3, 4, 0, -1000, 1000, -100, 100, -10, 10)
+
+        self.assertEqual([-10.0, 0.0, 5.0], mode.convert(struct.pack('<3h', -1000, 0, 500)))
+
+    def test_conversion_matches_linear_mapping(self):
+        # 2 samples, s16be
+        mode = Ev3Mode(2, 4, 4, 1, 10, 1010, 0, 100, 0, 25)
+
+        values = mode.convert(struct.pack('>2h', 123, 987))
+        expected = [map_values(123, 10, 1010, 0, 25), map_values(987, 10, 1010, 0, 25)]
+        for value, expected_value in zip(values, expected):
+            self.assertAlmostEqual(expected_value, value)
+
+    def test_data_can_be_converted_from_offset(self):
+        mode = Ev3Mode(1, 5, 4, 0, 0, 100, 0, 100, 0, 100)
+
+        self.assertEqual([42.0], mode.convert(b'\x80' + struct.pack('<l', 42), 1))
+
+    def test_payload_size_can_differ_from_sample_count(self):
+        mode = Ev3Mode(1, 0, 3, 0, 0, 100, 0, 100, 0, 100)
+
+        self.assertEqual([1.0, 2.0], mode.convert(b'\x01\x02'))
+
+
+class TestEv3ModeCache(unittest.TestCase):
+    def test_modes_are_read_once_per_sensor_type(self):
+        cache = Ev3ModeCache()
+        read_mode_info = Mock(side_effect=lambda i: create_mode_info(i * 10))
+
+        modes = cache.get_modes(29, 2, read_mode_info)
+        self.assertEqual(2, len(modes))
+        self.assertEqual(2, read_mode_info.call_count)
+
+        self.assertIs(modes, cache.get_modes(29, 2, read_mode_info))
+        self.assertEqual(2, read_mode_info.call_count)
+
+        cache.get_modes(30, 1, read_mode_info)
+        self.assertEqual(3, read_mode_info.call_count)
+
+    def test_modes_are_loaded_from_storage(self):
+        storage = MemoryStorage()
+        read_mode_info = Mock(side_effect=lambda i: create_mode_info(i * 10))
+
+        Ev3ModeCache(storage).get_modes(29, 2, read_mode_info)
+        self.assertEqual(2, read_mode_info.call_count)
+
+        modes = Ev3ModeCache(storage).get_modes(29, 2, read_mode_info)
+        self.assertEqual(2, read_mode_info.call_count)
+        self.assertEqual([20.0], modes[1].convert(b'\x14'))
+
+    def test_stored_modes_are_ignored_if_mode_count_is_different(self):
+        storage = MemoryStorage()
+        read_mode_info = Mock(side_effect=lambda i: create_mode_info(i * 10))
+
+        Ev3ModeCache(storage).get_modes(29, 2, read_mode_info)
+        modes = Ev3ModeCache(storage).get_modes(29, 3, read_mode_info)
+
+        self.assertEqual(3, len(modes))
+        self.assertEqual(5, read_mode_info.call_count)
+
+
+def create_ev3_port(sensor_type, mode_infos):
+    port = create_port()
+
+    def _read_sensor_info(_, page):
+        if page == 0:
+            return struct.pack('<blbb', sensor_type, 57600, len(mode_infos), len(mode_infos))
+        return mode_infos[page - 1]
+
+    port.interface.read_sensor_info = Mock(side_effect=_read_sensor_info)
+
+    return port
+
+
+def wait_for_mode_discovery(port):
+    for thread in threading.enumerate():
+        if thread.name == f'Ev3ModeDiscovery {port.id}':
+            thread.join(2)
+
+
+class TestEv3UARTSensor(unittest.TestCase):
+    def test_modes_are_read_in_the_background(self):
+        port = create_ev3_port(29, [create_mode_info(100)])
+
+        with patch('revvy.robot.ports.sensors.ev3.ev3_mode_cache', Ev3ModeCache()):
+            sensor = Ev3UARTSensor(port)
+
+            sensor.update_status(b'\x80\x32')
+            self.assertIsNone(sensor.value)
+
+            wait_for_mode_discovery(port)
+            self.assertEqual(2, port.interface.read_sensor_info.call_count)
+
+            sensor.update_status(b'\x80\x3c')
+            self.assertEqual([60.0], sensor.value)
+
+    def test_generic_driver_returns_lists_and_keeps_the_mode(self):
+        # color sensor, used with the generic driver
+        port = create_ev3_port(29, [create_mode_info(100), create_mode_info(100), create_mode_info(7)])
+        port.interface.write_sensor_port = Mock()
+
+        with patch('revvy.robot.ports.sensors.ev3.ev3_mode_cache', Ev3ModeCache()):
+            sensor = Ev3UARTSensor(port)
+
+            sensor.update_status(b'\x80\x32')
+            wait_for_mode_discovery(port)
+
+            sensor.update_status(b'\x80\x05')
+            self.assertEqual([5.0], sensor.value)
+            self.assertEqual(0, port.interface.write_sensor_port.call_count)
+
+    def test_color_sensor_driver_uses_color_profile(self):
+        port = create_ev3_port(29, [create_mode_info(100), create_mode_info(100), create_mode_info(7)])
+        port.interface.write_sensor_port = Mock()
+
+        with patch('revvy.robot.ports.sensors.ev3.ev3_mode_cache', Ev3ModeCache()):
+            sensor = ev3_color(port, None)
+
+            sensor.update_status(b'\x80\x32')
+            wait_for_mode_discovery(port)
+
+            # default mode is color detection
+            port.interface.write_sensor_port.assert_called_once_with(3, [2])
+
+            sensor.update_status(b'\x82\x05')
+            self.assertIs(ev3_colors[5], sensor.value)
+            self.assertEqual('Red', sensor.value.name)
+
+            # invalid color ids are ignored
+            sensor.update_status(b'\x82\x09')
+            self.assertIs(ev3_colors[5], sensor.value)
+
+    def test_failed_mode_discovery_is_retried_after_a_delay(self):
+        port = create_ev3_port(99, [create_mode_info(100)])
+        read_sensor_info = port.interface.read_sensor_info.side_effect
+        port.interface.read_sensor_info.side_effect = IOError
+
+        with patch('revvy.robot.ports.sensors.ev3.ev3_mode_cache', Ev3ModeCache()):
+            sensor = Ev3UARTSensor(port)
+            sensor.discovery_retry_interval = 0.05
+
+            sensor.update_status(b'\x80\x32')
+            wait_for_mode_discovery(port)
+            self.assertEqual(1, port.interface.read_sensor_info.call_count)
+
+            # no new attempt until the retry interval expires
+            sensor.update_status(b'\x80\x33')
+            wait_for_mode_discovery(port)
+            self.assertEqual(1, port.interface.read_sensor_info.call_count)
+
+            port.interface.read_sensor_info.side_effect = read_sensor_info
+            time.sleep(0.1)
+
+            sensor.update_status(b'\x80\x34')
+            wait_for_mode_discovery(port)
+            self.assertEqual(3, port.interface.read_sensor_info.call_count)
+
+            sensor.update_status(b'\x80\x3c')
+            self.assertEqual([60.0], sensor.value)
+
+    def test_default_mode_is_selected_before_modes_are_used(self):
+        port = create_port()
+        modes = [Ev3Mode.parse(create_mode_info(100)), Ev3Mode.parse(create_mode_info(100)),
+                 Ev3Mode.parse(create_mode_info(7))]
+
+        sensor = Ev3UARTSensor(port, profile=ev3_sensor_profiles[29])
+        sensor._get_modes = Mock(return_value=modes)
+
+        def _check_modes_not_published(*_):
+            self.assertIsNone(sensor._modes)
+
+        port.interface.write_sensor_port = Mock(side_effect=_check_modes_not_published)
+
+        sensor._discover_modes()
+
+        port.interface.write_sensor_port.assert_called_once_with(3, [2])
+        self.assertIs(modes, sensor._modes)
+
+        # data of the previous mode is not converted
+        port.interface.write_sensor_port = Mock()
+        sensor.update_status(b'\x80\x05')
+        self.assertIsNone(sensor.value)
+
+    def test_explicit_profile_is_used_with_known_modes(self):
+        port = create_port()
+
+        modes = [Ev3Mode.parse(create_mode_info(255)), Ev3Mode.parse(create_mode_info(255))]
+        sensor = Ev3UARTSensor(port, modes=modes, profile=ev3_sensor_profiles[30])
+        sensor.update_status(b'\x80\x01')
+        self.assertEqual(1.0, sensor.value)
+        sensor.update_status(b'\x80\x2a')
+        self.assertEqual(42.0, sensor.value)
@@ -0,0 +1,43 @@
+# SPDX-License-Identifier: GPL-3.0-only
+
+import unittest
+
+from revvy.robot.ports.sensors.filters import MedianFilter, ExponentialMovingAverage, Debounce, Hysteresis, \
+    create_filter
+
+
+class TestSensorFilters(unittest.TestCase):
+    def test_median_filter_removes_spikes(self):
+        f = MedianFilter(3)
+        self.assertListEqual([10, 10, 11, 12, 13, 12], [f(x) for x in [10, 11, 100, 12, 13, 0]])
+
+    def test_median_filter_forgets_values_after_reset(self):
+        f = MedianFilter(3)
+        f(100)
+        f(100)
+        f.reset()
+        self.assertEqual(5, f(5))
+
+    def test_ema_starts_from_first_value(self):
+        f = ExponentialMovingAverage(0.25)
+        self.assertEqual(8, f(8))
+        self.assertEqual(10, f(16))
+
+    def test_debounce_ignores_short_glitches(self):
+        f = Debounce(3)
+        self.assertListEqual([0, 0, 0, 0, 0, 0, 1], [f(x) for x in [0, 1, 1, 0, 1, 1, 1]])
+
+    def test_hysteresis_keeps_output_between_thresholds(self):
+        f = Hysteresis(10, 20)
+        self.assertListEqual([True, True, True, False, False], [f(x) for x in [21, 15, 10, 9, 19]])
+
+    def test_create_filter_applies_stages_in_order(self):
+        f = create_filter(median=3, hysteresis=(10, 20), debounce=2)
+        self.assertEqual(3, len(f))
+        # the spike is removed by the median filter, the change is delayed by debounce
+        self.assertListEqual([False, False, False, False, True, True], [f(x) for x in [5, 50, 5, 50, 50, 50]])
+
+    def test_empty_filter_returns_input(self):
+        f = create_filter()
+        self.assertEqual(0, len(f))
+        self.assertEqual(5, f(5))
@@ -0,0 +1,122 @@
+# SPDX-License-Identifier: GPL-3.0-only
+
+import unittest
+
+from mock import Mock
+
+from revvy.robot.configurations import Motors
+from revvy.robot.ports.motor import create_motor_port_handler
+from revvy.robot.trajectory import MotionProfile, TrajectoryFollower, arc_profiles
+from revvy.utils.awaiter import AwaiterSignal
+
+
+def create_motors(*configs):
+    mock_control = Mock()
+    mock_control.get_motor_port_amount = Mock(return_value=6)
+    mock_control.get_motor_port_types = Mock(return_value={"NotConfigured": 0, "DcMotor": 1})
+
+    ports = create_motor_port_handler(mock_control)
+    for port, config in zip(ports, configs):
+        port.configure(config)
+
+    mock_control.set_motor_port_control_value.reset_mock()
+
+    return mock_control, ports
+
+
+class TestMotionProfile(unittest.TestCase):
+    def test_trapezoidal_profile_covers_distance_within_limits(self):
+        profile = MotionProfile.trapezoidal(720, max_speed=60, max_acceleration=120, period=0.01)
+
+        self.assertAlmostEqual(720, profile.positions[-1], places=2)
+        self.assertAlmostEqual(720, sum(profile.speeds) * 6 * profile.period, places=1)
+        self.assertLessEqual(max(profile.speeds), 60.01)
+        self.assertEqual(0, profile.speeds[-1])
+        # 0.5s acceleration, 1.5s cruise, 0.5s deceleration
+        self.assertAlmostEqual(2.5, profile.duration, places=1)
+
+    def test_short_movements_do_not_reach_max_speed(self):
+        profile = MotionProfile.trapezoidal(-30, max_speed=60, max_acceleration=120, period=0.01)
+
+        self.assertAlmostEqual(-30, profile.positions[-1], places=2)
+        self.assertLess(max(map(abs, profile.speeds)), 60)
+        self.assertTrue(all(s <= 0 for s in profile.speeds))
+
+    def test_s_curve_profile_covers_distance_within_limits(self):
+        profile = MotionProfile.s_curve(720, max_speed=60, max_acceleration=120, period=0.01)
+
+        self.assertAlmostEqual(720, profile.positions[-1], places=2)
+        self.assertLessEqual(max(profile.speeds), 60.01)
+
+        accelerations = [abs(b - a) / profile.period for a, b in zip(profile.speeds[:-2], profile.speeds[1:-1])]
+        self.assertLessEqual(max(accelerations), 121)
+
+    def test_arc_profiles_have_same_timing(self):
+        left, right = arc_profiles(radius=100, angle=90, max_speed=60, max_acceleration=120,
+                                   wheel_diameter=50, track_width=100)
+
+        self.assertEqual(len(left), len(right))
+        # inner wheel travels 50 units, outer wheel travels 150 units along a quarter circle
+        self.assertAlmostEqual(90 * 50 * 360 / 180 / 50, left.positions[-1], places=1)
+        self.assertAlmostEqual(90 * 150 * 360 / 180 / 50, right.positions[-1], places=1)
+
+
+class TestTrajectoryFollower(unittest.TestCase):
+    def test_frames_are_sent_only_when_changed(self):
+        control, ports = create_motors(Motors.RevvyMotor, Motors.RevvyMotor)
+        now = [0]
+
+        profile = MotionProfile.trapezoidal(360, max_speed=60, max_acceleration=600, period=0.01)
+        follower = TrajectoryFollower([ports[1], ports[2]], [profile, profile.scaled(-1)], time_source=lambda: now[0])
+
+        follower.start()
+        self.assertEqual(1, control.set_motor_port_control_value.call_count)
+        self.assertEqual(bytes([*ports[1].create_set_speed_command(profile.speeds[0]),
+                                *ports[2].create_set_speed_command(-profile.speeds[0])]),
+                         control.set_motor_port_control_value.call_args[0][0])
+
+        # same tick, nothing is sent
+        follower.update()
+        self.assertEqual(1, control.set_motor_port_control_value.call_count)
+
+        # cruising: speed is constant
+        now[0] = 0.5
+        follower.update()
+        calls = control.set_motor_port_control_value.call_count
+        now[0] = 0.51
+        follower.update()
+        self.assertEqual(calls, control.set_motor_port_control_value.call_count)
+
+        now[0] = profile.duration + 0.01
+        follower.update()
+        self.assertEqual(AwaiterSignal.FINISHED, follower.awaiter.state)
+        self.assertEqual(bytes([*ports[1].create_set_speed_command(0), *ports[2].create_set_speed_command(0)]),
+                         control.set_motor_port_control_value.call_args[0][0])
+
+    def test_tracking_error_is_recorded(self):
+        control, ports = create_motors(Motors.RevvyMotor)
+        now = [0]
+
+        profile = MotionProfile.trapezoidal(360, max_speed=60, max_acceleration=600, period=0.01)
+        follower = TrajectoryFollower([ports[1]], [profile], time_source=lambda: now[0])
+
+        follower.start()
+        now[0] = 0.5
+        follower.update()
+
+        self.assertAlmostEqual(-profile.positions[50], follower.position_errors[0], places=3)
+        self.assertAlmostEqual(abs(profile.positions[50]), follower.max_error, places=3)
+
+    def test_cancelled_follower_stops_sending(self):
+        control, ports = create_motors(Motors.RevvyMotor)
+        now = [0]
+
+        profile = MotionProfile.trapezoidal(360, max_speed=60, max_acceleration=600, period=0.01)
+        follower = TrajectoryFollower([ports[1]], [profile], time_source=lambda: now[0])
+
+        follower.start()
+        follower.awaiter.cancel()
+
+        now[0] = 0.05
+        follower.update()
+        self.assertEqual(1, control.set_motor_port_control_value.call_count)
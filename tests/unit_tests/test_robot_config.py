@@ -5,7 +5,7 @@ import unittest
 from revvy.robot.configurations import Sensors, Motors
 from revvy.scripting.builtin_scripts import drive_2sticks
 from revvy.utils.functions import b64_encode_str
-from revvy.robot_config import RobotConfig, ConfigError
+from revvy.robot_config import RobotConfig, ConfigError, RobotConfigCache
 
 
 class TestRobotConfig(unittest.TestCase):
@@ -477,3 +477,95 @@ class TestRobotConfig(unittest.TestCase):
 
         config = RobotConfig.from_string(json)
         self.assertIsNotNone(config)
+
+
+class TestRobotConfigDiff(unittest.TestCase):
+    @staticmethod
+    def create_config(motor_types, sensor_types, script=None):
+        motors = ', '.join(f'{{"name": "M{i}", "type": {t}, "side": 0, "reversed": 0}}'
+                           for i, t in enumerate(motor_types, 1))
+        sensors = ', '.join(f'{{"name": "S{i}", "type": {t}}}' for i, t in enumerate(sensor_types, 1))
+        blocklies = ''
+        if script:
+            blocklies = f'{{"pythonCode": "{b64_encode_str(script)}", "assignments": {{"background": 0}}}}'
+
+        return RobotConfig.from_string(f'''
+        {{
+            "robotConfig": {{"motors": [{motors}], "sensors": [{sensors}]}},
+            "blocklyList": [{blocklies}]
+        }}''')
+
+    def test_identical_configurations_have_no_differences(self):
+        config = self.create_config([1, 2, 0], [1, 0], 'pass')
+        same_config = self.create_config([1, 2, 0], [1, 0], 'pass')
+
+        self.assertTrue(config.diff(same_config).is_empty)
+
+    def test_changed_ports_are_detected(self):
+        config = self.create_config([1, 0, 1], [1, 2])
+        other = self.create_config([1, 1, 0], [1, 1])
+
+        diff = config.diff(other)
+
+        self.assertEqual({2, 3}, diff.motors)
+        self.assertEqual({2}, diff.sensors)
+        self.assertFalse(diff.drivetrain)
+
+    def test_ports_missing_from_one_configuration_are_compared_as_not_configured(self):
+        config = self.create_config([1, 0], [])
+        other = self.create_config([1], [0, 1])
+
+        diff = config.diff(other)
+
+        self.assertEqual(set(), diff.motors)
+        self.assertEqual({2}, diff.sensors)
+
+    def test_drivetrain_changes_when_a_drivetrain_motor_changes(self):
+        config = self.create_config([2, 2], [])
+
+        self.assertTrue(config.diff(self.create_config([2, 1], [])).drivetrain)
+        self.assertTrue(config.diff(self.create_config([2], [])).drivetrain)
+        self.assertFalse(config.diff(self.create_config([2, 2, 1], [])).drivetrain)
+
+    def test_script_changes_are_detected(self):
+        config = self.create_config([1], [], 'pass')
+
+        self.assertFalse(config.diff(self.create_config([1], [], 'pass')).scripts)
+        self.assertTrue(config.diff(self.create_config([1], [], 'print()')).scripts)
+        self.assertTrue(config.diff(self.create_config([1], [])).scripts)
+        # scripts refer to ports by name
+        self.assertTrue(config.diff(self.create_config([0, 1], [], 'pass')).scripts)
+
+
+class TestRobotConfigCache(unittest.TestCase):
+    config = b'{"robotConfig": [], "blocklyList": []}'
+
+    def test_configuration_is_parsed_once_per_digest(self):
+        cache = RobotConfigCache()
+
+        first = cache.parse('digest', self.config)
+        second = cache.parse('digest', self.config)
+        other = cache.parse('other digest', self.config)
+
+        self.assertIs(first, second)
+        self.assertIsNot(first, other)
+        self.assertEqual(1, cache.hits)
+        self.assertEqual(2, cache.misses)
+
+    def test_invalid_configuration_is_not_cached(self):
+        cache = RobotConfigCache()
+
+        self.assertRaises(ConfigError, lambda: cache.parse('digest', b'not valid json'))
+        self.assertRaises(ConfigError, lambda: cache.parse('digest', b'not valid json'))
+        self.assertEqual(0, cache.hits)
+
+    def test_least_recently_used_configuration_is_dropped(self):
+        cache = RobotConfigCache(max_size=2)
+
+        first = cache.parse('first', self.config)
+        cache.parse('second', self.config)
+        cache.parse('first', self.config)
+        cache.parse('third', self.config)
+
+        self.assertIs(first, cache.parse('first', self.config))
+        self.assertIsNot(first, cache.parse('second', self.config))
@@ -0,0 +1,82 @@
+# SPDX-License-Identifier: GPL-3.0-only
+
+import unittest
+
+from mock import Mock, patch
+
+from revvy.scripting.code_cache import CodeCache
+from revvy.utils.file_storage import MemoryStorage, StorageError
+
+
+class TestCodeCache(unittest.TestCase):
+    def test_same_source_returns_same_runnable(self):
+        cache = CodeCache()
+
+        first = cache.create_runnable('result.append(1)')
+        second = cache.create_runnable('result.append(1)')
+        other = cache.create_runnable('result.append(2)')
+
+        self.assertIs(first, second)
+        self.assertIsNot(first, other)
+        self.assertEqual(1, cache.hits)
+        self.assertEqual(2, cache.misses)
+
+        result = []
+        first(result=result)
+        other(result=result)
+        self.assertEqual([1, 2], result)
+
+    def test_compiled_code_is_loaded_from_storage(self):
+        storage = MemoryStorage()
+
+        CodeCache(storage=storage).create_runnable('result.append(1)')
+
+        cache = CodeCache(storage=storage)
+        with patch('revvy.scripting.code_cache.compile', create=True) as mock_compile:
+            runnable = cache.create_runnable('result.append(1)')
+            self.assertEqual(0, mock_compile.call_count)
+
+        result = []
+        runnable(result=result)
+        self.assertEqual([1], result)
+
+    def test_corrupted_storage_entry_is_recompiled(self):
+        storage = Mock()
+        storage.read_metadata = Mock(return_value={'magic': 'invalid', 'compile_time': 0})
+        storage.names = Mock(return_value=[])
+
+        cache = CodeCache(storage=storage)
+        runnable = cache.create_runnable('result.append(1)')
+
+        self.assertEqual(0, storage.read.call_count)
+        self.assertEqual(1, storage.write.call_count)
+
+        result = []
+        runnable(result=result)
+        self.assertEqual([1], result)
+
+    def test_invalid_code_fails_when_started(self):
+        storage = Mock()
+        storage.read_metadata = Mock(side_effect=StorageError)
+        cache = CodeCache(storage=storage)
+
+        runnable = cache.create_runnable('some code')
+
+        self.assertRaises(SyntaxError, runnable)
+        self.assertEqual(0, storage.write.call_count)
+
+    def test_number_of_stored_scripts_is_limited(self):
+        storage = MemoryStorage()
+        cache = CodeCache(storage=storage, max_stored=2)
+
+        for i in range(4):
+            cache.create_runnable(f'result.append({i})')
+
+        self.assertEqual(2, len(storage.names()))
+
+        # the most recently written scripts are kept
+        cache = CodeCache(storage=storage, max_stored=2)
+        with patch('revvy.scripting.code_cache.compile', create=True) as mock_compile:
+            cache.create_runnable('result.append(2)')
+            cache.create_runnable('result.append(3)')
+            self.assertEqual(0, mock_compile.call_count)
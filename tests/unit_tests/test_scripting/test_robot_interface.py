@@ -1,11 +1,21 @@
 # SPDX-License-Identifier: GPL-3.0-only
 
+import time
 import unittest
+from threading import Thread, Timer
+
 from mock import Mock
 
+from revvy.robot.configurations import Motors
+from revvy.robot.ports.common import FunctionAggregator
+from revvy.robot.ports.motor import create_motor_port_handler, MotorConstants
+from revvy.robot.ports.sensor import create_sensor_port_handler
+from revvy.robot.ports.sensors.base import SensorState
+from revvy.robot_config import RobotConfig
 from revvy.utils.functions import hex2rgb
 from revvy.scripting.resource import Resource
-from revvy.scripting.robot_interface import RingLedWrapper, PortCollection, ResourceWrapper
+from revvy.scripting.robot_interface import RingLedWrapper, PortCollection, ResourceWrapper, SensorPortWrapper, \
+    ResourceGroupWrapper, MotorGroupWrapper, RobotWrapper
 
 
 class TestRingLed(unittest.TestCase):
@@ -70,3 +80,251 @@ class TestPortCollection(unittest.TestCase):
         self.assertEqual(3, pc['bar'])
         self.assertEqual(5, pc['baz'])
         self.assertRaises(KeyError, lambda: pc['foobar'])
+
+
+def create_sensor_wrapper(state=SensorState(None, None)):
+    sensor = Mock()
+    sensor.on_status_changed = FunctionAggregator()
+    sensor.on_config_changed = FunctionAggregator()
+    sensor.state = state
+
+    script = Mock()
+    script.is_stop_requested = False
+
+    return SensorPortWrapper(script, sensor, ResourceWrapper(Resource(), 0)), sensor, script
+
+
+def update_sensor_later(sensor, value, delay=0.01):
+    def _update():
+        sensor.state = SensorState(value, [value])
+        sensor.on_status_changed(sensor)
+
+    timer = Timer(delay, _update)
+    timer.start()
+    return timer
+
+
+class TestSensorPortWrapper(unittest.TestCase):
+    def test_read_returns_value_if_sensor_has_data(self):
+        sw, sensor, script = create_sensor_wrapper(SensorState(5, [5]))
+
+        self.assertEqual(5, sw.read())
+        self.assertEqual(0, len(sensor.on_status_changed))
+
+    def test_read_waits_for_first_data(self):
+        sw, sensor, script = create_sensor_wrapper()
+
+        update_sensor_later(sensor, 3)
+
+        self.assertEqual(3, sw.read())
+        self.assertEqual(0, len(sensor.on_status_changed))
+
+    def test_wait_for_value_returns_value_that_satisfies_predicate(self):
+        sw, sensor, script = create_sensor_wrapper(SensorState(5, [5]))
+
+        first = update_sensor_later(sensor, 15)
+        second = update_sensor_later(sensor, 25, delay=0.02)
+
+        self.assertEqual(25, sw.wait_for_value(lambda value: value > 20, timeout=2))
+        first.join()
+        second.join()
+
+    def test_wait_for_value_returns_none_on_timeout(self):
+        sw, sensor, script = create_sensor_wrapper(SensorState(5, [5]))
+
+        self.assertIsNone(sw.wait_for_value(lambda value: value > 20, timeout=0.01))
+        self.assertEqual(0, len(sensor.on_status_changed))
+
+    def test_wait_for_change_ignores_updates_with_same_value(self):
+        sw, sensor, script = create_sensor_wrapper(SensorState(5, [5]))
+
+        first = update_sensor_later(sensor, 5)
+        second = update_sensor_later(sensor, 6, delay=0.02)
+
+        self.assertEqual(6, sw.wait_for_change(timeout=2))
+        first.join()
+        second.join()
+
+    def test_stopping_the_script_interrupts_waiting(self):
+        sw, sensor, script = create_sensor_wrapper(SensorState(5, [5]))
+
+        def _stop():
+            script.is_stop_requested = True
+            stop_callback = script.on_stopping.call_args[0][0]
+            stop_callback()
+
+        timer = Timer(0.01, _stop)
+        timer.start()
+
+        self.assertRaises(InterruptedError, lambda: sw.wait_for_change())
+        timer.join()
+        self.assertEqual(0, len(sensor.on_status_changed))
+
+    def test_reconfiguring_the_port_during_wait_subscribes_to_the_new_driver(self):
+        sw, sensor, script = create_sensor_wrapper()
+        old_status_changed = sensor.on_status_changed
+
+        def _reconfigure():
+            sensor.on_config_changed(sensor, None)
+            # the new driver has its own callbacks
+            old_status_changed.clear()
+            sensor.on_status_changed = FunctionAggregator()
+            sensor.on_config_changed(sensor, {})
+
+            update_sensor_later(sensor, 5)
+
+        timer = Timer(0.01, _reconfigure)
+        timer.start()
+
+        start = time.monotonic()
+        self.assertEqual(5, sw.wait_for_value(lambda value: value == 5, timeout=2))
+        # woken up by the update, not by the timeout
+        self.assertLess(time.monotonic() - start, 1)
+        timer.join()
+
+        self.assertEqual(0, len(old_status_changed))
+        self.assertEqual(0, len(sensor.on_status_changed))
+        self.assertEqual(0, len(sensor.on_config_changed))
+
+    def test_read_of_not_configured_port_returns_when_port_is_configured(self):
+        sw, sensor, script = create_sensor_wrapper()
+
+        def _configure():
+            sensor.on_status_changed = FunctionAggregator()
+            sensor.state = SensorState(3, [3])
+            sensor.on_config_changed(sensor, {})
+
+        values = []
+        reader = Thread(target=lambda: values.append(sw.read()), daemon=True)
+        reader.start()
+
+        timer = Timer(0.01, _configure)
+        timer.start()
+
+        reader.join(2)
+        self.assertEqual([3], values)
+
+    def test_stop_callback_is_registered_once_per_run(self):
+        sw, sensor, script = create_sensor_wrapper(SensorState(5, [5]))
+
+        sw.wait_for_change(timeout=0)
+        sw.wait_for_change(timeout=0)
+        self.assertEqual(1, script.on_stopping.call_count)
+
+        script.on_stopping.call_args[0][0]()
+
+        sw.wait_for_change(timeout=0)
+        self.assertEqual(2, script.on_stopping.call_count)
+
+
+class TestResourceGroupWrapper(unittest.TestCase):
+    def test_group_request_takes_every_resource(self):
+        resources = [ResourceWrapper(Resource(), 1), ResourceWrapper(Resource(), 1)]
+
+        handle = ResourceGroupWrapper(resources).request()
+
+        self.assertTrue(handle)
+        self.assertTrue(all(resource.is_taken for resource in resources))
+
+        handle.release()
+        self.assertFalse(any(resource.is_taken for resource in resources))
+
+    def test_failed_request_only_releases_resources_taken_by_the_request(self):
+        blocked = Resource()
+        resources = [ResourceWrapper(Resource(), 1), ResourceWrapper(Resource(), 1), ResourceWrapper(blocked, 1)]
+
+        # the script already uses the first resource, the last one is held by a higher priority owner
+        held_handle = resources[0].request()
+        blocked.request(0)
+
+        handle = ResourceGroupWrapper(resources).request()
+
+        self.assertFalse(handle)
+        self.assertTrue(resources[0].is_taken)
+        self.assertIs(held_handle, resources[0].request())
+        self.assertFalse(resources[1].is_taken)
+
+
+def create_motor_group_wrapper():
+    group = Mock()
+    group.motors = [Mock(id=1), Mock(id=2)]
+
+    script = Mock()
+    script.is_stop_requested = False
+
+    resource = ResourceGroupWrapper([ResourceWrapper(Resource(), 0), ResourceWrapper(Resource(), 0)])
+
+    return MotorGroupWrapper(script, group, resource), group
+
+
+class TestMotorGroupWrapper(unittest.TestCase):
+    def test_move_backwards_negates_every_position(self):
+        mgw, group = create_motor_group_wrapper()
+
+        mgw.move(MotorConstants.DIRECTION_BACK, [90, 180], MotorConstants.UNIT_DEG, 20, MotorConstants.UNIT_SPEED_RPM)
+
+        group.set_position.assert_called_once_with([-90, -180], speed_limit=20, pos_type='relative')
+        self.assertEqual(1, group.set_position.return_value.wait.call_count)
+
+    def test_rotations_are_converted_per_motor(self):
+        mgw, group = create_motor_group_wrapper()
+
+        mgw.move(MotorConstants.DIRECTION_FWD, [1, 2], MotorConstants.UNIT_ROT, 50, MotorConstants.UNIT_SPEED_PWR)
+
+        group.set_position.assert_called_once_with([360, 720], power_limit=50, pos_type='relative')
+
+    def test_spin_backwards_negates_every_speed(self):
+        mgw, group = create_motor_group_wrapper()
+
+        mgw.spin(MotorConstants.DIRECTION_BACK, [10, 20], MotorConstants.UNIT_SPEED_RPM)
+        group.set_speed.assert_called_once_with([-10, -20])
+
+        mgw.spin(MotorConstants.DIRECTION_BACK, 30, MotorConstants.UNIT_SPEED_PWR)
+        group.set_power.assert_called_once_with(-30)
+
+    def test_follow_waits_for_the_movement(self):
+        mgw, group = create_motor_group_wrapper()
+
+        profiles = [Mock(), Mock()]
+        mgw.follow(profiles)
+
+        group.follow.assert_called_once_with(profiles)
+        self.assertEqual(1, group.follow.return_value.wait.call_count)
+
+
+class TestRobotWrapper(unittest.TestCase):
+    def test_motor_group_sends_commands_to_motors_given_by_name_or_id(self):
+        mock_control = Mock()
+        mock_control.get_motor_port_amount = Mock(return_value=6)
+        mock_control.get_motor_port_types = Mock(return_value={"NotConfigured": 0, "DcMotor": 1})
+        mock_control.get_sensor_port_amount = Mock(return_value=4)
+        mock_control.get_sensor_port_types = Mock(return_value={"NotConfigured": 0})
+
+        robot = Mock()
+        robot.led.count = 6
+        robot.motors = create_motor_port_handler(mock_control)
+        robot.sensors = create_sensor_port_handler(mock_control)
+        robot.motors[1].configure(Motors.RevvyMotor)
+        robot.motors[3].configure(Motors.RevvyMotor)
+        mock_control.set_motor_port_control_value.reset_mock()
+
+        config = RobotConfig()
+        config.motors.names['left'] = 3
+
+        resources = {name: Resource(name) for name in ['led_ring', 'drivetrain', 'sound']}
+        resources.update({f'motor_{port.id}': Resource() for port in robot.motors})
+        resources.update({f'sensor_{port.id}': Resource() for port in robot.sensors})
+
+        script = Mock()
+        script.is_stop_requested = False
+
+        rw = RobotWrapper(script, robot, config, resources)
+        group = rw.motor_group('left', 1)
+        group.spin(MotorConstants.DIRECTION_FWD, 20, MotorConstants.UNIT_SPEED_PWR)
+
+        mock_control.set_motor_port_control_value.assert_called_once_with(
+            bytes([*robot.motors[3].create_set_power_command(20), *robot.motors[1].create_set_power_command(20)]))
+
+        # resources are released after the command
+        self.assertFalse(resources['motor_1']._active_handle)
+        self.assertFalse(resources['motor_3']._active_handle)
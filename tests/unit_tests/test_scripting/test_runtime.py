@@ -47,6 +47,7 @@ def create_robot_mock():
     robot_mock.robot.drivetrain = mockobj()
     robot_mock.robot.drivetrain.turn = lambda *args, **kwargs: None
     robot_mock.robot.drivetrain.drive = lambda *args, **kwargs: None
+    robot_mock.robot.drivetrain.arc = lambda *args, **kwargs: None
     robot_mock.robot.sound = MockSound()
     robot_mock.robot.led = mockobj()
     robot_mock.robot.led.count = 0
@@ -135,6 +136,133 @@ mock()'''), 0))
 
         script.cleanup()
 
+    def test_script_is_run_again_with_latest_inputs_after_update(self):
+        robot_mock = create_robot_mock()
+
+        started = Event()
+        resume = Event()
+        finished_twice = Event()
+        runs = []
+
+        def _script(channels, **_):
+            runs.append(list(channels))
+            started.set()
+            resume.wait(2)
+            runs.append(list(channels))
+            if len(runs) == 4:
+                finished_twice.set()
+
+        sm = ScriptManager(robot_mock)
+        sm.add_script(ScriptDescriptor('test', _script, 0))
+
+        script = sm['test']
+
+        channels = [1, 2]
+        script.start_or_update(channels=channels)
+        self.assertTrue(started.wait(2))
+
+        script.start_or_update(channels=[3, 4])
+        script.start_or_update(channels=[5, 6])
+        self.assertEqual(1, script.coalesced_updates)
+
+        resume.set()
+        self.assertTrue(finished_twice.wait(2))
+        script.cleanup()
+
+        # the running script keeps its inputs, then runs once more with the latest inputs
+        self.assertListEqual([[1, 2], [1, 2], [5, 6], [5, 6]], runs)
+        self.assertListEqual([1, 2], channels)
+
+    def test_update_received_while_script_returns_runs_script_again(self):
+        robot_mock = create_robot_mock()
+
+        finished_twice = Event()
+        runs = []
+
+        def _script(channels, **_):
+            runs.append(channels)
+            if len(runs) == 1:
+                # the update arrives after the script has finished its work
+                script.start_or_update(channels=[2])
+            else:
+                finished_twice.set()
+
+        sm = ScriptManager(robot_mock)
+        sm.add_script(ScriptDescriptor('test', _script, 0))
+
+        script = sm['test']
+
+        script.start_or_update(channels=[1])
+        self.assertTrue(finished_twice.wait(2))
+        script.cleanup()
+
+        self.assertListEqual([[1], [2]], runs)
+
+    def test_update_received_while_script_is_stopping_restarts_script(self):
+        robot_mock = create_robot_mock()
+
+        started = Event()
+        stopping = Event()
+        resume = Event()
+        restarted = Event()
+        runs = []
+
+        def _script(ctx, channels, **_):
+            runs.append(channels)
+            if len(runs) == 2:
+                restarted.set()
+            started.set()
+            try:
+                ctx.sleep(2)
+            finally:
+                stopping.set()
+                resume.wait(2)
+
+        sm = ScriptManager(robot_mock)
+        sm.add_script(ScriptDescriptor('test', _script, 0))
+
+        script = sm['test']
+
+        script.start_or_update(channels=[1])
+        self.assertTrue(started.wait(2))
+
+        script.stop()
+        self.assertTrue(stopping.wait(2))
+        self.assertTrue(script.is_stop_requested)
+
+        script.start_or_update(channels=[2])
+        resume.set()
+
+        self.assertTrue(restarted.wait(2))
+        script.cleanup()
+
+        self.assertListEqual([[1], [2]], runs)
+
+    def test_stopped_script_is_not_run_again_after_update(self):
+        robot_mock = create_robot_mock()
+
+        started = Event()
+        mock = Mock()
+
+        def _script(ctx, channels, **_):
+            mock()
+            started.set()
+            ctx.sleep(2)
+
+        sm = ScriptManager(robot_mock)
+        sm.add_script(ScriptDescriptor('test', _script, 0))
+
+        script = sm['test']
+
+        script.start_or_update(channels=[1])
+        self.assertTrue(started.wait(2))
+        script.start_or_update(channels=[2])
+
+        script.stop().wait(2)
+        self.assertEqual(1, mock.call_count)
+
+        script.cleanup()
+
     def test_overwriting_a_script_stops_the_previous_one(self):
         robot_mock = create_robot_mock()
 